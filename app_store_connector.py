@@ -1,10 +1,5 @@
+import html
 import re
-import requests
-from bs4 import BeautifulSoup
-import urllib3
-
-# Optional: silence the LibreSSL warning
-urllib3.disable_warnings(urllib3.exceptions.NotOpenSSLWarning)
 
 headers = {
     # Pretend to be a normal browser so Apple doesn't get suspicious
@@ -15,28 +10,96 @@ headers = {
     )
 }
 
+CHARTS = {
+    "free": "https://apps.apple.com/us/iphone/charts/36?chart=top-free",
+    "paid": "https://apps.apple.com/us/iphone/charts/36?chart=top-paid",
+}
+
+# an app detail link and its inner html, in one pass over the page instead of a parse tree
+_APP_LINK = re.compile(
+    r"""<a\s[^>]*?href\s*=\s*["'](https://apps\.apple\.com/us/app/[^"']+/id(\d+))["'][^>]*>(.*?)</a\s*>""",
+    re.S | re.I,
+)
+_TAG = re.compile(r"<[^>]*>")
+_APP_HREF = re.compile(r"^https://apps\.apple\.com/us/app/.+/id\d+$")
+_APP_SLUG = re.compile(r"/us/app/([^/]+)/id\d+")
+
+
+def parse_chart(page: str, count=None):
+    """
+    (rank, app id, name) of every app on a chart page, in page order, deduplicated by link.
+
+    Notes:
+        - one compiled regex over the raw html, same results as the BeautifulSoup parse (parse_chart_soup) at a
+          fraction of the cost, fast enough to scrape both charts every minute
+        - rank is the number the link text starts with, None when it does not start with one
+        - name is the app's url slug with dashes as spaces, e.g. "chatgpt", "google maps"
+    """
+    seen = set()
+    apps = []
+    for match in _APP_LINK.finditer(page):
+        href, app_id, inner = match.groups()
+        if href in seen:
+            continue
+        text = " ".join(piece for piece in (html.unescape(part).strip() for part in _TAG.split(inner)) if piece)
+        if not text:
+            continue
+        seen.add(href)
+        first = text.split(" ", 1)[0]
+        rank = int(first) if first.isdigit() else None
+        slug = _APP_SLUG.search(href)
+        name = slug.group(1).replace("-", " ") if slug else text.rsplit(" View", 1)[0]
+        apps.append((rank, int(app_id), name))
+        if count is not None and len(apps) == count:
+            break
+    return apps
 
-def get_top_apps(category="UNPAID", count=30):
+
+def silence_ssl_warnings():
+    # Optional: silence the LibreSSL warning, only once a live chart request is about to be made
+    import urllib3
+
+    urllib3.disable_warnings(urllib3.exceptions.NotOpenSSLWarning)
+
+
+def get_top_apps(category="UNPAID", count=30, transport=None, parser="fast"):
     # category options: PAID/UNPAID
+    # transport (transport.Transport) records or replays the chart page instead of a live request
+    # parser "fast" is parse_chart, "soup" the original BeautifulSoup walk
 
     if category == "PAID":
-        URL = "https://apps.apple.com/us/iphone/charts/36?chart=top-paid"
+        URL = CHARTS["paid"]
     elif category == "UNPAID":
-        URL = "https://apps.apple.com/us/iphone/charts/36?chart=top-free"
+        URL = CHARTS["free"]
     else:
         return
 
-    resp = requests.get(URL, headers=headers)
+    if transport is None:
+        # requests is only imported for a live request, importing this module has no side effects
+        import requests
+
+        silence_ssl_warnings()
+        transport = requests
+    resp = transport.get(URL, headers=headers)
     resp.raise_for_status()
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+    if parser == "fast":
+        return [{"rank": rank, "name": name, "id": app_id} for rank, app_id, name in parse_chart(resp.text, count)]
+    return parse_chart_soup(resp.text, count)
+
+
+def parse_chart_soup(page: str, count=30):
+    # the BeautifulSoup parse get_top_apps used to do, kept to check parse_chart against
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page, "html.parser")
 
     app_links = []
 
     # Grab all anchor tags that look like app detail links
     for a in soup.find_all("a", href=True):
         href = a["href"]
-        if re.match(r"^https://apps\.apple\.com/us/app/.+/id\d+$", href):
+        if _APP_HREF.match(href):
             text = " ".join(a.stripped_strings)
             if not text:
                 continue
@@ -62,19 +125,20 @@ def get_top_apps(category="UNPAID", count=30):
         if parts[0].isdigit():
             rank = int(parts[0])
 
-        temp_name = re.search(r"/us/app/([^/]+)/id\d+", href)
+        temp_name = _APP_SLUG.search(href)
         if (temp_name):
             name = temp_name.group(1).replace("-", " ")
 
         apps.append(
             {
                 "rank": rank,
-                "name": name
+                "name": name,
+                "id": int(re.search(r"/id(\d+)$", href).group(1)),
             }
         )
 
     # Limit to requested count
-    return apps[:count]
+    return apps[:count] if count is not None else apps
 
 if __name__ == "__main__":
     # Example usage
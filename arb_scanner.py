@@ -0,0 +1,181 @@
+import asyncio
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from book_evaluator import NO_FEES, FeeModel, evaluate_markets
+from components import TradeSignal
+from polymarket_connector import OrderBook
+
+
+class RateLimiter:
+    """Token bucket for asyncio tasks: rate acquisitions per second on average, bursts of up to burst."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class LatencyStats:
+    """Rolling window of latencies in seconds, summarized in milliseconds."""
+
+    def __init__(self, window: int = 10000):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples:
+            return {"count": 0}
+        ms = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples)) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        return {"count": len(ms), "mean_ms": float(ms.mean()), "p50_ms": float(p50), "p95_ms": float(p95),
+                "p99_ms": float(p99), "max_ms": float(ms.max())}
+
+
+@dataclass
+class ArbSignal:
+    ticker: str
+    yes_token: str
+    no_token: str
+    kind: str                       # "BUY" the yes+no bundle under 1, or "SELL" it over 1
+    quantity: int
+    edge: float                     # top of book edge per bundle, in $
+    expected_profit: float          # over every profitable level net of fees, in $
+    signals: List[TradeSignal] = field(default_factory=list)   # one per leg, YES then NO
+    latency: float = 0.0            # seconds from the market's last book arriving to this signal
+
+
+class ArbScanner:
+    """
+    Live yes/no bundle arbitrage scanner, replaces the strategy1.py loop.
+
+    Notes:
+        - markets is a list of (ticker, yes_token, no_token), e.g. from parse_app_rankings output
+        - every scan fetches all yes and no books concurrently (concurrency threads over the OrderBook session),
+          with requests paced by a token bucket of rate per second
+        - the books are evaluated for every market at once: top of book, and the full depth walk of
+          book_evaluator.bundle_depth, net of fees (taker fee and gas per order)
+        - each market with a profitable bundle of at least one contract emits an ArbSignal with a TradeSignal per leg
+        - latency stats: fetch (per /book request), tick_to_signal (last book of a market in -> signal out) and scan
+        - point order_book at a local stand-in server through its host to test without the real CLOB
+    """
+
+    def __init__(self, order_book: OrderBook, markets: Sequence[Tuple[str, str, str]], rate: float = 50.0,
+                 burst: Optional[int] = None, concurrency: int = 16, depth: int = 20, min_edge: float = 0.0,
+                 fees: FeeModel = NO_FEES, on_signal: Optional[Callable[[ArbSignal], None]] = None):
+        self.order_book = order_book
+        self.markets = list(markets)
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.depth = depth
+        self.min_edge = min_edge
+        self.fees = fees
+        self.on_signal = on_signal or print_signal
+        self.stats = {"fetch": LatencyStats(), "tick_to_signal": LatencyStats(), "scan": LatencyStats()}
+        self.errors = 0
+
+    async def _fetch(self, loop, pool, limiter: RateLimiter, token: str) -> Tuple[Optional[dict], float]:
+        await limiter.acquire()
+        started = time.perf_counter()
+        try:
+            book = await loop.run_in_executor(pool, self.order_book.get_book, token)
+        except Exception as error:
+            print(f"Failed to fetch book for {token}: {error!r}")
+            self.errors += 1
+            book = None
+        arrived = time.perf_counter()
+        self.stats["fetch"].record(arrived - started)
+        return book, arrived
+
+    async def fetch_books(self, loop, pool, limiter: RateLimiter) -> List[Tuple[Optional[dict], float]]:
+        """(book, arrival time) for every yes then no token, in market order."""
+        tokens = [token for _, yes_token, no_token in self.markets for token in (yes_token, no_token)]
+        return await asyncio.gather(*(self._fetch(loop, pool, limiter, token) for token in tokens))
+
+    def evaluate(self, books: Sequence[Optional[dict]]) -> Dict[str, Dict[str, np.ndarray]]:
+        """book_evaluator.evaluate_markets for every market, books holds yes then no per market."""
+        return evaluate_markets(books[0::2], books[1::2], self.depth, self.min_edge, self.fees)
+
+    def signals(self, evaluation: Dict[str, Dict[str, np.ndarray]], arrived: np.ndarray) -> List[ArbSignal]:
+        found, rows = [], []
+        for kind, result in evaluation.items():
+            quantity = np.floor(result["quantity"]).astype(np.int64)
+            for i in np.flatnonzero(quantity >= 1):
+                ticker, yes_token, no_token = self.markets[i]
+                found.append(ArbSignal(
+                    ticker=ticker, yes_token=yes_token, no_token=no_token, kind=kind, quantity=int(quantity[i]),
+                    edge=float(result["top_edge"][i]), expected_profit=float(result["profit"][i]),
+                    signals=[
+                        TradeSignal(action=kind, side="YES", quantity=int(quantity[i]), price=float(result["yes_limit"][i])),
+                        TradeSignal(action=kind, side="NO", quantity=int(quantity[i]), price=float(result["no_limit"][i])),
+                    ],
+                ))
+                rows.append(i)
+        now = time.perf_counter()
+        for signal, i in zip(found, rows):
+            signal.latency = now - arrived[i]
+            self.stats["tick_to_signal"].record(signal.latency)
+        return found
+
+    async def scan_once(self, loop=None, pool=None, limiter: Optional[RateLimiter] = None) -> List[ArbSignal]:
+        """One full sweep: fetch every book, evaluate, emit signals."""
+        loop = loop or asyncio.get_running_loop()
+        limiter = limiter or RateLimiter(self.rate, self.burst)
+        own_pool = pool is None
+        pool = pool or ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            started = time.perf_counter()
+            fetched = await self.fetch_books(loop, pool, limiter)
+            books = [book for book, _ in fetched]
+            # a market ticks when the later of its two books lands
+            arrived = np.maximum(np.array([t for _, t in fetched[0::2]]), np.array([t for _, t in fetched[1::2]]))
+            found = self.signals(self.evaluate(books), arrived) if self.markets else []
+            for signal in found:
+                self.on_signal(signal)
+            self.stats["scan"].record(time.perf_counter() - started)
+            return found
+        finally:
+            if own_pool:
+                pool.shutdown(wait=False)
+
+    async def run(self, interval: float = 1.0, iterations: Optional[int] = None):
+        """Scans every interval seconds (back to back if a sweep takes longer), forever or for iterations sweeps."""
+        loop = asyncio.get_running_loop()
+        limiter = RateLimiter(self.rate, self.burst)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            count = 0
+            while iterations is None or count < iterations:
+                started = time.perf_counter()
+                await self.scan_once(loop, pool, limiter)
+                count += 1
+                await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+    def latency_summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: stats.summary() for name, stats in self.stats.items()}
+
+
+def print_signal(signal: ArbSignal):
+    print(f"FOUND ARB -- {signal.kind} -- {signal.ticker}: {signal.quantity} bundles, top edge {signal.edge:.4f}, "
+          f"expected profit {signal.expected_profit:.2f}, latency {signal.latency * 1000:.1f}ms")
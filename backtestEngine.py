@@ -1,23 +1,23 @@
+import math
+
+from collections import deque
+
+import numpy as np
 import pandas as pd
 
-from components import Ledger, TradeSignal, MarketState
-from polymarket_connector import *
-from typing import Callable, List, Dict, Any, Optional
-from dataclasses import dataclass
-from grapher import *
-from strategies.rando import Rando
+from components import Ledger, MarketBatch, MarketState, TradeSignal
+from features import FeatureStore
+from fill_models import FillModel
+from market_parsers.app_store_rankings import parse_timestamp
+from polymarket_connector import OrderBook, PolymarketConnector
+from typing import Deque, Iterable, List, Dict, Any, Optional, Tuple, Union
+from price_panel import VALUE_COLUMNS, PriceTensor, add_implied_columns, assemble_price_panel
+from profiling import NULL_PROFILER, Profiler, timed_iter
+from snapshots import SnapshotBuffer
 from strategies.strategy import Strategy
 
 # Format for Strategy : Marketstate, Ledger -> TradeSignal (but note this only looks at a given state, not behind)
 
-@dataclass
-class BacktestSnapshot:
-    timestamp: int
-    liquid_value: float
-    unrealized_pnl: float
-    total_value: float
-    num_active_trades: int
-
 class BacktestEngine:
     """Note that for markets that have CLOSED, build the price panel with start and end timestamps, it will not return useful data without it, the yes and no will be either 0or1
        
@@ -35,21 +35,46 @@ class BacktestEngine:
         - the market is too new and not traded enough to have outcomePrices and yesClob/noClob tokens in the API response from polymarket (TODO: LOOK INTO THIS)
     """
 
-    def __init__(self, initial_capital: float):
+    def __init__(self, initial_capital: float, order_book: Optional[OrderBook] = None, fill_model: Optional[FillModel] = None,
+                 profiler: Optional[Profiler] = None, snapshot_spill: Optional[str] = None,
+                 connector: Optional[PolymarketConnector] = None):
+        # order_book is optional, pass one to reuse its session or point it at another host
+        # connector fetches the event metadata, pass one with an EventCache to skip refetching it
+        # fill_model decides how much of each signal fills and at what price (see fill_models), None fills every
+        # signal in full at its price
+        # profiler times each phase of building and running (see profiling.Profiler), its report comes back
+        # as "profile" in the run result, None leaves the timers out
+        self.order_book = order_book
+        self.connector = connector
+        self.fill_model = fill_model
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
         self.ledger = Ledger()
         self.ledger.LiquidValue = initial_capital
-        self.snapshots: List[BacktestSnapshot] = []
+        # one row per timestamp in NumPy columns, snapshot_spill is a directory to spill them to on very long runs
+        self.snapshots = SnapshotBuffer(spill_path=snapshot_spill)
+        # streaming state (run_stream): last [yes, no] per token, and its last (t, yes, no) rows when lookback > 0
+        self.last_prices: Dict[str, List[float]] = {}
+        self.lookback: Dict[str, Deque[Tuple[int, float, float]]] = {}
     
-    def build_price_panel(self, date: str, ffill: bool, free: bool, interval: Optional[str] = None, start_ts: Optional[int] = None, end_ts: Optional[int] = None):
+    def build_price_panel(self, date: str, ffill: bool, free: bool, interval: Optional[str] = None, start_ts: Optional[int] = None, end_ts: Optional[int] = None, max_workers: Optional[int] = None, apps: Optional[List[Dict[str, Any]]] = None, ranks=None, rank_tolerance: Optional[int] = None, implied: bool = False):
         # THIS IS CUSTOM TO THE APP STORE RANKING, MODULARIZE THIS LATER
         # feed it the date and interval (1m, 1w, 1d, 6h, 1h, max)
         # ffill is option to use pandas to add in last seen price for NaN prices
+        # max_workers bounds the concurrent history downloads (defaults to the OrderBook's pool size)
+        # apps is the already parsed event metadata, it is fetched for date/free when not given
+        # ranks (RankStore, its directory, or a t/name/rank CSV or DataFrame) adds the as-of App Store rank of the
+        # event's chart as a real_rank column, see rank_join
+        # implied adds implied_prob, implied_rank and overround across the event's outcomes, see add_implied_columns
         print('building price panel')
-        polymarket = PolymarketConnector()
-        order_book = OrderBook()
-        apps = polymarket.get_app_store_rankings(free=free, date=date)
+        order_book = self.order_book if self.order_book is not None else OrderBook()
+        if apps is None:
+            with self.profiler.phase("metadata"):
+                connector = self.connector if self.connector is not None else PolymarketConnector()
+                apps = connector.get_app_store_rankings(free=free, date=date)
 
-        prices: List[Dict[str, Any]] = []
+        markets: List[Tuple[str, str, str]] = []
+        params: List[Dict[str, Any]] = []
+        windows: Dict[str, Tuple[Optional[int], Optional[int]]] = {}
 
         for app in apps:
             yes_clob_token, no_clob_token, ticker = app["yesClobToken"], app["noClobToken"], app["app"]
@@ -70,143 +95,326 @@ class BacktestEngine:
                 yes_param["interval"] = interval
                 no_param["interval"] = interval
 
-            yes_prices = order_book.get_historical_prices(yes_param).get("history", [])  # to prevent empty response crash
-            no_prices = order_book.get_historical_prices(no_param).get("history", [])  # to prevent empty response crash
-            # using the yes token as the key to prevent name collisions. in the same daterange, the token should be the same
-
-            for record in yes_prices:
-                time, price = int(record["t"]), float(record["p"])
-                prices.append({
-                    "t": time,
-                    "price": price,
-                    "side": "yes",
-                    "ticker": ticker,
-                    "token": yes_clob_token,
-                    "yes_token": yes_clob_token,
-                    "no_token": no_clob_token
-                })
-            for record in no_prices:
-                time, price = int(record["t"]), float(record["p"])
-                prices.append({
-                    "t": time,
-                    "price": price,
-                    "side": "no",
-                    "ticker": ticker,
-                    "token": yes_clob_token,
-                    "yes_token": yes_clob_token,
-                    "no_token": no_clob_token
-                })
-
-        if not prices:
-            empty = pd.DataFrame(columns=["yes","no","ticker","yes_token","no_token"])
-            empty.index = pd.MultiIndex.from_arrays([[], []], names=["t","token"])
-            return empty
-        
-        df = pd.DataFrame(prices)
+            # settled markets never trade again, so their cached history can be trusted as final
+            if app.get("closed") and order_book.cache is not None:
+                order_book.cache.mark_immutable(yes_clob_token)
+                order_book.cache.mark_immutable(no_clob_token)
 
-        # add yes, no into same row
-        price_wide = (
-            df.pivot_table(index=["t", "token"], columns="side", values="price", aggfunc="last")
-            .sort_index()
-        )
+            markets.append((ticker, yes_clob_token, no_clob_token))
+            windows[yes_clob_token] = (parse_timestamp(app.get("startDate")), parse_timestamp(app.get("endDate")))
+            params.extend([yes_param, no_param])
+
+        # every yes/no history in one concurrent batch, results come back in params order
+        with self.profiler.phase("fetch"):
+            histories = order_book.get_historical_prices_batch(params, max_workers=max_workers)
+
+        # yes/no histories go straight into typed arrays, deduplicated, pivoted and forward filled in NumPy
+        # using the yes token as the key to prevent name collisions. in the same daterange, the token should be the same
+        with self.profiler.phase("assemble"):
+            panel = assemble_price_panel(markets, histories, ffill=ffill)
+            # each market's startDate / endDate, for time into market features (see features.FeatureStore)
+            panel.attrs["windows"] = windows
+            if implied:
+                add_implied_columns(panel)
+        if ranks is not None:
+            from rank_join import add_real_rank
+
+            with self.profiler.phase("ranks"):
+                add_real_rank(panel, ranks, chart="free" if free else "paid", tolerance=rank_tolerance)
+        return panel
 
-        # create metadata (ticker/tokens) per market table
-        meta = (
-            df.sort_values("t")
-            .drop_duplicates(subset=["token"], keep="last")[["token", "ticker", "yes_token", "no_token"]]
-            .set_index("token")
+    @staticmethod
+    def _panel_arrays(prices: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Pull the panel into flat NumPy columns once, so the run loop never touches pandas rows."""
+        n = len(prices)
+
+        def column(name: str, dtype) -> np.ndarray:
+            if name in prices.columns:
+                return prices[name].to_numpy(dtype=dtype)
+            return np.full(n, np.nan if dtype is float else None, dtype=dtype)
+
+        arrays = {
+            "t": prices.index.get_level_values(0).to_numpy(),
+            "token": prices.index.get_level_values(1).to_numpy(dtype=object),
+            "yes": column("yes", float),
+            "no": column("no", float),
+            "ticker": column("ticker", object),
+            "yes_token": column("yes_token", object),
+            "no_token": column("no_token", object),
+        }
+        for name in VALUE_COLUMNS:
+            if name in prices.columns:
+                arrays[name] = prices[name].to_numpy(dtype=np.float64)
+        # rows with a missing price or an invalid ticker are never shown to the strategy
+        arrays["valid"] = (
+            ~np.isnan(arrays["yes"])
+            & ~np.isnan(arrays["no"])
+            & np.fromiter((bool(ticker) for ticker in arrays["ticker"]), dtype=bool, count=n)
         )
+        return arrays
+
+    @staticmethod
+    def _timestamp_groups(arrays: Dict[str, np.ndarray]):
+        """Yields (t, row positions) per timestamp in ascending order, keeping panel order within a timestamp."""
+        t_values = arrays["t"]
+        order = np.argsort(t_values, kind="stable")
+        t_sorted = t_values[order]
+        bounds = np.flatnonzero(t_sorted[1:] != t_sorted[:-1]) + 1
+        starts = np.concatenate(([0], bounds))
+        stops = np.concatenate((bounds, [len(order)]))
+        valid = arrays["valid"]
 
-        # price and meta table
-        out = price_wide.reset_index().join(meta, on="token").set_index(["t", "token"]).sort_index()
+        for start, stop in zip(starts, stops):
+            rows = order[start:stop]
+            yield t_sorted[start], rows[valid[rows]]
 
-        if ffill:
-            out = (
-                out.groupby(level="token", group_keys=False)
-                .apply(lambda g: g.ffill())
+    def _timestamp_batches(self, prices: Union[pd.DataFrame, PriceTensor]):
+        """Yields one MarketBatch of the valid rows per timestamp, from either panel representation."""
+        if isinstance(prices, PriceTensor):
+            yield from self._tensor_batches(prices)
+            return
+
+        arrays = self._panel_arrays(prices)
+        values = [name for name in VALUE_COLUMNS if name in arrays]
+        for t, rows in self._timestamp_groups(arrays):
+            yield MarketBatch(
+                timestamp=t,
+                yes_price=arrays["yes"][rows],
+                no_price=arrays["no"][rows],
+                yes_token=arrays["yes_token"][rows],
+                no_token=arrays["no_token"][rows],
+                ticker=arrays["ticker"][rows],
+                token=arrays["token"][rows],
+                row=rows,
+                **{name: arrays[name][rows] for name in values},
             )
-        
-        return out
 
-    def run(self, start_ts: int, end_ts: int, interval: str, strategy: Strategy, date: str, ffill: bool, free: bool): 
+    @staticmethod
+    def _tensor_batches(tensor: PriceTensor):
+        # reads one timestamp slice at a time, so a memory mapped tensor is never loaded whole
+        tokens = {column: tensor.tokens[column].to_numpy(dtype=object) for column in ("token", "ticker", "yes_token", "no_token")}
+        has_ticker = np.fromiter((bool(ticker) for ticker in tokens["ticker"]), dtype=bool, count=len(tokens["ticker"]))
+
+        for i, t in enumerate(tensor.timestamps):
+            yes, no = tensor.prices_at(i)
+            rows = np.flatnonzero(~np.isnan(yes) & ~np.isnan(no) & has_ticker)
+            yield MarketBatch(
+                timestamp=t,
+                yes_price=yes[rows],
+                no_price=no[rows],
+                yes_token=tokens["yes_token"][rows],
+                no_token=tokens["no_token"][rows],
+                ticker=tokens["ticker"][rows],
+                token=tokens["token"][rows],
+                row=i * len(has_ticker) + rows,
+                **{name: np.asarray(values[i], dtype=np.float64)[rows] for name, values in tensor.values.items()},
+            )
+
+    def _process_batch(self, batch: MarketBatch, strategy: Strategy, use_batch: bool) -> Tuple[int, float, float, float, int]:
+        """Runs the strategy over one timestamp's markets, marks the ledger and returns that timestamp's snapshot row."""
+        t, tickers = batch.timestamp, batch.ticker
+        phase = self.profiler.phase
+        self.profiler.count("rows", len(batch))
+
+        # store prices for every ticker seen at this timestamp
+        price_map = dict(zip(tickers.tolist(), zip(batch.yes_price.tolist(), batch.no_price.tolist())))
+
+        # first pass: execute trades, one strategy call per timestamp if it supports batches
+        if use_batch:
+            with phase("strategy"):
+                signals = strategy.compute_batch(t, batch, self.ledger)
+            with phase("execute"):
+                rows = np.fromiter((i for i, trade_signal in enumerate(signals) if trade_signal), dtype=np.int64)
+                self.profiler.count("signals", len(rows))
+                if self.fill_model is not None:
+                    self._execute_fills(batch, rows, [signals[i] for i in rows])
+                else:
+                    for i in rows:
+                        self.ledger.executeTrade(signals[i], tickers[i], t)
+        else:
+            # optional per-row columns (real_rank, ...) the batch carries, passed on to every MarketState
+            values = [(name, getattr(batch, name)) for name in VALUE_COLUMNS if getattr(batch, name) is not None]
+            row_ids = batch.row.tolist() if batch.row is not None else None
+            for i in range(len(batch)):
+                market_state = MarketState(
+                    timestamp=t,
+                    ticker=tickers[i],
+                    token=batch.token[i],
+                    yes_price=float(batch.yes_price[i]),
+                    no_price=float(batch.no_price[i]),
+                    yes_token=batch.yes_token[i],
+                    no_token=batch.no_token[i],
+                    row=row_ids[i] if row_ids is not None else -1,
+                    lookback=batch.lookback[i] if batch.lookback is not None else None,
+                    **{name: float(column[i]) for name, column in values},
+                )
+
+                with phase("strategy"):
+                    trade_signal = strategy.compute(market_state, self.ledger)
+                if trade_signal:
+                    self.profiler.count("signals")
+                    with phase("execute"):
+                        if self.fill_model is not None:
+                            self._execute_fills(batch, np.array([i]), [trade_signal])
+                        else:
+                            self.ledger.executeTrade(trade_signal, market_state.ticker, t)
+
+        # second pass: mark the open positions for this timestamp's tickers
+        if price_map:
+            with phase("mark_to_market"):
+                self.ledger.mark_to_market(price_map, timestamp=t)
+
+        # create snapshot once per timestamp (after processing all tokens)
+        # (timestamp, liquid_value, unrealized_pnl, total_value, num_active_trades)
+        with phase("snapshot"):
+            ledger = self.ledger
+            return t, ledger.LiquidValue, ledger.Profit, ledger.LiquidValue + ledger.PositionValue, ledger.ActiveTrades
+
+    def _execute_fills(self, batch: MarketBatch, rows: np.ndarray, signals: List[TradeSignal]):
+        """Fills the signals for batch rows through the fill model in one call, then books each fill in row order."""
+        if not signals:
+            return
+        n = len(signals)
+        buy = np.fromiter((signal.action != "SELL" for signal in signals), dtype=bool, count=n)
+        yes = np.fromiter((signal.side == "YES" for signal in signals), dtype=bool, count=n)
+        quantity = np.fromiter((signal.quantity for signal in signals), dtype=np.int64, count=n)
+        price = np.fromiter((signal.price for signal in signals), dtype=np.float64, count=n)
+        filled, vwap, fees = self.fill_model.fill_batch(batch, rows, buy, yes, quantity, price)
+
+        for k, signal in enumerate(signals):
+            ticker = batch.ticker[rows[k]]
+            if filled[k] <= 0:
+                print(f"No liquidity to fill {signal.action} {signal.quantity} {signal.side} for {ticker} at {batch.timestamp}")
+                continue
+            fill = TradeSignal(action=signal.action, side=signal.side, quantity=int(filled[k]), price=float(vwap[k]))
+            self.ledger.executeTrade(fill, ticker, batch.timestamp, fee=float(fees[k]))
+
+    def run(self, start_ts: int, end_ts: int, interval: str, strategy: Strategy, date: str, ffill: bool, free: bool, panel: Optional[Union[pd.DataFrame, PriceTensor]] = None,
+            ranks=None, rank_tolerance: Optional[int] = None, implied: bool = False):
         """
         TODO: - need to be able to execute MULTIPLE trade signals, instead of just one, per call to strategy function
+
+        panel is an optional prebuilt price panel (DataFrame or PriceTensor), when given nothing is fetched
+        ranks / rank_tolerance and implied add real_rank and implied columns to a fetched panel (see build_price_panel)
         """
         
         print("starting backtest engine")
-        prices = self.build_price_panel(date=date, interval=interval, ffill=ffill, start_ts=start_ts, end_ts=end_ts, free=free)       
+        if panel is None:
+            panel = self.build_price_panel(date=date, interval=interval, ffill=ffill, start_ts=start_ts, end_ts=end_ts, free=free,
+                                           ranks=ranks, rank_tolerance=rank_tolerance, implied=implied)
+        return self.run_panel(panel, strategy)
 
+    def run_panel(self, prices: Union[pd.DataFrame, PriceTensor], strategy: Strategy):
+        """
+        Runs the strategy over an already built price panel.
+        strategy.features is set to a lazy FeatureStore over the panel, unless it already holds one for it.
+        """
         if prices.empty:
             print("price panel was empty")
-            return {"ledger": self.ledger, "snapshots": self.snapshots}
+            return {"ledger": self.ledger, "snapshots": self.snapshots, "profile": self.profiler.report()}
 
-        for t, frame in prices.groupby(level=0):
-            # collect all prices for this timestamp
-            price_map = {}
-            
-            # first pass: collect prices and execute trades
-            for token, row in frame.droplevel(0).iterrows():
-                yes_price = row.get("yes")
-                no_price  = row.get("no")
-                ticker    = row.get("ticker")
-                yes_token = row.get("yes_token")
-                no_token  = row.get("no_token")
-            
-                # skip if prices are missing or ticker is invalid
-                if pd.isna(yes_price) or pd.isna(no_price) or not ticker:
-                    continue
-                
-                # store prices for this ticker
-                price_map[ticker] = (float(yes_price), float(no_price))
-                
-                market_state = MarketState(
-                    timestamp=t,
-                    ticker=ticker,
-                    token=token,
-                    yes_price=float(yes_price),
-                    no_price=float(no_price),
-                    yes_token=yes_token,
-                    no_token=no_token,
-                )
+        if strategy.features is None or strategy.features.prices is not prices:
+            strategy.features = FeatureStore(prices)
 
-                trade_signal = strategy.compute(market_state, self.ledger)  
-                if trade_signal:
-                    self.ledger.executeTrade(trade_signal, ticker, t)
-
-            # second pass: update ledger with all prices for this timestamp
-            if price_map:
-                # update all active trades with current prices
-                pnl = 0.0
-                for trade in self.ledger.Trades:
-                    if trade.isActive:
-                        trade.update_trade(price_map, timestamp=t)
-                        pnl += trade.unrealized_pnl()
-                self.ledger.Profit = pnl
-
-            # create snapshot once per timestamp (after processing all tokens)
-            position_value = 0.0
-            unrealized_pnl = 0.0
-
-            for tr in self.ledger.Trades:
-                if tr.isActive:
-                    position_value += tr.CurrentPrice * tr.NumberOfContracts
-                    unrealized_pnl += (tr.CurrentPrice - tr.PurchasePrice) * tr.NumberOfContracts
-
-            snapshot = BacktestSnapshot(
-                timestamp=t,
-                liquid_value=self.ledger.LiquidValue,
-                unrealized_pnl=unrealized_pnl,
-                total_value=self.ledger.LiquidValue + position_value,
-                num_active_trades=sum(1 for tr in self.ledger.Trades if tr.isActive),
-            )
-            self.snapshots.append(snapshot)
+        use_batch = strategy.has_batch
+        with self.profiler.phase("run"):
+            for batch in timed_iter(self._timestamp_batches(prices), self.profiler, "batch"):
+                self.snapshots.append(*self._process_batch(batch, strategy, use_batch))
             
         return {
             "ledger": self.ledger,
-            "snapshots": self.snapshots
+            "snapshots": self.snapshots,
+            "profile": self.profiler.report(),
+        }
+
+    def run_stream(self, events: Iterable[Tuple[int, str, float, float]], strategy: Strategy, markets: Dict[str, Tuple[str, str, str]],
+                   lookback: int = 0):
+        """
+        Streaming backtest over a time ordered feed of (t, token, yes, no) events, at constant memory.
+
+        Notes:
+            - events come from event_feed (network, price cache, built panel or a replay file) or any live source
+            - a side missing from an event (NaN) keeps its last seen price, like a forward filled panel
+            - every timestamp runs the strategy over the tokens updated at it, once both of their sides are known
+            - strategy.features is None, rows have no row id (MarketState.row is -1, MarketBatch.row is None)
+            - markets maps token -> (ticker, yes_token, no_token), events for other tokens only update state
+            - with lookback > 0, self.lookback[token] keeps the token's last lookback (t, yes, no) rows, handed to the
+              strategy as MarketState.lookback (MarketBatch.lookback for compute_batch)
+            - snapshots go to self.snapshots, build the engine with snapshot_spill to keep a long stream's on disk
+        """
+        print("starting streaming backtest")
+        use_batch = strategy.has_batch
+        # a stream has no panel to compute features over, drop a store left over from an earlier panel run
+        strategy.features = None
+
+        with self.profiler.phase("run"):
+            self._consume_stream(events, strategy, use_batch, markets, lookback)
+        self.snapshots.flush()
+
+        return {
+            "ledger": self.ledger,
+            "snapshots": self.snapshots,
+            "profile": self.profiler.report(),
         }
 
-engine = BacktestEngine(initial_capital=100000)
-output = engine.run(start_ts=1765585170, end_ts=1766017170, interval=None, strategy=Rando(), date="december-19", ffill=True, free=False)
+    def _consume_stream(self, events: Iterable[Tuple[int, str, float, float]], strategy: Strategy, use_batch: bool,
+                        markets: Dict[str, Tuple[str, str, str]], lookback: int):
+        current_t = None
+        updated: Dict[str, None] = {}
+        for t, token, yes_price, no_price in events:
+            if t != current_t:
+                if current_t is not None:
+                    if t < current_t:
+                        raise ValueError(f"event feed is not time ordered: {t} after {current_t}")
+                    self._stream_timestamp(current_t, updated, strategy, use_batch, markets, lookback)
+                current_t = t
+                updated = {}
+
+            state = self.last_prices.setdefault(token, [math.nan, math.nan])
+            if not math.isnan(yes_price):
+                state[0] = yes_price
+            if not math.isnan(no_price):
+                state[1] = no_price
+            updated[token] = None
+
+        if current_t is not None:
+            self._stream_timestamp(current_t, updated, strategy, use_batch, markets, lookback)
+
+    def _stream_timestamp(self, t: int, updated: Dict[str, None], strategy: Strategy, use_batch: bool,
+                          markets: Dict[str, Tuple[str, str, str]], lookback: int):
+        with self.profiler.phase("batch"):
+            # same row order as the panel, tokens sorted within a timestamp
+            rows = []
+            history = []
+            for token in sorted(updated):
+                yes_price, no_price = self.last_prices[token]
+                if lookback:
+                    self.lookback.setdefault(token, deque(maxlen=lookback)).append((t, yes_price, no_price))
+                meta = markets.get(token)
+                if meta is None or not meta[0] or math.isnan(yes_price) or math.isnan(no_price):
+                    continue
+                rows.append((token, yes_price, no_price) + tuple(meta))
+                if lookback:
+                    history.append(self.lookback[token])
+
+            batch = MarketBatch(
+                timestamp=t,
+                yes_price=np.array([row[1] for row in rows], dtype=np.float64),
+                no_price=np.array([row[2] for row in rows], dtype=np.float64),
+                ticker=np.array([row[3] for row in rows], dtype=object),
+                yes_token=np.array([row[4] for row in rows], dtype=object),
+                no_token=np.array([row[5] for row in rows], dtype=object),
+                token=np.array([row[0] for row in rows], dtype=object),
+            )
+            if lookback:
+                # filled one by one, numpy would read the deques as rows of a 2d array
+                batch.lookback = np.empty(len(history), dtype=object)
+                for i, rows_of_token in enumerate(history):
+                    batch.lookback[i] = rows_of_token
+        self.snapshots.append(*self._process_batch(batch, strategy, use_batch))
+
+if __name__ == "__main__":
+    # the example run, same as: python -m predictions backtest --date december-19 --paid --start 1765585170 --end 1766017170
+    from predictions import main
 
-snapshots_to_df(output)
+    main(["backtest", "--date", "december-19", "--paid", "--start", "1765585170", "--end", "1766017170"])
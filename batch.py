@@ -0,0 +1,142 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtestEngine import BacktestEngine
+from market_parsers.app_store_rankings import parse_timestamp
+from polymarket_connector import OrderBook, PolymarketConnector
+from price_panel import PriceTensor
+from sweep import build_strategy, summarize
+
+
+def event_label(date: str, free: bool) -> str:
+    return f"{'free' if free else 'paid'}-{date}"
+
+
+def event_window(apps: List[Dict[str, Any]]) -> Tuple[Optional[int], Optional[int]]:
+    """Earliest startDate and latest endDate across an event's markets, in epoch seconds."""
+    starts = [ts for ts in (parse_timestamp(app.get("startDate")) for app in apps) if ts is not None]
+    ends = [ts for ts in (parse_timestamp(app.get("endDate")) for app in apps) if ts is not None]
+    return (min(starts) if starts else None, max(ends) if ends else None)
+
+
+def _fetch_event(date: str, free: bool, panel_dir: str, order_book: OrderBook, connector: PolymarketConnector,
+                 ffill: bool, interval: Optional[str], start_ts: Optional[int], end_ts: Optional[int]) -> Dict[str, Any]:
+    label = event_label(date, free)
+    result: Dict[str, Any] = {"event": label, "date": date, "free": free, "status": "ok", "error": None, "panel": None}
+    try:
+        apps = connector.get_app_store_rankings(free=free, date=date)
+        window_start, window_end = event_window(apps)
+        engine = BacktestEngine(initial_capital=0, order_book=order_book)
+        panel = engine.build_price_panel(
+            date=date, ffill=ffill, free=free, interval=interval, apps=apps,
+            start_ts=start_ts if start_ts is not None else window_start,
+            end_ts=end_ts if end_ts is not None else window_end,
+        )
+        result["num_markets"] = len(apps)
+        if panel.empty:
+            result["status"] = "empty"
+            return result
+        path = os.path.join(panel_dir, label)
+        PriceTensor.from_panel(panel).save(path)
+        result["panel"] = path
+    except Exception as error:
+        result["status"] = "failed"
+        result["error"] = f"fetch: {error!r}"
+    return result
+
+
+def _run_event(panel_path: str, strategy_config: Dict[str, Any], initial_capital: float) -> Dict[str, Any]:
+    tensor = PriceTensor.load(panel_path)
+    engine = BacktestEngine(initial_capital=initial_capital)
+    with contextlib.redirect_stdout(io.StringIO()):
+        output = engine.run_panel(tensor, build_strategy(strategy_config))
+    snapshots = output["snapshots"].arrays()
+    return {
+        **summarize(output, initial_capital),
+        "num_timestamps": len(tensor),
+        "timestamps": np.array(snapshots["timestamp"]),
+        "total_value": np.array(snapshots["total_value"]),
+    }
+
+
+def combine_equity(curves: Dict[str, Tuple[np.ndarray, np.ndarray]], initial_capital: float) -> pd.DataFrame:
+    """
+    Portfolio equity curve from per-event (timestamps, total_value) curves.
+    Each event holds initial_capital before its first snapshot and its last value after its final one,
+    the portfolio total_value is the sum across events at every timestamp any event saw.
+    """
+    if not curves:
+        return pd.DataFrame(columns=["total_value"], index=pd.Index([], name="timestamp"))
+    timestamps = np.unique(np.concatenate([t for t, _ in curves.values()]))
+    columns = {}
+    for label, (t, values) in curves.items():
+        position = np.searchsorted(t, timestamps, side="right") - 1
+        columns[label] = np.where(position >= 0, values[np.maximum(position, 0)], initial_capital)
+    equity = pd.DataFrame(columns, index=pd.Index(timestamps, name="timestamp"))
+    equity["total_value"] = equity[list(curves)].sum(axis=1)
+    return equity
+
+
+def run_batch(events: Sequence[Tuple[str, bool]], strategy: Dict[str, Any], initial_capital: float = 100000,
+              ffill: bool = True, interval: Optional[str] = None, start_ts: Optional[int] = None,
+              end_ts: Optional[int] = None, fetch_workers: int = 4, processes: Optional[int] = None,
+              order_book: Optional[OrderBook] = None, connector: Optional[PolymarketConnector] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Runs one strategy over many (date, free) app store events.
+
+    Notes:
+        - event metadata and histories are fetched fetch_workers events at a time, over one shared connector and
+          OrderBook (give the connector an EventCache to reuse metadata across batches)
+        - without start_ts/end_ts each event uses its markets' startDate..endDate window
+        - backtests run in a process pool, each worker memory maps its event's saved panel
+        - strategy is a sweep-style config, e.g. {"strategy": "rando", "quantity": 10}
+        - each event gets initial_capital, failed or empty events are reported in "events" and left out of "equity"
+        - an event listed more than once is run once, its panel directory and curve label are per (date, free)
+    Returns {"events": one row per event, "equity": per-event and portfolio total_value per timestamp}
+    """
+    unique = list(dict.fromkeys((date, bool(free)) for date, free in events))
+    if len(unique) < len(events):
+        print(f"skipping {len(events) - len(unique)} duplicate event(s)")
+    events = unique
+
+    order_book = order_book if order_book is not None else OrderBook(max_workers=fetch_workers * 2)
+    connector = connector if connector is not None else PolymarketConnector()
+    panel_dir = tempfile.mkdtemp(prefix="batch-panels-")
+    try:
+        with ThreadPoolExecutor(max_workers=fetch_workers) as pool:
+            fetched = list(pool.map(
+                lambda event: _fetch_event(event[0], event[1], panel_dir, order_book, connector, ffill, interval, start_ts, end_ts),
+                events,
+            ))
+
+        runnable = [result for result in fetched if result["status"] == "ok"]
+        with ProcessPoolExecutor(max_workers=processes or os.cpu_count() or 1) as pool:
+            futures = [pool.submit(_run_event, result["panel"], strategy, initial_capital) for result in runnable]
+            for result, future in zip(runnable, futures):
+                try:
+                    result.update(future.result())
+                except Exception as error:
+                    result["status"] = "failed"
+                    result["error"] = f"run: {error!r}"
+    finally:
+        shutil.rmtree(panel_dir, ignore_errors=True)
+
+    curves = {
+        result["event"]: (result["timestamps"], result["total_value"])
+        for result in fetched
+        if result["status"] == "ok" and len(result["timestamps"])
+    }
+    table = pd.DataFrame([
+        {key: value for key, value in result.items() if key not in ("panel", "timestamps", "total_value")}
+        for result in fetched
+    ])
+    return {"events": table, "equity": combine_equity(curves, initial_capital)}
@@ -0,0 +1,127 @@
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.suites import BENCHMARKS, SCALES, peak_memory
+
+
+def time_benchmark(function, repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    # a benchmark returning a dict reports those metrics (e.g. bytes per fill) too, from its last run
+    for _ in range(warmup):
+        function()
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        value = function()
+        times.append(time.perf_counter() - started)
+    result = {"min": min(times), "median": float(np.median(times)), "mean": float(np.mean(times)), "repeat": repeat}
+    if isinstance(value, dict):
+        result["metrics"] = value
+    return result
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+    }
+
+
+def run_benchmarks(names: List[str], scale: Dict[str, int], seed: int, repeat: int, memory: bool) -> Dict[str, Any]:
+    results = {}
+    for name in names:
+        function = BENCHMARKS[name](scale, seed)
+        result = time_benchmark(function, repeat)
+        if memory:
+            result["peak_bytes"] = peak_memory(function)
+        results[name] = result
+        print(f"{name:<20} min {result['min'] * 1000:10.1f}ms  median {result['median'] * 1000:10.1f}ms")
+        for metric, value in result.get("metrics", {}).items():
+            print(f"{'':<20} {metric} {value:.2f}")
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Prints each benchmark's min time against the baseline's, returns the names slower by more than tolerance.
+    Results taken at a different scale are not comparable and are reported as such.
+    """
+    if baseline.get("scale") != results.get("scale"):
+        print(f"baseline scale {baseline.get('scale')} does not match {results.get('scale')}, not comparing")
+        return []
+    regressions = []
+    print(f"\n{'benchmark':<20} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<20} {'-':>12} {result['min'] * 1000:10.1f}ms {'new':>8}")
+            continue
+        change = result["min"] / before["min"] - 1
+        flag = " REGRESSION" if change > tolerance else ""
+        print(f"{name:<20} {before['min'] * 1000:10.1f}ms {result['min'] * 1000:10.1f}ms {change:+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks on seeded synthetic Polymarket-shaped data.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--tokens", type=int, help="override the scale's token count")
+    parser.add_argument("--points", type=int, help="override the scale's points per token")
+    parser.add_argument("--trades", type=int, help="override the scale's direct ledger trades")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run just these benchmarks")
+    parser.add_argument("--memory", action="store_true", help="also record peak traced memory per benchmark")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="slowdown over the baseline that fails the run")
+    args = parser.parse_args(argv)
+
+    scale = dict(SCALES[args.scale])
+    for key in ("tokens", "points", "trades"):
+        if getattr(args, key) is not None:
+            scale[key] = getattr(args, key)
+
+    names = args.only or list(BENCHMARKS)
+    results = {
+        "scale": scale,
+        "seed": args.seed,
+        "environment": environment(),
+        "results": run_benchmarks(names, scale, args.seed, args.repeat, args.memory),
+    }
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nwrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from typing import Any, Callable, Dict
+
+import matplotlib
+
+matplotlib.use("Agg")    # the graph export benchmark must never open a window
+import matplotlib.pyplot as plt
+
+from backtestEngine import BacktestEngine
+from app_store_connector import parse_chart
+from benchmarks.synthetic import (Churn, DataclassLedger, SyntheticOrderBook, sell_heavy_orders, synthetic_chart_html,
+                                  synthetic_event, synthetic_ranks)
+from components import Ledger
+from features import FEATURES, FeatureStore
+from grapher import render_snapshots, snapshots_to_df
+from price_panel import PriceTensor, add_implied_columns
+from rank_join import add_real_rank
+from sweep import grid, run_sweep
+from strategies.rando import Rando
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules a backtest over a saved panel must not import at start up, commands load them when they need them
+HEAVY_MODULES = ("matplotlib", "py_clob_client", "bs4", "requests")
+STARTUP_IMPORTS = ("predictions", "backtestEngine", "sweep", "batch")
+
+# the TradeStore acceptance: at least this many times fewer traced bytes per fill than the Trade/Ticker dataclasses
+# (DataclassLedger), growth slack of the store's columns and lot queues included
+FILL_MEMORY_RATIO = 4.0
+
+# named scales: tokens x points per token x direct ledger trades
+SCALES = {
+    "small": {"tokens": 20, "points": 300, "trades": 5000},
+    "medium": {"tokens": 100, "points": 2000, "trades": 50000},
+    "large": {"tokens": 300, "points": 5000, "trades": 200000},
+}
+
+
+def _quiet(function: Callable[[], Any]) -> Any:
+    # the engine and ledger print per rejected trade, keep that out of the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function()
+
+
+def _build_panel(event, ffill: bool = True):
+    apps, histories = event
+    engine = BacktestEngine(initial_capital=0, order_book=SyntheticOrderBook(histories))
+    return engine.build_price_panel(date="synthetic", ffill=ffill, free=True, apps=apps)
+
+
+def bench_panel_build(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """build_price_panel from raw histories, everything but the HTTP fetch."""
+    event = synthetic_event(scale["tokens"], scale["points"], seed)
+    return lambda: _quiet(lambda: _build_panel(event))
+
+
+def bench_run_rando(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """Full BacktestEngine.run over a prebuilt panel with the batch Rando strategy."""
+    panel = _quiet(lambda: _build_panel(synthetic_event(scale["tokens"], scale["points"], seed)))
+    return lambda: _quiet(lambda: BacktestEngine(initial_capital=100000).run(
+        start_ts=None, end_ts=None, interval=None, strategy=Rando(), date="synthetic", ffill=True, free=True, panel=panel
+    ))
+
+
+def bench_run_churn(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """Full run with a per-row strategy sending as many SELLs as BUYs."""
+    panel = _quiet(lambda: _build_panel(synthetic_event(scale["tokens"], scale["points"], seed)))
+    return lambda: _quiet(lambda: BacktestEngine(initial_capital=10 ** 9).run(
+        start_ts=None, end_ts=None, interval=None, strategy=Churn(), date="synthetic", ffill=True, free=True, panel=panel
+    ))
+
+
+def bench_ledger_sell_heavy(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """Ledger.executeTrade alone: trades BUYs then trades partial SELLs across 20 tickers."""
+    orders = sell_heavy_orders(scale["trades"], seed=seed)
+
+    def run():
+        ledger = Ledger()
+        ledger.LiquidValue = 10 ** 12
+        for signal, ticker, t in orders:
+            ledger.executeTrade(signal, ticker, t)
+        return ledger
+
+    return lambda: _quiet(run)
+
+
+def _bytes_per_fill(ledger_class, orders) -> float:
+    tracemalloc.start()
+    try:
+        ledger = ledger_class()
+        ledger.LiquidValue = 10 ** 12
+        for signal, ticker, t in orders:
+            ledger.executeTrade(signal, ticker, t)
+        return tracemalloc.get_traced_memory()[0] / max(1, len(ledger.Trades))
+    finally:
+        tracemalloc.stop()
+
+
+def _fill_memory(orders) -> Callable[[], Dict[str, float]]:
+    def run():
+        store = _quiet(lambda: _bytes_per_fill(Ledger, orders))
+        dataclasses = _quiet(lambda: _bytes_per_fill(DataclassLedger, orders))
+        ratio = dataclasses / store
+        if ratio < FILL_MEMORY_RATIO:
+            raise RuntimeError(f"{store:.1f} bytes per fill, only {ratio:.1f}x under the dataclasses' {dataclasses:.1f}")
+        return {"store_bytes_per_fill": store, "dataclass_bytes_per_fill": dataclasses, "ratio": ratio}
+
+    return run
+
+
+def bench_fill_memory_buys(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """
+    Traced bytes per fill of a Ledger after trades BUYs against the Trade/Ticker dataclasses (DataclassLedger).
+    Fails under FILL_MEMORY_RATIO.
+    """
+    return _fill_memory(sell_heavy_orders(scale["trades"], seed=seed)[:scale["trades"]])
+
+
+def bench_fill_memory_sells(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """Same as fill_memory_buys over the ledger_sell_heavy orders, about half the fills being partial-sell splits."""
+    return _fill_memory(sell_heavy_orders(scale["trades"], seed=seed))
+
+
+def bench_snapshot_export(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """Snapshots of a finished run out to CSV and through grapher's DataFrame and figures."""
+    panel = _quiet(lambda: _build_panel(synthetic_event(scale["tokens"], scale["points"], seed)))
+    output = _quiet(lambda: BacktestEngine(initial_capital=100000).run_panel(panel, Rando()))
+
+    def run():
+        with tempfile.TemporaryDirectory() as directory:
+            output["snapshots"].to_csv(os.path.join(directory, "snapshots.csv"))
+        snapshots_to_df(output)
+        plt.close("all")
+
+    return run
+
+
+def bench_render_png(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """Headless multi-panel PNG of a finished run, LTTB-downsampled to the image width."""
+    panel = _quiet(lambda: _build_panel(synthetic_event(scale["tokens"], scale["points"], seed)))
+    output = _quiet(lambda: BacktestEngine(initial_capital=100000).run_panel(panel, Rando()))
+
+    def run():
+        with tempfile.TemporaryDirectory() as directory:
+            render_snapshots(output, os.path.join(directory, "equity.png"))
+
+    return run
+
+
+def bench_parse_chart(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """app_store_connector.parse_chart over a free and a paid 200 app chart page, one collector round."""
+    pages = [synthetic_chart_html(200, seed), synthetic_chart_html(200, seed + 1)]
+    return lambda: [parse_chart(page) for page in pages]
+
+
+def bench_rank_join(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """rank_join.add_real_rank of a minute by minute free chart fixture onto a built panel."""
+    panel = _quiet(lambda: _build_panel(synthetic_event(scale["tokens"], scale["points"], seed)))
+    ranks = synthetic_ranks(scale["tokens"], scale["points"], seed)
+    return lambda: _quiet(lambda: add_real_rank(panel, ranks, chart="free"))
+
+
+def bench_implied_columns(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """price_panel.add_implied_columns over a built panel, every timestamp's cross-section in one pass."""
+    panel = _quiet(lambda: _build_panel(synthetic_event(scale["tokens"], scale["points"], seed)))
+    return lambda: add_implied_columns(panel)
+
+
+def bench_features(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """Every features.FEATURES column of a fresh FeatureStore over a built panel, the first request cost."""
+    panel = _quiet(lambda: _build_panel(synthetic_event(scale["tokens"], scale["points"], seed)))
+    return lambda: [FeatureStore(panel)[name] for name in FEATURES]
+
+
+def bench_sweep_scaling(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """
+    run_sweep of the same 8 Rando configs over one saved panel at 1, 2, 4 and 8 processes (up to the core count),
+    reports each one's seconds and speedup over 1 process, pool start up and the per worker panel load included.
+    """
+    tensor = PriceTensor.from_panel(_quiet(lambda: _build_panel(synthetic_event(scale["tokens"], scale["points"], seed))))
+    configs = grid("rando", quantity=[5, 10, 20, 40], threshold=[0.99, 1.0])
+    counts = [processes for processes in (1, 2, 4, 8) if processes == 1 or processes <= (os.cpu_count() or 1)]
+
+    def run():
+        metrics = {}
+        with tempfile.TemporaryDirectory() as directory:
+            tensor.save(directory)
+            for processes in counts:
+                started = time.perf_counter()
+                run_sweep(configs, directory, processes=processes)
+                metrics[f"seconds_{processes}"] = time.perf_counter() - started
+                metrics[f"speedup_{processes}"] = metrics["seconds_1"] / metrics[f"seconds_{processes}"]
+        return metrics
+
+    return run
+
+
+def bench_startup_import(scale: Dict[str, int], seed: int) -> Callable[[], Any]:
+    """
+    A fresh interpreter importing the CLI, engine, sweep and batch modules, what every sweep worker pays.
+    Fails when one of HEAVY_MODULES got imported along the way.
+    """
+    check = (
+        f"import sys\nimport {', '.join(STARTUP_IMPORTS)}\n"
+        f"heavy = [name for name in {HEAVY_MODULES!r} if name in sys.modules]\n"
+        "if heavy: sys.exit('imported at start up: ' + ', '.join(heavy))"
+    )
+
+    def run():
+        result = subprocess.run([sys.executable, "-c", check], cwd=ROOT, capture_output=True, text=True)
+        if result.returncode:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "start up failed")
+
+    return run
+
+
+BENCHMARKS: Dict[str, Callable[[Dict[str, int], int], Callable[[], Any]]] = {
+    "panel_build": bench_panel_build,
+    "run_rando": bench_run_rando,
+    "run_churn": bench_run_churn,
+    "ledger_sell_heavy": bench_ledger_sell_heavy,
+    "fill_memory_buys": bench_fill_memory_buys,
+    "fill_memory_sells": bench_fill_memory_sells,
+    "snapshot_export": bench_snapshot_export,
+    "render_png": bench_render_png,
+    "parse_chart": bench_parse_chart,
+    "rank_join": bench_rank_join,
+    "implied_columns": bench_implied_columns,
+    "features": bench_features,
+    "sweep_scaling": bench_sweep_scaling,
+    "startup_import": bench_startup_import,
+}
+
+
+def peak_memory(function: Callable[[], Any]) -> int:
+    """Peak bytes Python allocated while function ran, one extra untimed call."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
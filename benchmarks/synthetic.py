@@ -0,0 +1,189 @@
+import zlib
+
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from components import Ticker, Trade, TradeSignal
+from strategies.strategy import Strategy
+
+START_TS = 1765000000    # mid December 2025, like the app store events
+
+
+def synthetic_event(n_tokens: int = 50, n_points: int = 500, seed: int = 0, missing: float = 0.3,
+                    start_ts: int = START_TS) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    A seeded app store style event: parse_app_rankings-shaped apps and a /prices-history response per token.
+
+    Notes:
+        - timestamps are irregular (30s to 10min apart) and shared by the event, each token misses about missing of them
+        - yes is a bounded random walk, no is 1 - yes plus noise, each side independently drops a few points
+        - a few apps are missing a name or a token, like real events, build_price_panel skips them
+    Returns (apps, histories) where histories maps token -> {"history": [{"t", "p"}, ...]}
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = start_ts + np.cumsum(rng.integers(30, 600, n_points))
+    apps, histories = [], {}
+    for k in range(n_tokens):
+        yes_token, no_token = f"{seed}{k:06d}1", f"{seed}{k:06d}0"
+        yes = np.clip(rng.random() + np.cumsum(rng.normal(0, 0.02, n_points)), 0.001, 0.999).round(3)
+        no = np.clip(1 - yes + rng.normal(0, 0.01, n_points), 0.001, 0.999).round(3)
+        present = rng.random(n_points) >= missing
+        for token, prices in ((yes_token, yes), (no_token, no)):
+            keep = present & (rng.random(n_points) >= 0.05)
+            histories[token] = {"history": [{"t": int(t), "p": float(p)} for t, p in zip(timestamps[keep], prices[keep])]}
+        apps.append({
+            "app": f"App {k}" if k % 97 != 96 else None,
+            "startDate": None,
+            "endDate": None,
+            "closed": False,
+            "yesOutcome": float(yes[-1]),
+            "noOutcome": float(no[-1]),
+            "yesClobToken": yes_token,
+            "noClobToken": no_token if k % 89 != 88 else None,
+        })
+    return apps, histories
+
+
+def synthetic_ranks(n_tokens: int = 50, n_points: int = 500, seed: int = 0, chart_size: int = 200,
+                    start_ts: int = START_TS) -> pd.DataFrame:
+    """
+    A seeded rank fixture for synthetic_event's apps (t, name, rank, chart): both charts scraped every minute over
+    the event's span, every scrape a shuffled chart_size apps, the event's "App k" names spelled like chart slugs.
+    name and chart are categorical, as a fixture with millions of rows is best loaded.
+    """
+    rng = np.random.default_rng(seed)
+    span = int(np.cumsum(np.random.default_rng(seed).integers(30, 600, n_points))[-1])
+    names = np.array([f"app-{k}" for k in range(max(chart_size, n_tokens))], dtype=object)
+    scrapes = np.arange(start_ts - 60, start_ts + span + 60, 60)
+    size = min(chart_size, len(names))
+    t = np.repeat(np.repeat(scrapes, 2), size)
+    chart = pd.Categorical.from_codes(np.tile(np.repeat([0, 1], size), len(scrapes)), categories=["free", "paid"])
+    order = np.argsort(rng.random((len(scrapes) * 2, len(names))), axis=1)[:, :size].ravel()
+    rank = np.tile(np.arange(1, size + 1), len(scrapes) * 2)
+    return pd.DataFrame({"t": t, "name": pd.Categorical.from_codes(order, categories=names), "rank": rank, "chart": chart})
+
+
+def synthetic_chart_html(n_apps: int = 200, seed: int = 0) -> str:
+    """
+    An App Store chart page shaped like apps.apple.com: every app as an image-only link (no text) and a lockup link
+    with nested rank/title/subtitle markup and entities, between navigation links and a large inline script.
+    """
+    rng = np.random.default_rng(seed)
+    words = ["photo", "music", "cash", "ai", "maps", "chat", "fit", "game", "shop", "news", "tv", "bank", "go"]
+    parts = ['<html><head><script>window.__data = "' + "x" * 200000 + '";</script></head><body>',
+             '<nav><a href="https://apps.apple.com/us/charts">Charts</a><a href="/us/genre/ios/id36">Apps</a></nav>']
+    for rank in range(1, n_apps + 1):
+        slug = "-".join(rng.choice(words, size=int(rng.integers(1, 4))))
+        href = f"https://apps.apple.com/us/app/{slug}/id{int(rng.integers(10 ** 8, 10 ** 10))}"
+        title = slug.replace("-", " ").title()
+        parts.append(
+            f'<li><a href="{href}" class="we-lockup__overlay" aria-hidden="true" tabindex="-1">'
+            f'<picture><source srcset="https://is1-ssl.mzstatic.com/{rank}/100x100bb.webp 1x" type="image/webp">'
+            f'<img src="https://is1-ssl.mzstatic.com/{rank}.png" alt="" width="100"></picture></a>\n'
+            f'<a href="{href}" class="we-lockup targeted-link" data-metrics-click=\'{{"actionType":"navigate"}}\'>'
+            f'<div class="we-lockup__rank">{rank}</div>\n  <div class="we-lockup__text"><div class="we-lockup__title">'
+            f'<div class="we-truncate">{title} &amp; Co</div></div>\n'
+            f'<div class="we-lockup__subtitle">Best {title} app</div></div> View</a></li>'
+        )
+    parts.append('<footer><a href="https://www.apple.com/legal/">Legal</a></footer></body></html>')
+    return "\n".join(parts)
+
+
+class SyntheticOrderBook:
+    """Stands in for OrderBook in build_price_panel, serving the synthetic histories without any network."""
+
+    def __init__(self, histories: Dict[str, Dict[str, Any]]):
+        self.histories = histories
+        self.cache = None
+
+    def get_historical_prices_batch(self, params_list: List[dict], max_workers: Optional[int] = None) -> List[dict]:
+        return [self.histories.get(params["market"], {"history": []}) for params in params_list]
+
+
+class Churn(Strategy):
+    """
+    Deterministic mixed BUY/SELL workload: a crc32 of (timestamp, token) picks the action, side and size,
+    about as many SELL as BUY signals, most of them partial sells across several open lots.
+    """
+
+    def __init__(self, sell_share: float = 0.5):
+        self.sell_share = sell_share
+
+    def compute(self, market_state, ledger):
+        h = zlib.crc32(f"{int(market_state.timestamp)}:{market_state.token}".encode()) % 1000 / 1000
+        side = "YES" if h * 7 % 1 < 0.5 else "NO"
+        price = market_state.yes_price if side == "YES" else market_state.no_price
+        if h < self.sell_share:
+            return TradeSignal(action="SELL", side=side, quantity=3 + int(h * 10), price=price)
+        return TradeSignal(action="BUY", side=side, quantity=5 + int(h * 10), price=price)
+
+
+def sell_heavy_orders(n_trades: int, n_tickers: int = 20, seed: int = 0) -> List[Tuple[TradeSignal, str, int]]:
+    """
+    (signal, ticker, timestamp) orders for driving Ledger.executeTrade directly: every ticker/side first builds up
+    lots with BUYs, then n_trades SELLs close them in small pieces, oldest lot first.
+    """
+    rng = np.random.default_rng(seed)
+    orders = []
+    t = START_TS
+    for i in range(n_trades):
+        ticker = f"App {i % n_tickers}"
+        side = "YES" if i % 2 else "NO"
+        orders.append((TradeSignal("BUY", side, int(rng.integers(5, 50)), float(rng.uniform(0.05, 0.95))), ticker, t))
+        t += 1
+    for i in range(n_trades):
+        ticker = f"App {i % n_tickers}"
+        side = "YES" if i % 2 else "NO"
+        orders.append((TradeSignal("SELL", side, int(rng.integers(1, 20)), float(rng.uniform(0.05, 0.95))), ticker, t))
+        t += 1
+    return orders
+
+
+class DataclassLedger:
+    """
+    The fill bookkeeping Ledger did before TradeStore, kept as the memory baseline: a Trade (and a fresh Ticker)
+    dataclass per BUY, a Trade per partial-sell split, and FIFO deques of open Trades per ticker/side.
+    """
+
+    def __init__(self):
+        self.Trades: List[Trade] = []
+        self.OpenLots: Dict[str, Dict[str, deque]] = {}
+        self.open_quantity: Dict[Tuple[str, str], int] = {}    # a running total, not summed per SELL
+
+    def executeTrade(self, signal: TradeSignal, ticker_name: str, timestamp: int):
+        if signal.action == "BUY":
+            trade = Trade(Ticker=Ticker(Name=ticker_name), PurchasePrice=signal.price, PurchaseTime=timestamp,
+                          SaleTime=None, YesOrNo=signal.side, NumberOfContracts=signal.quantity,
+                          CurrentPrice=signal.price, isActive=True)
+            self.Trades.append(trade)
+            self.OpenLots.setdefault(ticker_name, {}).setdefault(signal.side, deque()).append(trade)
+            key = (ticker_name, signal.side)
+            self.open_quantity[key] = self.open_quantity.get(key, 0) + signal.quantity
+            return True
+
+        lots = self.OpenLots.get(ticker_name, {}).get(signal.side)
+        if not lots or signal.quantity > self.open_quantity[(ticker_name, signal.side)]:
+            return False
+        self.open_quantity[(ticker_name, signal.side)] -= signal.quantity
+        remaining = signal.quantity
+        while remaining > 0:
+            trade = lots[0]
+            if trade.NumberOfContracts <= remaining:
+                lots.popleft()
+                trade.CurrentPrice, trade.isActive, trade.SaleTime = signal.price, False, timestamp
+                remaining -= trade.NumberOfContracts
+            else:
+                self.Trades.append(Trade(Ticker=trade.Ticker, PurchasePrice=trade.PurchasePrice,
+                                         PurchaseTime=trade.PurchaseTime, SaleTime=timestamp, YesOrNo=trade.YesOrNo,
+                                         NumberOfContracts=remaining, CurrentPrice=signal.price, isActive=False))
+                trade.NumberOfContracts -= remaining
+                remaining = 0
+        if not lots:
+            sides = self.OpenLots[ticker_name]
+            del sides[signal.side]
+            if not sides:
+                del self.OpenLots[ticker_name]
+        return True
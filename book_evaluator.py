@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# book side to read and the bundle action it prices: buying yes+no off the asks, or selling it into the bids
+KINDS = (("BUY", "asks", True), ("SELL", "bids", False))
+
+
+@dataclass
+class FeeModel:
+    """
+    Trading costs of an order or a yes+no bundle trade, subclass and override per_contract/fixed for another fee schedule.
+
+    Notes:
+        - taker_rate follows the CLOB's curve: rate * min(p, 1 - p) per contract on each leg, in $
+        - gas_per_order is a flat $ cost per order sent, a bundle trade sends one order per leg
+    """
+    taker_rate: float = 0.0
+    gas_per_order: float = 0.0
+
+    def per_contract(self, price: np.ndarray) -> np.ndarray:
+        """$ fee per contract of one leg filled at price, elementwise."""
+        if not self.taker_rate:
+            return np.zeros(np.shape(price))
+        with np.errstate(invalid="ignore"):
+            return self.taker_rate * np.minimum(price, 1 - price)
+
+    def per_bundle(self, yes_price: np.ndarray, no_price: np.ndarray) -> np.ndarray:
+        """$ fee per bundle filled at the given leg prices, elementwise."""
+        return self.per_contract(yes_price) + self.per_contract(no_price)
+
+    def fixed(self, legs: int = 2) -> float:
+        return self.gas_per_order * legs
+
+
+NO_FEES = FeeModel()
+
+
+def ladder_arrays(levels: Sequence[Sequence[Dict[str, Any]]], depth: int, asks: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (prices, sizes) as N x depth arrays from raw CLOB ladders, best level first.
+    The CLOB does not send levels best first, so each ladder is sorted. Missing levels have size 0.
+    """
+    prices = np.full((len(levels), depth), np.inf if asks else -np.inf)
+    sizes = np.zeros((len(levels), depth))
+    for i, ladder in enumerate(levels):
+        if not ladder:
+            continue
+        p = np.fromiter((float(level["price"]) for level in ladder), dtype=np.float64, count=len(ladder))
+        s = np.fromiter((float(level["size"]) for level in ladder), dtype=np.float64, count=len(ladder))
+        order = np.argsort(p if asks else -p, kind="stable")[:depth]
+        prices[i, :len(order)] = p[order]
+        sizes[i, :len(order)] = s[order]
+    return prices, sizes
+
+
+def bundle_depth(yes_prices: np.ndarray, yes_sizes: np.ndarray, no_prices: np.ndarray, no_sizes: np.ndarray,
+                 asks: bool, min_edge: float = 0.0, fees: FeeModel = NO_FEES) -> Dict[str, np.ndarray]:
+    """
+    Walks the yes and no ladders of N markets together, one bundle (1 yes + 1 no) at a time, in one pass.
+
+    Cumulative depth on both sides splits the bundle quantity into segments where the (yes, no) level pair is fixed,
+    each segment earns 1 - yes - no per bundle on asks (yes + no - 1 on bids), less fees.per_bundle. The walk stops
+    at the first segment that does not clear min_edge, a later level can not be reached without taking this one.
+    A market whose walk does not cover fees.fixed() is left at quantity 0.
+    Returns per market: top-of-book edge and size, the profitable quantity, gross profit, fees, net profit,
+    volume weighted prices per leg and the worst level price per leg (the limit price to send).
+    """
+    n, depth = yes_prices.shape
+    yes_cum = np.cumsum(yes_sizes, axis=1)
+    no_cum = np.cumsum(no_sizes, axis=1)
+    available = np.minimum(yes_cum[:, -1], no_cum[:, -1]) if depth else np.zeros(n)
+
+    breaks = np.minimum(np.sort(np.concatenate([yes_cum, no_cum], axis=1), axis=1), available[:, None])
+    segment = np.diff(breaks, axis=1, prepend=0.0)
+    # level in use over segment k is the number of levels already used up before its end
+    last_level = max(depth - 1, 0)
+    yes_level = np.minimum((yes_cum[:, None, :] < breaks[:, :, None]).sum(axis=2), last_level)
+    no_level = np.minimum((no_cum[:, None, :] < breaks[:, :, None]).sum(axis=2), last_level)
+    yes_price = np.take_along_axis(yes_prices, yes_level, axis=1)
+    no_price = np.take_along_axis(no_prices, no_level, axis=1)
+
+    with np.errstate(invalid="ignore"):
+        edge = 1 - yes_price - no_price if asks else yes_price + no_price - 1
+        fee = fees.per_bundle(yes_price, no_price)
+        net_edge = edge - fee
+        # empty segments do not end the walk, the first unprofitable filled one does
+        taken = np.logical_and.accumulate((net_edge > min_edge) | (segment <= 0), axis=1) & (segment > 0)
+        gross = np.where(taken, segment * edge, 0.0).sum(axis=1)
+        variable_fees = np.where(taken, segment * fee, 0.0).sum(axis=1)
+        yes_cost = np.where(taken, segment * yes_price, 0.0).sum(axis=1)
+        no_cost = np.where(taken, segment * no_price, 0.0).sum(axis=1)
+    quantity = np.where(taken, segment, 0.0).sum(axis=1)
+
+    fixed = fees.fixed()
+    worth_it = (quantity > 0) & (gross - variable_fees > fixed)
+    taken &= worth_it[:, None]
+    quantity = np.where(worth_it, quantity, 0.0)
+    total_fees = np.where(worth_it, variable_fees + fixed, 0.0)
+    gross = np.where(worth_it, gross, 0.0)
+
+    worst = np.max if asks else np.min
+    fill = -np.inf if asks else np.inf
+    with np.errstate(invalid="ignore", divide="ignore"):
+        top_edge = 1 - yes_prices[:, 0] - no_prices[:, 0] if asks else yes_prices[:, 0] + no_prices[:, 0] - 1
+        yes_vwap = np.where(worth_it, yes_cost / quantity, np.nan)
+        no_vwap = np.where(worth_it, no_cost / quantity, np.nan)
+    return {
+        "top_edge": np.where(np.isfinite(top_edge), top_edge, np.nan),
+        "top_size": np.minimum(yes_sizes[:, 0], no_sizes[:, 0]) if depth else np.zeros(n),
+        "quantity": quantity,
+        "gross_profit": gross,
+        "fees": total_fees,
+        "profit": gross - total_fees,
+        "yes_vwap": yes_vwap,
+        "no_vwap": no_vwap,
+        "yes_limit": np.where(worth_it, worst(np.where(taken, yes_price, fill), axis=1, initial=fill), np.nan),
+        "no_limit": np.where(worth_it, worst(np.where(taken, no_price, fill), axis=1, initial=fill), np.nan),
+    }
+
+
+def evaluate_markets(yes_books: Sequence[Optional[dict]], no_books: Sequence[Optional[dict]], depth: int = 20,
+                     min_edge: float = 0.0, fees: FeeModel = NO_FEES) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Batch API: bundle_depth of the asks ("BUY") and bids ("SELL") of many markets.
+    yes_books[i] and no_books[i] are raw /book responses for market i, None for a book that could not be fetched.
+    Ladders are cut to their best depth levels.
+    """
+    out = {}
+    for kind, key, asks in KINDS:
+        yes_prices, yes_sizes = ladder_arrays([(book or {}).get(key, []) for book in yes_books], depth, asks)
+        no_prices, no_sizes = ladder_arrays([(book or {}).get(key, []) for book in no_books], depth, asks)
+        out[kind] = bundle_depth(yes_prices, yes_sizes, no_prices, no_sizes, asks, min_edge, fees)
+    return out
+
+
+def evaluate_market(yes_book: dict, no_book: dict, min_edge: float = 0.0, fees: FeeModel = NO_FEES) -> Dict[str, Dict[str, float]]:
+    """One market over its full ladders, as plain floats per kind."""
+    depth = max([len(book.get(key, [])) for book in (yes_book, no_book) for _, key, _ in KINDS] + [1])
+    batch = evaluate_markets([yes_book], [no_book], depth, min_edge, fees)
+    return {kind: {name: float(values[0]) for name, values in result.items()} for kind, result in batch.items()}
@@ -0,0 +1,403 @@
+import asyncio
+import json
+import math
+import os
+import time
+import zlib
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from arb_scanner import RateLimiter
+from book_evaluator import ladder_arrays
+from polymarket_connector import OrderBook
+from price_panel import grouped_ffill
+
+# prices and sizes are stored as integers in these units
+PRICE_SCALE = 10000
+SIZE_SCALE = 100
+# level columns of one snapshot, each depth wide, best level first
+FIELDS = ("bid_price", "bid_size", "ask_price", "ask_size")
+
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u4"), ("rows", "<u4"), ("t_first", "<i8"), ("t_last", "<i8")])
+# one record per (chunk, token in it): the token's first time in the chunk
+TOKEN_INDEX_DTYPE = np.dtype([("chunk", "<u4"), ("token", "<u4"), ("t_first", "<i8")])
+# (token, t) lookups search one int64 key, token id above 42 bits of epoch ms (good until 2109)
+_KEY_SHIFT = 42
+
+
+def book_levels(books: Sequence[Optional[dict]], depth: int) -> np.ndarray:
+    """
+    Raw /book responses as an N x (4 * depth) int64 matrix of scaled bid prices, bid sizes, ask prices, ask sizes.
+    Missing levels (and books that could not be fetched) are 0.
+    """
+    columns = []
+    for key, asks in (("bids", False), ("asks", True)):
+        prices, sizes = ladder_arrays([(book or {}).get(key, []) for book in books], depth, asks)
+        empty = sizes == 0
+        columns.append(np.where(empty, 0, np.rint(np.where(empty, 0, prices) * PRICE_SCALE)).astype(np.int64))
+        columns.append(np.rint(sizes * SIZE_SCALE).astype(np.int64))
+    return np.concatenate(columns, axis=1)
+
+
+def encode_chunk(t: np.ndarray, token: np.ndarray, levels: np.ndarray) -> bytes:
+    """
+    One compressed chunk of snapshots, rows in time order.
+    Each row keeps only the cells that changed since the previous row of the same token in the chunk (the first row
+    of a token is against an all zero book), as a bitmask plus the new values. Every chunk decodes on its own.
+    """
+    rows, cells = levels.shape
+    order = np.argsort(token, kind="stable")
+    grouped = levels[order]
+    previous = np.zeros_like(grouped)
+    same_token = np.zeros(rows, dtype=bool)
+    same_token[1:] = token[order][1:] == token[order][:-1]
+    previous[1:][same_token[1:]] = grouped[:-1][same_token[1:]]
+    changed = np.empty_like(levels, dtype=bool)
+    changed[order] = grouped != previous
+
+    header = np.array([rows, int(changed.sum()), cells], dtype=np.int64)
+    parts = [header, t.astype(np.int64), token.astype(np.int32), np.packbits(changed, axis=1), levels[changed]]
+    return zlib.compress(b"".join(np.ascontiguousarray(part).tobytes() for part in parts), 6)
+
+
+def decode_chunk(blob: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(t, token, levels) back from encode_chunk, levels as float64 in scaled integer units."""
+    raw = zlib.decompress(blob)
+    rows, changed_count, cells = np.frombuffer(raw, dtype=np.int64, count=3)
+    offset = 24
+    t = np.frombuffer(raw, dtype=np.int64, count=rows, offset=offset)
+    offset += 8 * rows
+    token = np.frombuffer(raw, dtype=np.int32, count=rows, offset=offset)
+    offset += 4 * rows
+    mask_bytes = rows * ((cells + 7) // 8)
+    packed = np.frombuffer(raw, dtype=np.uint8, count=mask_bytes, offset=offset).reshape(rows, -1)
+    offset += mask_bytes
+    values = np.frombuffer(raw, dtype=np.int64, count=changed_count, offset=offset)
+
+    changed = np.unpackbits(packed, axis=1, count=cells).astype(bool)
+    levels = np.full((rows, cells), np.nan)
+    levels[changed] = values
+    columns = [levels[:, c] for c in range(cells)]
+    grouped_ffill(token, columns)
+    for c, column in enumerate(columns):
+        levels[:, c] = column
+    return t, token, np.nan_to_num(levels, nan=0.0)
+
+
+def estimate_bytes(num_tokens: int, interval: float, seconds: float, depth: int = 10, changed_fraction: float = 0.2,
+                   compression: float = 0.5) -> int:
+    """
+    Rough storage for recording num_tokens every interval seconds for seconds.
+    A snapshot costs its time and token id, a bit per level cell, and 8 bytes per changed cell, before compression.
+    Calibrate changed_fraction and compression against BookRecorder.stats() on a short real recording.
+    """
+    cells = len(FIELDS) * depth
+    per_snapshot = 8 + 4 + math.ceil(cells / 8) + changed_fraction * cells * 8
+    return int(num_tokens * (seconds / interval) * per_snapshot * compression)
+
+
+class BookWriter:
+    """
+    Append-only on-disk order book store.
+
+    Notes:
+        - path is a directory of chunks.bin (compressed chunks back to back), index.bin (one INDEX_DTYPE record per
+          chunk: offset, length, rows, first and last time), tokens.bin (one TOKEN_INDEX_DTYPE record per token
+          of every chunk) and meta.json (depth and the token table)
+        - snapshots are buffered and written chunk_rows at a time, flush() writes a partial chunk
+        - times are epoch milliseconds
+    """
+
+    def __init__(self, path: str, depth: int = 10, chunk_rows: int = 4096):
+        self.path = path
+        self.depth = depth
+        self.chunk_rows = chunk_rows
+        os.makedirs(path, exist_ok=True)
+        meta = _read_meta(path)
+        if meta is not None and meta["depth"] != depth:
+            raise ValueError(f"{path} was recorded with depth {meta['depth']}, not {depth}")
+        self.tokens: List[str] = meta["tokens"] if meta is not None else []
+        self._token_ids = {token: i for i, token in enumerate(self.tokens)}
+        self._write_meta()
+
+        self._t = np.empty(chunk_rows, dtype=np.int64)
+        self._token = np.empty(chunk_rows, dtype=np.int32)
+        self._levels = np.empty((chunk_rows, len(FIELDS) * depth), dtype=np.int64)
+        self._rows = 0
+        self.snapshots_written = 0
+        self.bytes_written = 0
+
+    def token_id(self, token: str) -> int:
+        token_id = self._token_ids.get(token)
+        if token_id is None:
+            token_id = self._token_ids[token] = len(self.tokens)
+            self.tokens.append(token)
+            self._write_meta()
+        return token_id
+
+    def append_books(self, t: int, tokens: Sequence[str], books: Sequence[Optional[dict]]):
+        """One snapshot per token at t (epoch ms), books are raw /book responses."""
+        levels = book_levels(books, self.depth)
+        ids = np.fromiter((self.token_id(token) for token in tokens), dtype=np.int32, count=len(tokens))
+        self.append(np.full(len(tokens), t, dtype=np.int64), ids, levels)
+
+    def append(self, t: np.ndarray, token_ids: np.ndarray, levels: np.ndarray):
+        start = 0
+        while start < len(t):
+            take = min(len(t) - start, self.chunk_rows - self._rows)
+            end = self._rows + take
+            self._t[self._rows:end] = t[start:start + take]
+            self._token[self._rows:end] = token_ids[start:start + take]
+            self._levels[self._rows:end] = levels[start:start + take]
+            self._rows = end
+            start += take
+            if self._rows == self.chunk_rows:
+                self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        n = self._rows
+        order = np.argsort(self._t[:n], kind="stable")
+        t, token, levels = self._t[:n][order], self._token[:n][order], self._levels[:n][order]
+        blob = encode_chunk(t, token, levels)
+
+        chunks_path = os.path.join(self.path, "chunks.bin")
+        with open(chunks_path, "ab") as file:
+            offset = file.tell()
+            file.write(blob)
+        index_path = os.path.join(self.path, "index.bin")
+        chunk = os.path.getsize(index_path) // INDEX_DTYPE.itemsize if os.path.exists(index_path) else 0
+        record = np.array([(offset, len(blob), n, t[0], t[-1])], dtype=INDEX_DTYPE)
+        with open(index_path, "ab") as file:
+            file.write(record.tobytes())
+        tokens = chunk_tokens(chunk, t, token)
+        with open(os.path.join(self.path, "tokens.bin"), "ab") as file:
+            file.write(tokens.tobytes())
+        self.snapshots_written += n
+        self.bytes_written += len(blob) + INDEX_DTYPE.itemsize + tokens.nbytes
+        self._rows = 0
+
+    def close(self):
+        self.flush()
+
+    def _write_meta(self):
+        temp = os.path.join(self.path, "meta.json.tmp")
+        with open(temp, "w") as file:
+            json.dump({"depth": self.depth, "price_scale": PRICE_SCALE, "size_scale": SIZE_SCALE, "fields": FIELDS,
+                       "tokens": self.tokens}, file)
+        os.replace(temp, os.path.join(self.path, "meta.json"))
+
+
+def chunk_tokens(chunk: int, t: np.ndarray, token: np.ndarray) -> np.ndarray:
+    """TOKEN_INDEX_DTYPE records of one chunk: every token in it with its first time."""
+    order = np.lexsort((t, token))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = token[order][1:] != token[order][:-1]
+    records = np.zeros(int(first.sum()), dtype=TOKEN_INDEX_DTYPE)
+    records["chunk"] = chunk
+    records["token"] = token[order][first]
+    records["t_first"] = t[order][first]
+    return records
+
+
+def _read_meta(path: str) -> Optional[dict]:
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as file:
+        return json.load(file)
+
+
+class BookReader:
+    """
+    Reads a BookWriter directory back: book_at(token, t) is the latest snapshot of token at or before t.
+
+    Notes:
+        - the chunk index is memory mapped, call refresh() to see chunks appended since it was opened
+        - the token index (tokens.bin) is kept sorted by (token, first time), so a lookup finds the one chunk
+          holding the answer with a binary search, and a token first recorded after t decodes nothing
+        - a recording without tokens.bin (or with chunks it does not cover) gets those entries by decoding the
+          chunks once on refresh
+        - decoded chunks are kept in a small LRU cache, so scanning forward through time decodes each chunk once
+    """
+
+    def __init__(self, path: str, cache_chunks: int = 8):
+        self.path = path
+        self.cache_chunks = cache_chunks
+        self._cache: "OrderedDict[int, tuple]" = OrderedDict()
+        self.refresh()
+
+    def refresh(self):
+        meta = _read_meta(self.path)
+        if meta is None:
+            raise FileNotFoundError(f"no order book recording at {self.path}")
+        self.depth = meta["depth"]
+        self.tokens = meta["tokens"]
+        self._token_ids = {token: i for i, token in enumerate(self.tokens)}
+        index_path = os.path.join(self.path, "index.bin")
+        size = os.path.getsize(index_path) if os.path.exists(index_path) else 0
+        count = size // INDEX_DTYPE.itemsize
+        self.index = np.memmap(index_path, dtype=INDEX_DTYPE, mode="r", shape=(count,)) if count else np.zeros(0, dtype=INDEX_DTYPE)
+        self._cache.clear()
+        self._index_tokens(count)
+
+    def _index_tokens(self, count: int):
+        tokens_path = os.path.join(self.path, "tokens.bin")
+        records = np.fromfile(tokens_path, dtype=TOKEN_INDEX_DTYPE) if os.path.exists(tokens_path) else np.zeros(0, dtype=TOKEN_INDEX_DTYPE)
+        # records of a chunk whose index record is not written yet are dropped, chunks without records are decoded
+        records = records[records["chunk"] < count]
+        covered = np.zeros(count, dtype=bool)
+        covered[records["chunk"]] = True
+        missing = [chunk_tokens(k, *self._decoded(k)[:2]) for k in np.flatnonzero(~covered)]
+        records = np.concatenate([records] + missing)
+
+        keys = (records["token"].astype(np.int64) << _KEY_SHIFT) | records["t_first"]
+        order = np.argsort(keys, kind="stable")
+        self._token_keys = keys[order]
+        self._token_chunks = records["chunk"][order].astype(np.int64)
+
+    def __len__(self) -> int:
+        return int(self.index["rows"].sum()) if len(self.index) else 0
+
+    def chunk(self, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(t, token, levels) of chunk k."""
+        return self._decoded(k)[:3]
+
+    def _decoded(self, k: int):
+        # the decoded chunk plus its rows ordered by (token, t) and the tokens in that order, for lookups
+        cached = self._cache.get(k)
+        if cached is not None:
+            self._cache.move_to_end(k)
+            return cached
+        record = self.index[k]
+        with open(os.path.join(self.path, "chunks.bin"), "rb") as file:
+            file.seek(int(record["offset"]))
+            t, token, levels = decode_chunk(file.read(int(record["length"])))
+        order = np.lexsort((t, token))
+        keys = (token[order].astype(np.int64) << _KEY_SHIFT) | t[order]
+        decoded = self._cache[k] = (t, token, levels, order, keys)
+        if len(self._cache) > self.cache_chunks:
+            self._cache.popitem(last=False)
+        return decoded
+
+    def _split(self, levels: np.ndarray) -> Dict[str, np.ndarray]:
+        depth = self.depth
+        scales = {"bid_price": PRICE_SCALE, "bid_size": SIZE_SCALE, "ask_price": PRICE_SCALE, "ask_size": SIZE_SCALE}
+        return {name: levels[..., i * depth:(i + 1) * depth] / scales[name] for i, name in enumerate(FIELDS)}
+
+    def book_at(self, token: str, t: int) -> Optional[Dict[str, np.ndarray]]:
+        """
+        {"timestamp", "bid_price", "bid_size", "ask_price", "ask_size"} of token's latest snapshot at or before t
+        (epoch ms), level arrays best first, or None if there is none.
+        """
+        book = self.books_at([token], t)
+        if book["timestamp"][0] < 0:
+            return None
+        return {"timestamp": int(book["timestamp"][0]), **{name: book[name][0] for name in FIELDS}}
+
+    def books_at(self, tokens: Sequence[str], t: int) -> Dict[str, np.ndarray]:
+        """
+        book_at for many tokens as N x depth arrays, tokens with no snapshot are all zero with timestamp -1.
+        Every token's chunk comes from one search of the token index, each of those chunks is decoded once and
+        searched for all its tokens together.
+        """
+        n = len(tokens)
+        out = {"timestamp": np.full(n, -1, dtype=np.int64)}
+        out.update({name: np.zeros((n, self.depth)) for name in FIELDS})
+        ids = np.fromiter((self._token_ids.get(token, -1) for token in tokens), dtype=np.int64, count=n)
+        known = np.flatnonzero(ids >= 0)
+        if not len(known) or not len(self._token_keys):
+            return out
+
+        # the last chunk the token appears in by t, if it is still the same token the answer is in that chunk
+        queries = (ids[known] << _KEY_SHIFT) | int(t)
+        position = np.searchsorted(self._token_keys, queries, side="right") - 1
+        found = position >= 0
+        found[found] = (self._token_keys[position[found]] >> _KEY_SHIFT) == ids[known[found]]
+        known, queries, chunks = known[found], queries[found], self._token_chunks[position[found]]
+
+        for k in np.unique(chunks):
+            times, _, levels, order, keys = self._decoded(int(k))
+            in_chunk = chunks == k
+            rows = order[np.searchsorted(keys, queries[in_chunk], side="right") - 1]
+            targets = known[in_chunk]
+            out["timestamp"][targets] = times[rows]
+            for name, values in self._split(levels[rows]).items():
+                out[name][targets] = values
+        return out
+
+
+class BookRecorder:
+    """
+    Polls the order books of a token set and appends every snapshot to a BookWriter.
+
+    Notes:
+        - every round fetches all tokens concurrently through the OrderBook session, paced by a token bucket of
+          rate requests per second, rounds start every interval seconds (back to back if a round runs longer)
+        - a snapshot is stamped with the book's own "timestamp" (epoch ms) when the CLOB sends one, else arrival time
+        - tokens that fail to fetch are skipped for that round
+    """
+
+    def __init__(self, order_book: OrderBook, tokens: Sequence[str], path: str, depth: int = 10, interval: float = 1.0,
+                 rate: float = 200.0, concurrency: int = 32, chunk_rows: int = 4096):
+        self.order_book = order_book
+        self.tokens = list(tokens)
+        self.writer = BookWriter(path, depth=depth, chunk_rows=chunk_rows)
+        self.interval = interval
+        self.rate = rate
+        self.concurrency = concurrency
+        self.rounds = 0
+        self.errors = 0
+        self.started: Optional[float] = None
+
+    async def _fetch(self, loop, pool, limiter: RateLimiter, token: str) -> Optional[dict]:
+        await limiter.acquire()
+        try:
+            return await loop.run_in_executor(pool, self.order_book.get_book, token)
+        except Exception as error:
+            print(f"Failed to fetch book for {token}: {error!r}")
+            self.errors += 1
+            return None
+
+    async def record_once(self, loop, pool, limiter: RateLimiter):
+        books = await asyncio.gather(*(self._fetch(loop, pool, limiter, token) for token in self.tokens))
+        now = int(time.time() * 1000)
+        fetched = [(token, book) for token, book in zip(self.tokens, books) if book is not None]
+        if fetched:
+            times = np.fromiter((int(book.get("timestamp") or now) for _, book in fetched), dtype=np.int64, count=len(fetched))
+            ids = np.fromiter((self.writer.token_id(token) for token, _ in fetched), dtype=np.int32, count=len(fetched))
+            self.writer.append(times, ids, book_levels([book for _, book in fetched], self.writer.depth))
+        self.rounds += 1
+
+    async def run(self, rounds: Optional[int] = None):
+        loop = asyncio.get_running_loop()
+        limiter = RateLimiter(self.rate)
+        self.started = self.started or time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                count = 0
+                while rounds is None or count < rounds:
+                    started = time.perf_counter()
+                    await self.record_once(loop, pool, limiter)
+                    count += 1
+                    await asyncio.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
+        finally:
+            self.writer.flush()
+
+    def stats(self) -> Dict[str, float]:
+        """Throughput and measured storage cost, to calibrate estimate_bytes."""
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        written = self.writer.snapshots_written
+        return {
+            "rounds": self.rounds,
+            "errors": self.errors,
+            "snapshots": written,
+            "snapshots_per_second": written / elapsed if elapsed else 0.0,
+            "bytes": self.writer.bytes_written,
+            "bytes_per_snapshot": self.writer.bytes_written / written if written else 0.0,
+        }
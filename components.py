@@ -1,6 +1,10 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Deque, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from trade_store import LotQueue, TradeStore, decode_time, encode_time
 
 
 @dataclass
@@ -87,123 +91,301 @@ class Trade:
         )
 
 
+def _column_property(column: str, get, put=None):
+    def getter(self):
+        return get(getattr(self._store, column)[self._row])
+
+    def setter(self, value):
+        getattr(self._store, column)[self._row] = put(value) if put else value
+
+    return property(getter, setter)
+
+
+class TickerView:
+    """Ticker-shaped view of one row of a TradeStore's ticker table."""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: TradeStore, ticker_id: int):
+        self._store = store
+        self._row = ticker_id
+
+    @property
+    def Name(self) -> str:
+        return self._store.tickers[self._row]
+
+    YesPrice = _column_property("ticker_yes", float)
+    NoPrice = _column_property("ticker_no", float)
+    RealRank = _column_property("ticker_real_rank", int)
+    PotentialRank = _column_property("ticker_potential_rank", int)
+    LastUpdated = _column_property("ticker_last_updated", int, int)
+
+    updateTicker = Ticker.updateTicker
+    __str__ = Ticker.__str__
+
+
+class TradeView:
+    """
+    Trade-shaped view of one TradeStore row, what Ledger.Trades hands out.
+    Writes go straight to the store, open and close positions through the Ledger so its index stays in sync.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: TradeStore, row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def Ticker(self) -> TickerView:
+        return TickerView(self._store, int(self._store.ticker_id[self._row]))
+
+    @property
+    def YesOrNo(self) -> str:
+        return self._store.sides[self._store.side[self._row]]
+
+    PurchasePrice = _column_property("purchase_price", float)
+    CurrentPrice = _column_property("current_price", float)
+    NumberOfContracts = _column_property("quantity", int)
+    PurchaseTime = _column_property("purchase_time", decode_time, encode_time)
+    SaleTime = _column_property("sale_time", decode_time, encode_time)
+    isActive = _column_property("active", bool)
+
+    update_trade = Trade.update_trade
+    unrealized_pnl = Trade.unrealized_pnl
+    __str__ = Trade.__str__
+    to_row = Trade.to_row
+
+
+class TradeLog:
+    """Read-only sequence of TradeViews over every row of a TradeStore, in fill order."""
+
+    def __init__(self, store: TradeStore):
+        self._store = store
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TradeView(self._store, row) for row in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("trade index out of range")
+        return TradeView(self._store, index)
+
+    def __iter__(self) -> Iterator[TradeView]:
+        for row in range(len(self._store)):
+            yield TradeView(self._store, row)
+
+
 class Ledger:
+    """
+    Notes:
+        - Store holds every fill as columns (partial-sell splits included), Trades is a TradeView log over it
+        - OpenLots indexes the active rows as FIFO lots: {ticker: {side: LotQueue of store rows, oldest first}}
+        - PositionValue, Profit (unrealized PnL) and ActiveTrades are running totals over the open lots,
+          updated on every fill and price change so nothing has to rescan Trades
+        - trade times are epoch seconds
+        - executeTrade fills at signal.quantity and signal.price, a fill model adjusts the signal (and passes its fee)
+          before it gets here
+    """
+
     def __init__(self):
-        self.Trades: List[Trade] = []
+        self.Store = TradeStore()
         self.LiquidValue: float = 1000.0      # starting value of the ledger
         self.Profit: float = 0.0
+        self.PositionValue: float = 0.0
+        self.ActiveTrades: int = 0
+        self.Fees: float = 0.0                # trading fees paid, already taken out of LiquidValue
+        self.OpenLots: Dict[str, Dict[str, LotQueue]] = {}
         # Need some way to track historical performance I feel
 
+    @property
+    def Trades(self) -> TradeLog:
+        return TradeLog(self.Store)
+
     def addTrade(self, trade: Trade) -> None:
-        self.Trades.append(trade)
+        row = self.Store.append(
+            trade.Ticker.Name, trade.YesOrNo, trade.NumberOfContracts, trade.PurchasePrice,
+            trade.CurrentPrice, trade.PurchaseTime, trade.SaleTime, trade.isActive,
+        )
+        if trade.isActive:
+            self._open_lot(row, trade.Ticker.Name, trade.YesOrNo)
+
+    def _open_lot(self, row: int, ticker_name: str, side: str) -> None:
+        store = self.Store
+        lots = self.OpenLots.setdefault(ticker_name, {}).setdefault(side, LotQueue())
+        lots.push(row)
+        quantity = int(store.quantity[row])
+        value = float(store.current_price[row]) * quantity
+        lots.quantity += quantity
+        lots.value += value
+        self.PositionValue += value
+        self.Profit += value - float(store.purchase_price[row]) * quantity
+        self.ActiveTrades += 1
+
+    def _close_contracts(self, lots: LotQueue, marked_value: float, cost: float, quantity: int) -> None:
+        # take contracts out of the aggregates at their last marked value
+        lots.quantity -= quantity
+        lots.value -= marked_value
+        self.PositionValue -= marked_value
+        self.Profit -= marked_value - cost
+
+    def _open_rows(self) -> np.ndarray:
+        rows = [lots.open_rows() for sides in self.OpenLots.values() for lots in sides.values()]
+        return np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+
+    def open_trades(self) -> Iterator[TradeView]:
+        for row in self._open_rows():
+            yield TradeView(self.Store, int(row))
+
+    def recompute_totals(self) -> None:
+        """Rebuilds the lot aggregates and running totals from the store, drops any accumulated float drift."""
+        store = self.Store
+        self.PositionValue = 0.0
+        self.Profit = 0.0
+        self.ActiveTrades = 0
+        for sides in self.OpenLots.values():
+            for lots in sides.values():
+                rows = lots.open_rows()
+                quantities = store.quantity[rows].astype(np.float64)
+                lots.quantity = int(store.quantity[rows].sum())
+                lots.value = float(np.dot(store.current_price[rows], quantities))
+                self.PositionValue += lots.value
+                self.Profit += lots.value - float(np.dot(store.purchase_price[rows], quantities))
+                self.ActiveTrades += len(rows)
+
+    def mark_to_market(self, price_map: Dict[str, Tuple[float, float]], timestamp: Optional[int] = None) -> None:
+        """
+        Updates every open lot whose ticker is in price_map, and the running totals with it.
+        Only touches the affected positions, closed trades are never visited.
+        """
+        if len(self.OpenLots) <= len(price_map):
+            tickers = [ticker for ticker in self.OpenLots if ticker in price_map]
+        else:
+            tickers = [ticker for ticker in price_map if ticker in self.OpenLots]
+
+        store = self.Store
+        for ticker in tickers:
+            yes_price, no_price = price_map[ticker]
+            ticker_id = store.ticker_index(ticker)
+            store.ticker_yes[ticker_id] = yes_price
+            store.ticker_no[ticker_id] = no_price
+
+            updated = timestamp
+            for side, lots in self.OpenLots[ticker].items():
+                rows = lots.open_rows()
+                price = yes_price if side == "YES" else no_price
+                value = price * lots.quantity
+                delta = value - lots.value
+                lots.value = value
+                store.current_price[rows] = price
+                self.PositionValue += delta
+                self.Profit += delta
+                if updated is None:
+                    # same fallback as Trade.update_trade, the purchase time
+                    updated = decode_time(store.purchase_time[rows[-1]])
+            store.ticker_last_updated[ticker_id] = updated or 0
 
     def buildPriceMap(self):
         # {str: [yesPrice, noPrice]}
-        if not self.Trades:
-            return {}
+        store = self.Store
         resp = {}
-        for trade in self.Trades:
-            if trade.isActive and trade.Ticker:
-                ticker_name = trade.Ticker.Name
-                # get prices from the ticker's current state
-                resp[ticker_name] = (trade.Ticker.YesPrice, trade.Ticker.NoPrice)
+        for ticker_name in self.OpenLots:
+            # get prices from the ticker's current state
+            ticker_id = store.ticker_index(ticker_name)
+            resp[ticker_name] = (float(store.ticker_yes[ticker_id]), float(store.ticker_no[ticker_id]))
         return resp
     
-    def executeTrade(self, signal: TradeSignal, ticker_name: str, timestamp: int):
+    def executeTrade(self, signal: TradeSignal, ticker_name: str, timestamp: int, fee: float = 0.0):
+        # fee is the $ cost of this fill, paid out of LiquidValue on top of the contracts
         # handle SELL operations
         if signal.action == "SELL":
-            # find matching active trades (same ticker, same side)
-            matching_trades = [
-                trade for trade in self.Trades
-                if trade.isActive 
-                and trade.Ticker.Name == ticker_name 
-                and trade.YesOrNo == signal.side
-            ]
+            # find matching active trades (same ticker, same side), oldest first
+            lots = self.OpenLots.get(ticker_name, {}).get(signal.side)
             
-            if not matching_trades:
+            if not lots:
                 print(f"No active trades to sell for {ticker_name} ({signal.side}) at {timestamp}")
                 return False
             
             # total available contracts to sell
-            total_available = sum(trade.NumberOfContracts for trade in matching_trades)
+            store = self.Store
+            total_available = lots.quantity
             
             if signal.quantity > total_available:
                 print(f"Not enough contracts to sell. Requested: {signal.quantity}, Available: {total_available} for {ticker_name} at {timestamp}")
                 return False
             
             # execute sell: close trades starting from oldest first
-            remaining_to_sell = signal.quantity
-            sale_proceeds = 0.0
-            
-            for trade in matching_trades:
-                if remaining_to_sell <= 0:
-                    break
-                
-                if trade.NumberOfContracts <= remaining_to_sell:
-                    # close entire trade because number of contracts to sell is greather than those in the trade
-                    contracts_to_sell = trade.NumberOfContracts
-                    trade.CurrentPrice = signal.price  
-                    trade.isActive = False
-                    trade.SaleTime = timestamp
-                    sale_proceeds += contracts_to_sell * signal.price
-                    remaining_to_sell -= contracts_to_sell
-                else:
-                    # partial sell - split the trade because less remaining to sell than in this contract
-                    contracts_to_sell = remaining_to_sell
-                    closed_trade = Trade(
-                        Ticker=trade.Ticker,
-                        PurchasePrice=trade.PurchasePrice,
-                        PurchaseTime=trade.PurchaseTime,
-                        SaleTime=timestamp,
-                        YesOrNo=trade.YesOrNo,
-                        NumberOfContracts=contracts_to_sell,
-                        CurrentPrice=signal.price,  
-                        isActive=False
-                    )
-                    self.Trades.append(closed_trade)
-                    # eeduce the active trade's quantity
-                    trade.NumberOfContracts -= contracts_to_sell
-                    sale_proceeds += contracts_to_sell * signal.price
-                    remaining_to_sell = 0
+            rows = lots.open_rows()
+            oldest = int(store.quantity[rows[0]])
+            if signal.quantity < oldest:
+                closed = 0
+                remaining_to_sell = signal.quantity
+            else:
+                # every lot whose cumulative size fits in the order is closed entirely
+                quantities = store.quantity[rows].astype(np.int64)
+                sold = np.cumsum(quantities)
+                closed = int(np.searchsorted(sold, signal.quantity, side="right"))
+                full = rows[:closed]
+                marked = store.current_price[full]
+                self._close_contracts(
+                    lots,
+                    float(np.dot(marked, quantities[:closed])),
+                    float(np.dot(store.purchase_price[full], quantities[:closed])),
+                    int(sold[closed - 1]),
+                )
+                self.ActiveTrades -= closed
+                store.current_price[full] = signal.price
+                store.active[full] = False
+                store.sale_time[full] = encode_time(timestamp)
+                remaining_to_sell = signal.quantity - int(sold[closed - 1])
+
+            if remaining_to_sell > 0:
+                # partial sell - split the trade because less remaining to sell than in this contract
+                row = int(rows[closed])
+                marked = float(store.current_price[row])
+                purchase_price = float(store.purchase_price[row])
+                store.append(
+                    ticker_name, signal.side, remaining_to_sell, purchase_price, signal.price,
+                    decode_time(store.purchase_time[row]), timestamp, False,
+                )
+                # reduce the active trade's quantity
+                store.quantity[row] -= remaining_to_sell
+                self._close_contracts(lots, marked * remaining_to_sell, purchase_price * remaining_to_sell, remaining_to_sell)
+
+            lots.pop(closed)
+            if not lots:
+                sides = self.OpenLots[ticker_name]
+                del sides[signal.side]
+                if not sides:
+                    del self.OpenLots[ticker_name]
             
             # add sale proceeds back to liquid value
-            self.LiquidValue += sale_proceeds
+            self.LiquidValue += signal.quantity * signal.price - fee
+            self.Fees += fee
             return True
         
         # handle BUY operations 
-        cost = signal.quantity * signal.price
+        cost = signal.quantity * signal.price + fee
         if cost > self.LiquidValue:
             print(f"Not enough liquid value to execute trade for {ticker_name} at {timestamp}")
             return False
 
-        ticker = Ticker(Name=ticker_name)
-        initial_price = signal.price  # Use purchase price as initial current price
-        
-        trade = Trade(
-            Ticker=ticker,
-            PurchasePrice=signal.price,
-            PurchaseTime=timestamp,
-            SaleTime=None,
-            YesOrNo=signal.side,
-            NumberOfContracts=signal.quantity,
-            CurrentPrice=initial_price,  # Set initial price so PnL calculation works immediately
-            isActive=True
+        # purchase price doubles as the initial current price so PnL calculation works immediately
+        row = self.Store.append(
+            ticker_name, signal.side, signal.quantity, signal.price, signal.price, timestamp, None, True,
         )
         self.LiquidValue -= cost
-        self.Trades.append(trade)
+        self.Fees += fee
+        self._open_lot(row, ticker_name, signal.side)
         return True
     
     def update_ledger_at_time(self, timestamp: int, yes_price: float, no_price: float, ticker_name: str):
         # used for updates while backtesting
-        pnl = 0.0
-        price_map = {ticker_name: (yes_price, no_price)}
-        
-        for trade in self.Trades:
-            if trade.isActive:
-                trade.update_trade(price_map, timestamp=int(timestamp))
-                pnl += trade.unrealized_pnl()
-        
-        self.Profit = pnl
+        self.mark_to_market({ticker_name: (yes_price, no_price)}, timestamp=int(timestamp))
 
     # State Manager
     def updateLedger(self, injected_capital: float):
@@ -220,19 +402,16 @@ class Ledger:
             print("\nNo trades to update in ledger")
             return
 
-        # update trades in ledger and update PNL
-        pnl = 0.0
+        # update open trades in ledger and update PNL
         price_map = self.buildPriceMap()
 
-        for trade in self.Trades:
+        for trade in self.open_trades():
             trade.update_trade(price_map)
-            pnl += trade.unrealized_pnl()
+        self.recompute_totals()
 
         if injected_capital:
             self.LiquidValue += injected_capital
 
-        self.Profit = pnl
-
         print(f"Injected Capital: {injected_capital}\n"
               f"After Update: \n")
         self.viewLedger()
@@ -240,6 +419,7 @@ class Ledger:
     def viewLedger(self):
         print("=== Ledger State ===")
         print(f"Cash Balance: {self.LiquidValue:.2f}")
+        print(f"Fees Paid: {self.Fees:.2f}")
         print(f"Unrealized PnL: {self.Profit:.2f}\n")
 
         print("Trades:\n")
@@ -274,6 +454,38 @@ class MarketState:
     no_token: str
     ticker: str
     token: str
+    real_rank: float = np.nan       # App Store rank as of timestamp (rank_join), NaN when unknown
+    implied_prob: float = np.nan    # yes price renormalized over every outcome at timestamp (add_implied_columns)
+    implied_rank: float = np.nan    # place by yes price among the outcomes, the Ticker.PotentialRank
+    overround: float = np.nan       # sum of every outcome's yes price minus 1
+    row: int = -1                   # row id into the run's features.FeatureStore, -1 when there is none
+    # a streaming run's last (t, yes, no) rows of the token, oldest first and this one last (run_stream lookback),
+    # kept up to date by the engine, copy it to hold on to it
+    lookback: Optional[Deque[Tuple[int, float, float]]] = None
+
+@dataclass
+class MarketBatch:
+    """
+    Every valid market row for a single timestamp, as aligned NumPy arrays.
+    Row i of each array describes the same token, in the order the engine walks the panel.
+    """
+    timestamp: int
+    yes_price: np.ndarray
+    no_price: np.ndarray
+    yes_token: np.ndarray
+    no_token: np.ndarray
+    ticker: np.ndarray
+    token: np.ndarray
+    # optional columns, None when the panel does not have them (see price_panel.VALUE_COLUMNS)
+    real_rank: Optional[np.ndarray] = None
+    implied_prob: Optional[np.ndarray] = None
+    implied_rank: Optional[np.ndarray] = None
+    overround: Optional[np.ndarray] = None
+    row: Optional[np.ndarray] = None    # row ids into the run's features.FeatureStore
+    lookback: Optional[np.ndarray] = None   # object array of each row's MarketState.lookback deque when streaming
+
+    def __len__(self) -> int:
+        return len(self.token)
 
 @dataclass
 class TradeSignal:
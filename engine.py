@@ -2,11 +2,12 @@
 
 from components import Ledger
 
-# initialize ledger and print fresh state
-ledger = Ledger()
+if __name__ == "__main__":
+    # initialize ledger and print fresh state
+    ledger = Ledger()
 
-# update the contents of the ledger to be refreshed
-ledger.updateLedger(injected_capital=0.0)
+    # update the contents of the ledger to be refreshed
+    ledger.updateLedger(injected_capital=0.0)
 
 
 
@@ -0,0 +1,104 @@
+import csv
+import heapq
+import math
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from price_panel import PriceTensor
+
+# (t, token, yes, no), a side that did not trade at t is NaN
+PriceEvent = Tuple[int, str, float, float]
+# token -> (ticker, yes_token, no_token)
+MarketMeta = Dict[str, Tuple[str, str, str]]
+
+NAN = float("nan")
+
+
+def markets_from_apps(apps: List[Dict[str, Any]]) -> MarketMeta:
+    """Token metadata for a streaming run from parse_app_rankings output, keyed by the yes token like the panel."""
+    return {
+        app["yesClobToken"]: (app["app"], app["yesClobToken"], app["noClobToken"])
+        for app in apps
+        if app.get("app") and app.get("yesClobToken") and app.get("noClobToken")
+    }
+
+
+def markets_from_panel(panel: Union[pd.DataFrame, PriceTensor]) -> MarketMeta:
+    tokens = panel.tokens if isinstance(panel, PriceTensor) else (
+        panel[["ticker", "yes_token", "no_token"]].reset_index().drop_duplicates("token", keep="last")
+    )
+    return {
+        token: (ticker, yes_token, no_token)
+        for token, ticker, yes_token, no_token in tokens[["token", "ticker", "yes_token", "no_token"]].itertuples(index=False)
+    }
+
+
+def events_from_panel(panel: Union[pd.DataFrame, PriceTensor]) -> Iterator[PriceEvent]:
+    """Replays a built panel as events, in (t, token) order."""
+    if isinstance(panel, PriceTensor):
+        tokens = panel.tokens["token"].tolist()
+        for i, t in enumerate(panel.timestamps):
+            yes, no = panel.prices_at(i)
+            for j in np.flatnonzero(~(np.isnan(yes) & np.isnan(no))):
+                yield int(t), tokens[j], float(yes[j]), float(no[j])
+        return
+
+    panel = panel.sort_index()
+    t_values = panel.index.get_level_values(0).to_numpy()
+    tokens = panel.index.get_level_values(1).to_numpy(dtype=object)
+    yes = panel["yes"].to_numpy(dtype=float) if "yes" in panel.columns else np.full(len(panel), np.nan)
+    no = panel["no"].to_numpy(dtype=float) if "no" in panel.columns else np.full(len(panel), np.nan)
+    for t, token, yes_price, no_price in zip(t_values.tolist(), tokens, yes.tolist(), no.tolist()):
+        yield t, token, yes_price, no_price
+
+
+def events_from_histories(markets: Sequence[Tuple[str, str, str]], histories: Sequence[Dict[str, Any]]) -> Iterator[PriceEvent]:
+    """
+    Merges /prices-history responses (yes then no per market, as build_price_panel fetches them) into one time ordered
+    event stream, keyed by the yes token.
+    """
+    streams = []
+    for i, (_, yes_token, _) in enumerate(markets):
+        streams.append(_history_events(histories[2 * i].get("history", []), yes_token, yes=True))
+        streams.append(_history_events(histories[2 * i + 1].get("history", []), yes_token, yes=False))
+    return heapq.merge(*streams, key=lambda event: (event[0], event[1]))
+
+
+def _history_events(history: List[Dict[str, Any]], token: str, yes: bool) -> Iterator[PriceEvent]:
+    for record in history:
+        price = float(record["p"])
+        yield (int(record["t"]), token, price, NAN) if yes else (int(record["t"]), token, NAN, price)
+
+
+def events_from_order_book(markets: Sequence[Tuple[str, str, str]], order_book, params: Optional[Dict[str, Any]] = None,
+                           max_workers: Optional[int] = None) -> Iterator[PriceEvent]:
+    """Fetches every market's yes/no history through the OrderBook (and its cache, if any) and streams the merge."""
+    params = params or {}
+    requests = []
+    for _, yes_token, no_token in markets:
+        requests.extend([{**params, "market": yes_token}, {**params, "market": no_token}])
+    return events_from_histories(markets, order_book.get_historical_prices_batch(requests, max_workers=max_workers))
+
+
+def write_replay(path: str, events: Iterable[PriceEvent]) -> int:
+    """Writes events to a replay file (CSV: t,token,yes,no with empty cells for missing sides), returns the count."""
+    count = 0
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["t", "token", "yes", "no"])
+        for t, token, yes, no in events:
+            writer.writerow([t, token, "" if math.isnan(yes) else yes, "" if math.isnan(no) else no])
+            count += 1
+    return count
+
+
+def read_replay(path: str) -> Iterator[PriceEvent]:
+    """Streams events back from a replay file, one line at a time."""
+    with open(path, newline="") as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        for t, token, yes, no in reader:
+            yield int(t), token, float(yes) if yes else NAN, float(no) if no else NAN
@@ -0,0 +1,209 @@
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from price_panel import PriceTensor, market_windows
+
+# windowed features take a window in rows of the token (its last window prices), the rest take none
+ROLLING_FEATURES = ("volatility", "rolling_min", "rolling_max")
+FEATURES = ("return",) + ROLLING_FEATURES + ("time_since_start", "time_to_end", "fraction_elapsed")
+
+
+class FeatureStore:
+    """
+    Per-row features over a price panel, for strategies, computed per token and vectorized over the whole panel.
+
+    Notes:
+        - every feature is a float64 array indexed by the engine's row id (MarketState.row, MarketBatch.row): the
+          panel row position for a DataFrame, i * N + j (timestamp i, token j) for a PriceTensor
+        - strategies read through get: store.get("volatility", state.row) in O(1), or store.get("volatility",
+          arrays.row) for a batch; a row id of -1 (a row the panel does not have) reads NaN, where indexing the
+          column store["volatility"] directly would silently read the last row
+        - nothing is computed up front, a feature is computed on its first request and cached (per window)
+        - return is the yes price's change since the token's previous row (NaN after a zero price), volatility the
+          standard deviation of the last window returns, rolling_min / rolling_max the extremes of the last window
+          yes prices; windows are shorter at the start of a token (volatility needs two returns) and NaN prices are
+          skipped
+        - time_since_start, time_to_end and fraction_elapsed place the row in its market's startDate..endDate (see
+          price_panel.market_windows), the token's first row stands in for an unknown start, an unknown end is NaN
+        - a tensor cell without a price is not a row, its features are NaN
+    """
+
+    def __init__(self, prices: Union[pd.DataFrame, PriceTensor], window: int = 20):
+        self.prices = prices
+        self.window = window
+        self._cache: Dict[Tuple[str, Optional[int]], np.ndarray] = {}
+        self._rows = None
+        self._order = None
+
+    def __len__(self) -> int:
+        if isinstance(self.prices, PriceTensor):
+            return len(self.prices.timestamps) * len(self.prices.tokens)
+        return len(self.prices)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.feature(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in FEATURES
+
+    def get(self, name: str, row: Union[int, np.ndarray], window: Optional[int] = None) -> Union[float, np.ndarray]:
+        """One row's value (or an array of them for an array of row ids), NaN for a row id of -1."""
+        if np.ndim(row):
+            rows = np.asarray(row, dtype=np.int64)
+            return np.where(rows >= 0, self.feature(name, window)[np.maximum(rows, 0)], np.nan)
+        if row < 0:
+            return np.nan
+        return float(self.feature(name, window)[row])
+
+    @property
+    def cached(self) -> list:
+        return list(self._cache)
+
+    def feature(self, name: str, window: Optional[int] = None) -> np.ndarray:
+        """The whole feature column, computed on first use."""
+        if name not in FEATURES:
+            raise KeyError(f"unknown feature {name!r}, expected one of {FEATURES}")
+        window = (window or self.window) if name in ROLLING_FEATURES else None
+        key = (name, window)
+        if key not in self._cache:
+            self._cache[key] = self._compute(name, window)
+        return self._cache[key]
+
+    def _row_arrays(self):
+        # (t, token code, yes, row exists, token names) per row id, computed once for every feature
+        if self._rows is not None:
+            return self._rows
+        prices = self.prices
+        if isinstance(prices, PriceTensor):
+            n_t, n_tokens = len(prices.timestamps), len(prices.tokens)
+            t = np.repeat(np.asarray(prices.timestamps, dtype=np.int64), n_tokens)
+            token = np.tile(np.arange(n_tokens), n_t)
+            cells = np.round(np.asarray(prices.prices, dtype=np.float64), PriceTensor.PRICE_DECIMALS).reshape(-1, 2)
+            yes, exists = cells[:, 0], ~np.isnan(cells).all(axis=1)
+            names = prices.tokens["token"].to_numpy(dtype=object)
+        else:
+            t = prices.index.get_level_values(0).to_numpy(dtype=np.int64)
+            # the index's own token codes, no per-row string is hashed
+            token, names = np.asarray(prices.index.codes[1]), prices.index.levels[1]
+            yes = prices["yes"].to_numpy(dtype=np.float64) if "yes" in prices.columns else np.full(len(t), np.nan)
+            exists = np.ones(len(t), dtype=bool)
+        self._rows = t, token.astype(np.int64), yes, exists, np.asarray(names, dtype=object)
+        return self._rows
+
+    def _token_order(self):
+        # existing rows grouped by token, time order within a token, and the start of every token's run
+        if self._order is None:
+            t, token, _, exists, names = self._row_arrays()
+            rows = np.flatnonzero(exists)
+            if len(rows) < 2 or bool((t[rows][1:] >= t[rows][:-1]).all()):
+                # rows already in time order: one stable sort on the token code, a radix sort for 16 bit codes
+                codes = token[rows].astype(np.uint16) if len(names) <= 1 << 16 else token[rows]
+                order = rows[np.argsort(codes, kind="stable")]
+            else:
+                order = rows[np.lexsort((t[rows], token[rows]))]
+            group_start = np.ones(len(order), dtype=bool)
+            group_start[1:] = token[order][1:] != token[order][:-1]
+            first = np.maximum.accumulate(np.where(group_start, np.arange(len(order)), 0))
+            self._order = order, first
+        return self._order
+
+    def _compute(self, name: str, window: Optional[int]) -> np.ndarray:
+        t, token, yes, exists, names = self._row_arrays()
+        out = np.full(len(t), np.nan)
+        if not exists.any():
+            return out
+        if name in ("time_since_start", "time_to_end", "fraction_elapsed"):
+            return self._time_feature(name, out)
+
+        order, first = self._token_order()
+        values = yes[order]
+        positions = np.arange(len(order))
+        if name == "return":
+            result = np.full(len(order), np.nan)
+            later = positions > first
+            previous = values[positions[later] - 1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                # no return off a zero previous price, it would be +-inf
+                result[later] = np.where(previous != 0, values[later] / previous - 1.0, np.nan)
+        elif name == "volatility":
+            result = _rolling_std(self.feature("return")[order], first, window)
+        else:
+            result = _rolling_extreme(values, first, window, np.fmin if name == "rolling_min" else np.fmax)
+        out[order] = result
+        return out
+
+    def _time_feature(self, name: str, out: np.ndarray) -> np.ndarray:
+        t, token, _, exists, names = self._row_arrays()
+        windows = market_windows(self.prices)
+        start = np.array([np.nan if windows.get(token_name, (None, None))[0] is None else windows[token_name][0]
+                          for token_name in names], dtype=np.float64)
+        end = np.array([np.nan if windows.get(token_name, (None, None))[1] is None else windows[token_name][1]
+                        for token_name in names], dtype=np.float64)
+        # an unknown start is the token's first row
+        order, first = self._token_order()
+        firsts = order[first == np.arange(len(order))]
+        first_t = np.full(len(names), np.nan)
+        first_t[token[firsts]] = t[firsts]
+        start = np.where(np.isnan(start), first_t, start)
+
+        rows = np.flatnonzero(exists)
+        row_t, row_start, row_end = t[rows].astype(np.float64), start[token[rows]], end[token[rows]]
+        if name == "time_since_start":
+            out[rows] = row_t - row_start
+        elif name == "time_to_end":
+            out[rows] = row_end - row_t
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out[rows] = np.where(row_end > row_start, (row_t - row_start) / (row_end - row_start), np.nan)
+        return out
+
+
+def _window_starts(first: np.ndarray, window: int) -> np.ndarray:
+    # first position of every row's window, never reaching back into the previous token
+    return np.maximum(first, np.arange(len(first)) - window + 1)
+
+
+def _rolling_std(values: np.ndarray, first: np.ndarray, window: int) -> np.ndarray:
+    """Sample standard deviation of the last window values per row (NaN skipped, NaN under two values), by cumsums."""
+    # the cumsums run across tokens, a single inf would poison every later window
+    valid = np.isfinite(values)
+    lo = _window_starts(first, window)
+    counts = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(valid, out=counts[1:])
+    n = counts[1:] - counts[lo]
+
+    filled = np.where(valid, values, 0.0)
+    sums = np.zeros(len(values) + 1)
+    np.cumsum(filled, out=sums[1:])
+    total = sums[1:] - sums[lo]
+    np.multiply(filled, filled, out=filled)
+    np.cumsum(filled, out=sums[1:])
+    squares = sums[1:] - sums[lo]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = (squares - total * total / n) / (n - 1)
+    return np.where(n >= 2, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+
+
+def _rolling_extreme(values: np.ndarray, first: np.ndarray, window: int, reduce) -> np.ndarray:
+    """
+    Min (np.fmin) or max (np.fmax) of the last window values per row, NaN skipped.
+    Every token is preceded by window - 1 NaNs so one sliding window view over the whole array never mixes tokens,
+    the reduction runs in chunks to bound the window x rows work array.
+    """
+    n = len(values)
+    starts = np.flatnonzero(first == np.arange(n))
+    pad = window - 1
+    # token k's rows move right by (k + 1) * pad, leaving pad NaNs in front of each token
+    shifted = np.arange(n) + (np.searchsorted(starts, np.arange(n), side="right")) * pad
+    padded = np.full(n + len(starts) * pad, np.nan)
+    padded[shifted] = values
+    views = np.lib.stride_tricks.sliding_window_view(padded, window)
+    out = np.empty(n)
+    chunk = max(1, (1 << 22) // window)
+    for lo in range(0, n, chunk):
+        rows = shifted[lo:lo + chunk] - pad
+        out[lo:lo + chunk] = reduce.reduce(views[rows], axis=1)
+    return out
@@ -0,0 +1,121 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+import numpy as np
+
+from book_evaluator import NO_FEES, FeeModel
+from book_recorder import BookReader
+from components import MarketBatch
+
+
+def walk_ladder(prices: np.ndarray, sizes: np.ndarray, quantity: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fills quantity[i] against ladder i (N x L prices and sizes, best level first), all orders in one pass.
+    Returns (filled, vwap), filled is capped by the ladder's total size and vwap is NaN where nothing filled.
+    """
+    quantity = np.asarray(quantity, dtype=np.float64)
+    before = np.cumsum(sizes, axis=1) - sizes
+    taken = np.clip(quantity[:, None] - before, 0.0, sizes)
+    filled = taken.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cost = np.where(taken > 0, taken * prices, 0.0).sum(axis=1)
+        vwap = np.where(filled > 0, cost / filled, np.nan)
+    return filled, vwap
+
+
+class FillModel(ABC):
+    """
+    How the backtest fills a timestamp's signals, see BacktestEngine(fill_model=...).
+
+    Notes:
+        - fill_batch gets every signal of one timestamp at once: the batch row each one came from, whether it buys,
+          whether it trades the YES side, and its quantity, and returns whole contracts filled, VWAP and $ fees
+        - subclasses implement ladders(), the book each order would walk, and inherit the vectorized walk
+        - fees are FeeModel.per_contract at the fill's VWAP on every contract plus fees.fixed(1) per filled order
+        - every order walks the same book, two orders for the same token at one timestamp do not see each other
+    """
+
+    def __init__(self, fees: FeeModel = NO_FEES):
+        self.fees = fees
+
+    @abstractmethod
+    def ladders(self, batch: MarketBatch, rows: np.ndarray, buy: np.ndarray, yes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(prices, sizes), N x L ladders best level first, for the N orders at batch rows rows."""
+
+    def fill_batch(self, batch: MarketBatch, rows: np.ndarray, buy: np.ndarray, yes: np.ndarray,
+                   quantity: np.ndarray, price: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        prices, sizes = self.ladders(batch, rows, buy, yes)
+        filled, vwap = walk_ladder(prices, sizes, quantity)
+        filled = np.floor(filled + 1e-9).astype(np.int64)
+        return filled, vwap, self._fees(filled, vwap)
+
+    def _fees(self, filled: np.ndarray, vwap: np.ndarray) -> np.ndarray:
+        return np.where(filled > 0, filled * self.fees.per_contract(np.nan_to_num(vwap)) + self.fees.fixed(1), 0.0)
+
+
+class FullFill(FillModel):
+    """Every order fills in full at its signal price, the backtest's original behaviour (plus fees, if any)."""
+
+    def ladders(self, batch, rows, buy, yes):
+        # one unbounded level at the panel price, fill_batch does not need to walk it
+        prices = np.where(yes, batch.yes_price[rows], batch.no_price[rows])[:, None]
+        return prices, np.full(prices.shape, np.inf)
+
+    def fill_batch(self, batch, rows, buy, yes, quantity, price):
+        filled = np.asarray(quantity, dtype=np.int64)
+        vwap = np.asarray(price, dtype=np.float64)
+        return filled, vwap, self._fees(filled, vwap)
+
+
+class SyntheticDepthFill(FillModel):
+    """
+    Depth model derived from the price panel, for when no recorded books cover the backtest.
+
+    The side's panel price is taken as the mid. Buys walk asks from mid + half_spread, sells walk bids from
+    mid - half_spread, levels tick apart. Level k holds depth * decay**k contracts. Prices stay inside (0, 1).
+    """
+
+    def __init__(self, depth: float = 100.0, levels: int = 10, tick: float = 0.01, half_spread: float = 0.005,
+                 decay: float = 1.0, fees: FeeModel = NO_FEES):
+        super().__init__(fees)
+        self.depth = depth
+        self.levels = levels
+        self.tick = tick
+        self.half_spread = half_spread
+        self.decay = decay
+
+    def ladders(self, batch, rows, buy, yes):
+        mid = np.where(yes, batch.yes_price[rows], batch.no_price[rows])
+        direction = np.where(buy, 1.0, -1.0)
+        steps = self.half_spread + self.tick * np.arange(self.levels)
+        prices = mid[:, None] + direction[:, None] * steps[None, :]
+        sizes = np.broadcast_to(self.depth * self.decay ** np.arange(self.levels), prices.shape).copy()
+        # a level outside the price range does not exist
+        sizes[(prices <= 0) | (prices >= 1)] = 0.0
+        return prices, sizes
+
+
+class BookFill(FillModel):
+    """
+    Fills against order books recorded by book_recorder, the latest snapshot of the traded side's token at the
+    batch timestamp. time_scale converts panel time (epoch seconds) to the recording's (epoch ms).
+    Snapshots older than max_age (in recording units) count as an empty book, as does a token never recorded.
+    """
+
+    def __init__(self, reader: BookReader, fees: FeeModel = NO_FEES, time_scale: int = 1000, max_age: Optional[int] = None):
+        super().__init__(fees)
+        self.reader = reader
+        self.time_scale = time_scale
+        self.max_age = max_age
+
+    def ladders(self, batch, rows, buy, yes):
+        tokens = np.where(yes, batch.yes_token[rows], batch.no_token[rows])
+        t = int(batch.timestamp) * self.time_scale
+        books = self.reader.books_at(list(tokens), t)
+        prices = np.where(buy[:, None], books["ask_price"], books["bid_price"])
+        sizes = np.where(buy[:, None], books["ask_size"], books["bid_size"])
+        stale = books["timestamp"] < 0
+        if self.max_age is not None:
+            stale |= books["timestamp"] < t - self.max_age
+        sizes[stale] = 0.0
+        return prices, sizes
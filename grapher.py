@@ -1,12 +1,65 @@
+import os
+import re
+
+from typing import Any, Dict, Optional
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
-def snapshots_to_df(output):
-    snaps = output["snapshots"]
-    if not snaps:
-        raise ValueError("No snapshots to plot (snapshots list is empty).")
+TIMEZONE = "America/Vancouver"
+
+# (title, y label, [(column, legend label)]) for each panel of a rendered figure, top to bottom
+PANELS = [
+    ("Backtest Total Value (Equity Curve)", "Total Value", [("total_value", None)]),
+    ("Cash and Unrealized PnL Over Time", "USD", [("liquid_value", "Cash (LiquidValue)"), ("unrealized_pnl", "Unrealized PnL")]),
+    ("Active Trades Over Time", "# Active Trades", [("num_active_trades", None)]),
+]
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of at most points samples of (x, y) that keep the curve's shape.
 
-    df = pd.DataFrame([{
+    Notes:
+        - x must be increasing, the first and last samples are always kept
+        - the inner samples are split into points - 2 equal buckets, each keeps the sample forming the largest
+          triangle with the previously kept sample and the next bucket's average, so spikes and drawdowns survive
+        - one NumPy pass for the bucket averages and a loop over the buckets (not the samples), cost is O(len(x))
+    """
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        return np.array([0, n - 1])[:max(points, 0)]
+    x = np.asarray(x, dtype=np.float64) - float(x[0])
+    y = np.asarray(y, dtype=np.float64)
+
+    # bucket i covers samples edges[i]:edges[i + 1], every bucket holds at least one sample
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    counts = np.diff(edges)
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    next_x = np.append(((cx[edges[1:]] - cx[edges[:-1]]) / counts)[1:], x[-1])
+    next_y = np.append(((cy[edges[1:]] - cy[edges[:-1]]) / counts)[1:], y[-1])
+
+    keep = np.empty(points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+def snapshots_frame(snaps) -> pd.DataFrame:
+    # a SnapshotBuffer hands over its columns without copying, a plain list of snapshots is still accepted
+    if hasattr(snaps, "to_frame"):
+        return snaps.to_frame()
+    return pd.DataFrame([{
         "timestamp": s.timestamp,
         "liquid_value": s.liquid_value,
         "unrealized_pnl": s.unrealized_pnl,
@@ -14,11 +67,40 @@ def snapshots_to_df(output):
         "num_active_trades": s.num_active_trades
     } for s in snaps])
 
-    df = df.sort_values("timestamp")
-    df["dt"] = pd.to_datetime(df["timestamp"], unit="s", utc=True).dt.tz_convert("America/Vancouver")
-    
+def _sorted_frame(output) -> pd.DataFrame:
+    snaps = output["snapshots"]
+    if not len(snaps):
+        raise ValueError("No snapshots to plot (snapshots list is empty).")
+
+    df = snapshots_frame(snaps)
+
+    # snapshots are recorded in time order, only sort (a copy) when they are not
+    if not df["timestamp"].is_monotonic_increasing:
+        df = df.sort_values("timestamp")
+    return df
+
+def _datetimes(timestamps: np.ndarray):
+    return pd.to_datetime(timestamps, unit="s", utc=True).tz_convert(TIMEZONE).to_pydatetime()
+
+def _downsampled(df: pd.DataFrame, column: str, points: int):
+    # (datetimes, values) of one column, LTTB-reduced to at most points samples
+    t = df["timestamp"].to_numpy()
+    values = df[column].to_numpy(dtype=np.float64)
+    keep = lttb(t, values, points)
+    return _datetimes(t[keep]), values[keep]
+
+def snapshots_to_df(output, path: Optional[str] = None, points: int = 4000):
+    """
+    Plots a backtest's snapshots: three interactive figures, or with path one multi-panel file (see render_snapshots).
+    Every series is LTTB-downsampled to at most points samples first.
+    """
+    if path is not None:
+        return render_snapshots(output, path)
+
+    df = _sorted_frame(output)
+
     plt.figure()
-    plt.plot(df["dt"], df["total_value"])
+    plt.plot(*_downsampled(df, "total_value", points))
     plt.title("Backtest Total Value (Equity Curve)")
     plt.xlabel("Time")
     plt.ylabel("Total Value")
@@ -28,8 +110,8 @@ def snapshots_to_df(output):
 
     # 2) Cash vs unrealized PnL
     plt.figure()
-    plt.plot(df["dt"], df["liquid_value"], label="Cash (LiquidValue)")
-    plt.plot(df["dt"], df["unrealized_pnl"], label="Unrealized PnL")
+    plt.plot(*_downsampled(df, "liquid_value", points), label="Cash (LiquidValue)")
+    plt.plot(*_downsampled(df, "unrealized_pnl", points), label="Unrealized PnL")
     plt.title("Cash and Unrealized PnL Over Time")
     plt.xlabel("Time")
     plt.ylabel("USD")
@@ -40,7 +122,7 @@ def snapshots_to_df(output):
 
     # 3) Active trades count
     plt.figure()
-    plt.plot(df["dt"], df["num_active_trades"])
+    plt.plot(*_downsampled(df, "num_active_trades", points))
     plt.title("Active Trades Over Time")
     plt.xlabel("Time")
     plt.ylabel("# Active Trades")
@@ -48,3 +130,51 @@ def snapshots_to_df(output):
     plt.tight_layout()
     plt.show()
 
+def render_snapshots(output, path: str, width: int = 1600, height: int = 1200, dpi: int = 100,
+                     title: Optional[str] = None, points: Optional[int] = None) -> str:
+    """
+    Renders a backtest's snapshots to one multi-panel image file, without a display.
+
+    Notes:
+        - the figure is drawn on its own Agg canvas, never through pyplot, so it works on headless servers and in
+          worker processes whatever matplotlib backend is configured, and leaves no open figures behind
+        - the format follows path's extension (.png, .svg, .pdf)
+        - every series is LTTB-downsampled to points samples (default the image width in pixels) before plotting,
+          so the render time stays about the same for a thousand or ten million snapshots
+    Returns path
+    """
+    df = _sorted_frame(output)
+    points = points or width
+
+    figure = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    FigureCanvasAgg(figure)
+    axes = figure.subplots(len(PANELS), 1, sharex=True)
+    for ax, (panel_title, ylabel, series) in zip(axes, PANELS):
+        for column, label in series:
+            ax.plot(*_downsampled(df, column, points), label=label, linewidth=1)
+        ax.set_title(panel_title)
+        ax.set_ylabel(ylabel)
+        ax.grid(alpha=0.3)
+        if any(label for _, label in series):
+            ax.legend(loc="upper left")
+    axes[-1].set_xlabel("Time")
+    for tick in axes[-1].get_xticklabels():
+        tick.set_rotation(30)
+    if title:
+        figure.suptitle(title)
+    figure.tight_layout()
+    figure.savefig(path)
+    return path
+
+def render_many(outputs: Dict[str, Any], directory: str, fmt: str = "png", **kwargs) -> Dict[str, str]:
+    """
+    Renders one file per backtest output into directory, e.g. every config of a sweep.
+    outputs maps a label (used as title and, made filename safe, as the file name) to an engine output.
+    Returns {label: path}
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for label, output in outputs.items():
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(label)).strip("_") or "run"
+        paths[label] = render_snapshots(output, os.path.join(directory, f"{name}.{fmt}"), title=str(label), **kwargs)
+    return paths
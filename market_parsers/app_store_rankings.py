@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from typing import List, Dict, Optional, Tuple, Union
 import json
 import re
@@ -33,6 +34,21 @@ def parse_outcome_prices(raw: Union[str, list]) -> Optional[Tuple[float, float]]
     except (ValueError, TypeError):
         return None
 
+def parse_timestamp(raw: Optional[str]) -> Optional[int]:
+    """
+    Takes an ISO date from the gamma API, like '2025-12-19T12:00:00Z' or '2025-12-19'
+    Returns epoch seconds, or None if it is missing or invalid
+    """
+    if not raw:
+        return None
+    try:
+        parsed = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
 def parse_app_rankings(markets):
     bets: List[Dict] = []
 
@@ -57,6 +73,7 @@ def parse_app_rankings(markets):
             "liquidity": market.get("liquidity"),
             "volume": market.get("volume"),
             "active": market.get("active"),
+            "closed": market.get("closed"),
             "volumeNum": market.get("volumeNum"),
             "yesOutcome": yes_outcome_price,
             "noOutcome": no_outcome_price,
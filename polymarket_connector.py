@@ -1,11 +1,17 @@
-import requests
 import json
+import os
+import time
 
-from typing import List, Dict, Optional, Tuple, Union
-from py_clob_client.client import ClobClient
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import List, Dict, Optional
 from market_parsers.app_store_rankings import parse_app_rankings
+from price_cache import EventCache, PriceHistoryCache
 from dataclasses import dataclass
 
+# seconds a request may wait to connect or between bytes of the response, so one stalled server never hangs a build
+REQUEST_TIMEOUT = 30
+
 @dataclass
 class PriceHistoryInterval:
     MAX = "max"
@@ -21,51 +27,181 @@ class MarketPrice:
 
 
 class PolymarketConnector:
-    def __init__(self):
+    def __init__(self, cache: Optional[EventCache] = None, dump_dir: Optional[str] = None, transport=None,
+                 timeout: float = REQUEST_TIMEOUT):
+        # cache is an optional on-disk event metadata cache (price_cache.EventCache), every call hits gamma without it
+        # dump_dir (or the POLYMARKET_DUMP_DIR environment variable) opts in to saving every raw event response
+        # there for debugging, see dump_response
+        # transport (transport.Transport) records or replays every request instead of a plain session
         self.base_url = "https://gamma-api.polymarket.com/events/slug"  # public endpoint to get market data
         self.free_apps = "1-free-app-in-the-us-apple-app-store-on-"     # slug of market, move to constants later
         self.paid_apps = "1-paid-app-in-the-us-apple-app-store-on-"     # slug of market, move to constants later
-    
+        self.cache = cache
+        self.dump_dir = dump_dir if dump_dir is not None else os.environ.get("POLYMARKET_DUMP_DIR")
+        self.session = transport if transport is not None else build_session(pool_size=4)
+        self.timeout = timeout
+
+    def get_event(self, slug: str) -> dict:
+        # raw gamma event (with its "markets"), through the cache when there is one
+        if self.cache is not None:
+            return self.cache.get_event(slug, lambda headers: self._fetch_event(slug, headers))
+        return self._fetch_event(slug, {})[1]
+
+    def _fetch_event(self, slug: str, headers: Dict[str, str]):
+        response = self.session.get(f"{self.base_url}/{slug}", headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return 304, None, response.headers
+        response.raise_for_status()
+        data = response.json()
+        if self.dump_dir:
+            dump_response(self.dump_dir, slug, data)
+        return response.status_code, data, response.headers
+
     def get_app_store_rankings(self, free: bool, date: str):
         # free -> if true is free if false is paid
         if free:
             slug = f"{self.free_apps}{date}"
         else: 
             slug = f"{self.paid_apps}{date}"
-        url = f"{self.base_url}/{slug}"
 
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        data = self.get_event(slug)
 
         print('got data response back')
-        with open('test.json', 'w') as file:
-            json.dump(data, file)
         markets = data.get("markets", [])
         bets = parse_app_rankings(markets)
         return bets
 
 
+def dump_response(directory: str, name: str, data) -> str:
+    """
+    Writes one raw response to directory/<name>.<pid>.<ns>.json, the debugging replacement for test.json.
+    The name is unique per process and call and the file is renamed into place once written, so parallel
+    backtests sharing a directory never read or clobber each other's half-written dumps.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.{os.getpid()}.{time.time_ns()}.json")
+    with open(path + ".tmp", "w") as file:
+        json.dump(data, file)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def _request_errors():
+    # evaluated only once a request raised, so a replayed transport still never imports requests
+    import requests
+
+    return requests.RequestException
+
+
+def build_session(pool_size: int = 10, retries: int = 3, backoff: float = 0.5) -> "requests.Session":
+    """
+    Keep-alive session shared by every request a connector makes.
+    Retries GETs on 429/5xx with exponential backoff, honouring Retry-After when the server sends it.
+    requests is imported here, a backtest over a saved panel never loads it.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 class OrderBook:
-    def __init__(self):
-        self.host = "https://clob.polymarket.com"
+    def __init__(self, host: str = "https://clob.polymarket.com", max_workers: int = 8, retries: int = 3, backoff: float = 0.5, cache: Optional[PriceHistoryCache] = None,
+                 transport=None, timeout: float = REQUEST_TIMEOUT):
+        # host can point at a local stand-in server that serves /prices-history
+        # cache is an optional on-disk price history cache, only missing ranges are fetched through it
+        # transport (transport.Transport) records or replays every request instead of a plain session
+        self.host = host
+        self.cache = cache
         self.chain_id = 137
+        self.max_workers = max_workers
+        self.transport = transport
+        self.session = transport if transport is not None else build_session(pool_size=max_workers, retries=retries, backoff=backoff)
+        self.timeout = timeout
+        self._client = None
+
+    @property
+    def client(self):
+        # py_clob_client is only needed for get_order_book, imported and built on first use
+        if self._client is None:
+            from py_clob_client.client import ClobClient
 
-        self.client = ClobClient(
-            host=self.host,
-            chain_id=self.chain_id
-        )
+            self._client = ClobClient(
+                host=self.host,
+                chain_id=self.chain_id
+            )
+        return self._client
 
     def get_order_book(self, tokenId):
         # tokenId = CLOB (order book) token ID
+        if self.transport is not None and self.transport.mode != "passthrough":
+            # py_clob_client does its own HTTP, recorded and replayed books go through /book instead
+            return book_summary(self.get_book(tokenId))
         orderBook = self.client.get_order_book(tokenId)
         return orderBook
 
+    def get_book(self, token_id: str) -> dict:
+        # raw /book response ({"bids": [{"price", "size"}], "asks": [...]}) over the shared session, safe to call from threads
+        response = self.session.get(f"{self.host}/book", params={"token_id": token_id}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
     def get_historical_prices(self, order_book_params: dict):
        # Fetches the historical prices for the given parameters
+        if self.cache is not None:
+            return self.cache.get_history(order_book_params, self._fetch_historical_prices)
+        return self._fetch_historical_prices(order_book_params)
+
+    def _fetch_historical_prices(self, order_book_params: dict):
         url = f"{self.host}/prices-history"
-        response = requests.get(url, params=order_book_params)
-        return json.loads(response.text)
+        # retries are used up by now, a failed, timed out or garbled request becomes an error dict (no "history"),
+        # which the cache does not record and the panel build skips like an empty history, the rest of a batch
+        # carries on
+        try:
+            response = self.session.get(url, params=order_book_params, timeout=self.timeout)
+        except _request_errors() as error:
+            return {"error": f"{type(error).__name__} for {url}: {error}", "status": None}
+        if response.status_code >= 400:
+            return {"error": f"{response.status_code} for {url}", "status": response.status_code}
+        try:
+            return json.loads(response.text)
+        except ValueError:
+            return {"error": f"non-JSON response for {url}", "status": response.status_code}
+
+    def get_historical_prices_batch(self, params_list: List[dict], max_workers: Optional[int] = None) -> List[dict]:
+        """
+        Fetches every /prices-history request in params_list concurrently, over at most max_workers connections.
+        Results come back in the same order as params_list, whatever order the responses arrive in.
+        """
+        if not params_list:
+            return []
+        workers = min(max_workers or self.max_workers, len(params_list))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self.get_historical_prices, params_list))
+
 
+def book_summary(book: dict) -> SimpleNamespace:
+    # raw /book response -> the py_clob_client OrderBookSummary shape (.bids / .asks of levels with .price / .size)
+    return SimpleNamespace(
+        market=book.get("market"),
+        asset_id=book.get("asset_id"),
+        bids=_summary_levels(book, "bids"),
+        asks=_summary_levels(book, "asks"),
+    )
 
 
+def _summary_levels(book: dict, side: str) -> List[SimpleNamespace]:
+    return [SimpleNamespace(price=level["price"], size=level["size"]) for level in book.get(side, [])]
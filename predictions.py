@@ -0,0 +1,231 @@
+"""
+Command line entry point: python -m predictions <command> --help
+
+    backtest   run one strategy over an app store event (fetched, or a panel saved by `panel`)
+    panel      fetch an event's price panel once and save it as a PriceTensor directory
+    sweep      run a grid of strategy parameters over a saved panel in a process pool
+    ranks      scrape the App Store free and paid charts on a schedule into a RankStore
+
+Importing this module only builds the argument parser, every command imports what it needs when it runs
+(pandas, requests, matplotlib), so `--help` and worker start up stay fast.
+"""
+import argparse
+import json
+import sys
+
+from typing import Any, Dict, List, Optional
+
+
+def _value(text: str) -> Any:
+    # command line parameter values are JSON when they parse as JSON (10, 0.98, true), plain strings otherwise
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _params_text(pairs: List[str]) -> Dict[str, str]:
+    params = {}
+    for pair in pairs:
+        name, separator, value = pair.partition("=")
+        if not separator:
+            raise SystemExit(f"expected name=value, got {pair!r}")
+        params[name] = value
+    return params
+
+
+def _params(pairs: List[str]) -> Dict[str, Any]:
+    return {name: _value(value) for name, value in _params_text(pairs).items()}
+
+
+def _grid(pairs: List[str]) -> Dict[str, List[Any]]:
+    # name=v1,v2,v3 -> {name: [v1, v2, v3]}
+    return {name: [_value(item) for item in values.split(",")] for name, values in _params_text(pairs).items()}
+
+
+def _add_event_arguments(parser: argparse.ArgumentParser, date_required: bool = True):
+    parser.add_argument("--date", required=date_required, help="event date slug, e.g. december-19")
+    side = parser.add_mutually_exclusive_group()
+    side.add_argument("--free", dest="free", action="store_true", default=True, help="free apps event (default)")
+    side.add_argument("--paid", dest="free", action="store_false", help="paid apps event")
+    parser.add_argument("--start", type=int, help="start timestamp (seconds), the market's full history when left out")
+    parser.add_argument("--end", type=int, help="end timestamp (seconds)")
+    parser.add_argument("--interval", help="price history interval (1m, 1h, 6h, 1d, 1w, max)")
+    parser.add_argument("--no-ffill", dest="ffill", action="store_false", help="leave missing prices as NaN")
+    parser.add_argument("--cache", help="sqlite cache path for price histories, event metadata goes to <cache>.events "
+                                        "(see price_cache)")
+    parser.add_argument("--event-ttl", type=float, default=300.0, help="seconds cached event metadata stays fresh")
+    parser.add_argument("--dump-dir", help="save every raw gamma event response here, for debugging")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent history downloads")
+    parser.add_argument("--ranks", help="RankStore directory or t,name,rank CSV to join as the real_rank column")
+    parser.add_argument("--rank-tolerance", type=int, help="ignore ranks older than this many seconds")
+    parser.add_argument("--implied", action="store_true",
+                        help="add implied_prob, implied_rank and overround across the event's outcomes")
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument("--record", metavar="ARCHIVE", help="also write every raw response to this archive")
+    archive.add_argument("--replay", metavar="ARCHIVE", help="answer every request from this archive, no network")
+
+
+def _transport(args):
+    # one transport shared by every connector of a command, None for a plain live session
+    if not (args.record or args.replay):
+        return None
+    if getattr(args, "transport", None) is None:
+        from transport import RECORD, REPLAY, Transport
+
+        args.transport = Transport(RECORD if args.record else REPLAY, args.record or args.replay, pool_size=args.workers)
+    return args.transport
+
+
+def _order_book(args):
+    from polymarket_connector import OrderBook
+    from price_cache import PriceHistoryCache
+
+    cache = PriceHistoryCache(args.cache) if args.cache else None
+    return OrderBook(max_workers=args.workers, cache=cache, transport=_transport(args))
+
+
+def _connector(args):
+    from polymarket_connector import PolymarketConnector
+    from price_cache import EventCache
+
+    # its own file, so event rows never count against (or trigger eviction in) the price cache's byte budget
+    cache = EventCache(f"{args.cache}.events", ttl=args.event_ttl) if args.cache else None
+    return PolymarketConnector(cache=cache, dump_dir=args.dump_dir, transport=_transport(args))
+
+
+def cmd_backtest(args) -> int:
+    from backtestEngine import BacktestEngine
+    from profiling import Profiler
+    from sweep import build_strategy
+
+    strategy = build_strategy({"strategy": args.strategy, **_params(args.param)})
+    profiler = Profiler() if args.profile else None
+    engine = BacktestEngine(initial_capital=args.capital, profiler=profiler, snapshot_spill=args.spill)
+    if args.panel:
+        from price_panel import PriceTensor
+
+        output = engine.run_panel(PriceTensor.load(args.panel), strategy)
+    else:
+        if args.date is None:
+            raise SystemExit("backtest needs --date, or --panel for a saved panel")
+        engine.order_book = _order_book(args)
+        engine.connector = _connector(args)
+        output = engine.run(start_ts=args.start, end_ts=args.end, interval=args.interval, strategy=strategy,
+                            date=args.date, ffill=args.ffill, free=args.free, ranks=args.ranks,
+                            rank_tolerance=args.rank_tolerance, implied=args.implied)
+
+    output["ledger"].viewLedger()
+    if args.snapshots:
+        output["snapshots"].to_csv(args.snapshots)
+        print(f"wrote {args.snapshots}")
+    if profiler is not None:
+        profiler.print_report()
+    if len(output["snapshots"]) and (args.plot or args.show):
+        from grapher import render_snapshots, snapshots_to_df
+
+        if args.plot:
+            print(f"wrote {render_snapshots(output, args.plot, title=f'{args.strategy} {args.date or args.panel}')}")
+        if args.show:
+            snapshots_to_df(output)
+    return 0
+
+
+def cmd_panel(args) -> int:
+    from sweep import build_panel
+
+    build_panel(args.output, date=args.date, free=args.free, ffill=args.ffill, interval=args.interval,
+                start_ts=args.start, end_ts=args.end, order_book=_order_book(args),
+                connector=_connector(args), ranks=args.ranks, rank_tolerance=args.rank_tolerance, implied=args.implied)
+    print(f"wrote {args.output}")
+    return 0
+
+
+def cmd_sweep(args) -> int:
+    from sweep import grid, run_sweep
+
+    configs = grid(args.strategy, **_grid(args.grid))
+    results = run_sweep(configs, args.panel, initial_capital=args.capital, processes=args.processes,
+                        render_dir=args.render_dir)
+    print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"wrote {args.output}")
+    return 0
+
+
+def cmd_ranks(args) -> int:
+    import asyncio
+
+    from rank_collector import RankCollector, RankStore
+
+    store = RankStore(args.store)
+    collector = RankCollector(store, charts=args.charts, interval=args.interval, transport=_transport(args))
+    try:
+        asyncio.run(collector.run(rounds=args.rounds))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+    print(collector.stats())
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m predictions", description="Polymarket app store backtests.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backtest = commands.add_parser("backtest", help="run one strategy over an event")
+    # with --panel nothing is fetched and the event arguments are not needed
+    _add_event_arguments(backtest, date_required=False)
+    backtest.set_defaults(handler=cmd_backtest)
+    backtest.add_argument("--panel", help="saved PriceTensor directory to run over instead of fetching")
+    backtest.add_argument("--strategy", default="rando", help="strategy name (see sweep.STRATEGIES)")
+    backtest.add_argument("--param", nargs="*", default=[], metavar="NAME=VALUE", help="strategy keyword arguments")
+    backtest.add_argument("--capital", type=float, default=100000)
+    backtest.add_argument("--profile", action="store_true", help="print per-phase timings")
+    backtest.add_argument("--spill", help="directory to spill snapshots to on very long runs")
+    backtest.add_argument("--snapshots", help="write the snapshots to this CSV")
+    backtest.add_argument("--plot", help="render the equity curves to this image (.png/.svg), no display needed")
+    backtest.add_argument("--show", action="store_true", help="show the interactive figures")
+
+    panel = commands.add_parser("panel", help="fetch and save an event's price panel")
+    _add_event_arguments(panel)
+    panel.add_argument("--output", required=True, help="directory to save the PriceTensor to")
+    panel.set_defaults(handler=cmd_panel)
+
+    sweep = commands.add_parser("sweep", help="run a parameter grid over a saved panel")
+    sweep.add_argument("--panel", required=True, help="saved PriceTensor directory (see the panel command)")
+    sweep.add_argument("--strategy", default="rando")
+    sweep.add_argument("--grid", nargs="*", default=[], metavar="NAME=V1,V2", help="parameter values to combine")
+    sweep.add_argument("--capital", type=float, default=100000)
+    sweep.add_argument("--processes", type=int)
+    sweep.add_argument("--output", help="write the results table to this CSV")
+    sweep.add_argument("--render-dir", help="render every config's equity curves into this directory")
+    sweep.set_defaults(handler=cmd_sweep)
+
+    ranks = commands.add_parser("ranks", help="collect App Store chart ranks into a RankStore")
+    ranks.add_argument("--store", required=True, help="RankStore directory to append to")
+    ranks.add_argument("--charts", nargs="+", choices=["free", "paid"], default=["free", "paid"])
+    ranks.add_argument("--interval", type=float, default=60.0, help="seconds between scrapes, on the clock")
+    ranks.add_argument("--rounds", type=int, help="stop after this many rounds, runs until interrupted otherwise")
+    ranks.add_argument("--workers", type=int, default=2)
+    archive = ranks.add_mutually_exclusive_group()
+    archive.add_argument("--record", metavar="ARCHIVE", help="also write every chart page to this archive")
+    archive.add_argument("--replay", metavar="ARCHIVE", help="answer every request from this archive, no network")
+    ranks.set_defaults(handler=cmd_ranks)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    finally:
+        # a recording is only indexed for fast replay once it is closed
+        if getattr(args, "transport", None) is not None:
+            args.transport.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
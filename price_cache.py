@@ -0,0 +1,387 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_MIN_TS = 0
+_MAX_TS = 2**62
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    token TEXT NOT NULL,
+    ikey  TEXT NOT NULL,
+    t     INTEGER NOT NULL,
+    p     REAL NOT NULL,
+    PRIMARY KEY (token, ikey, t)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ranges (
+    token   TEXT NOT NULL,
+    ikey    TEXT NOT NULL,
+    start   INTEGER NOT NULL,
+    end     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ranges_key ON ranges (token, ikey);
+CREATE TABLE IF NOT EXISTS markets (
+    token       TEXT NOT NULL,
+    ikey        TEXT NOT NULL,
+    complete    INTEGER NOT NULL DEFAULT 0,
+    last_access REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (token, ikey)
+);
+CREATE TABLE IF NOT EXISTS settled (
+    token      TEXT PRIMARY KEY,
+    settled_ts INTEGER NOT NULL
+);
+"""
+
+
+_EVENT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    slug          TEXT PRIMARY KEY,
+    body          TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    fetched_at    REAL NOT NULL,
+    closed        INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def interval_key(params: Dict[str, Any]) -> str:
+    """Cache key for everything in a /prices-history request except the token and time range."""
+    interval = params.get("interval") or ""
+    fidelity = params.get("fidelity")
+    return f"{interval}:{fidelity}" if fidelity is not None else interval
+
+
+def missing_ranges(covered: List[Tuple[int, int]], start: int, end: int) -> List[Tuple[int, int]]:
+    """Inclusive [start, end] sub-ranges not covered by the (sorted, merged) covered ranges."""
+    gaps = []
+    cursor = start
+    for lo, hi in covered:
+        if hi < cursor:
+            continue
+        if lo > end:
+            break
+        if lo > cursor:
+            gaps.append((cursor, lo - 1))
+        cursor = max(cursor, hi + 1)
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+class PriceHistoryCache:
+    """
+    On-disk cache for /prices-history, keyed by token and interval.
+
+    Notes:
+        - requests with startTs and endTs only fetch the sub-ranges that have not been seen before
+        - requests without a range are refetched unless the market is settled, then they are served once stored
+        - settled markets (mark_immutable) are never fetched past their settle time
+        - for a market that has not settled, a fetched range is only recorded up to safety_lag seconds before now,
+          the recent (or future) part of a range keeps being refetched until the market settles
+        - when the database grows past max_bytes, the least recently used token/interval keys are evicted
+        - hits counts requests answered without a fetch, misses counts requests that needed one
+    """
+
+    def __init__(self, path: str = ".price_cache/prices.sqlite", max_bytes: int = 512 * 1024 * 1024,
+                 safety_lag: int = 300):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.safety_lag = safety_lag
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        # one connection shared by the fetch threads, every use goes through self._lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+            "evictions": self.evictions,
+            "bytes": self.size_bytes(),
+        }
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._size_bytes()
+
+    def mark_immutable(self, token: str, settled_ts: Optional[int] = None):
+        """
+        Marks a settled market, nothing after settled_ts (default: now) is ever fetched for it again.
+        The first settle time recorded for a token is kept.
+        """
+        settled_ts = int(time.time()) if settled_ts is None else int(settled_ts)
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO settled (token, settled_ts) VALUES (?, ?)", (token, settled_ts))
+            self._conn.commit()
+
+    def is_immutable(self, token: str) -> bool:
+        with self._lock:
+            return self._settled_ts(token) is not None
+
+    def get_history(self, params: Dict[str, Any], fetch: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Answers a /prices-history request from the cache, calling fetch(params) only for what is missing.
+        Returns the same {"history": [{"t": ..., "p": ...}]} shape as the endpoint. When a missing range fails to
+        fetch, the points the cache holds for the request still come back, with the fetch's error and status next to
+        them; the error alone comes back only when there are none.
+        """
+        token = params["market"]
+        ikey = interval_key(params)
+        start, end = params.get("startTs"), params.get("endTs")
+
+        if start is None or end is None:
+            return self._get_open_ended(token, ikey, params, fetch)
+
+        start, end = int(start), int(end)
+        with self._lock:
+            settled_ts = self._settled_ts(token)
+            fetch_end = min(end, settled_ts) if settled_ts is not None else end
+            gaps = missing_ranges(self._covered(token, ikey), start, fetch_end) if start <= fetch_end else []
+            if not gaps:
+                self.hits += 1
+                history = self._read(token, ikey, start, end)
+                self._touch(token, ikey)
+                self._conn.commit()
+                return {"history": history}
+            self.misses += 1
+
+        # network calls happen outside the lock so other threads keep reading
+        fetched = []
+        error = None
+        for lo, hi in gaps:
+            response = fetch({**params, "startTs": lo, "endTs": hi})
+            if "history" not in response:
+                # an error body, keep what was fetched so far but do not record this range
+                error = response
+                break
+            fetched.append((lo, hi, response["history"]))
+
+        with self._lock:
+            self.fetches += len(fetched) + (error is not None)
+            # an open market can still get points near now (or after it), only the settled past is final
+            settled_ts = self._settled_ts(token)
+            final = settled_ts if settled_ts is not None else int(time.time()) - self.safety_lag
+            for lo, hi, history in fetched:
+                self._write(token, ikey, history)
+                if lo <= min(hi, final):
+                    self._add_range(token, ikey, lo, min(hi, final))
+            self._touch(token, ikey)
+            self._conn.commit()
+            history = self._read(token, ikey, start, end)
+            self._evict()
+        if error is not None:
+            # the failed range stays missing and is fetched again next time
+            return {**error, "history": history} if history else error
+        return {"history": history}
+
+    def _get_open_ended(self, token: str, ikey: str, params: Dict[str, Any], fetch: Callable) -> Dict[str, Any]:
+        with self._lock:
+            settled = self._settled_ts(token) is not None
+            row = self._conn.execute(
+                "SELECT complete FROM markets WHERE token = ? AND ikey = ?", (token, ikey)
+            ).fetchone()
+            if settled and row and row[0]:
+                self.hits += 1
+                history = self._read(token, ikey, _MIN_TS, _MAX_TS)
+                self._touch(token, ikey)
+                self._conn.commit()
+                return {"history": history}
+            self.misses += 1
+
+        response = fetch(params)
+        with self._lock:
+            self.fetches += 1
+            if "history" not in response:
+                return response
+            self._write(token, ikey, response["history"])
+            self._touch(token, ikey)
+            if settled:
+                self._conn.execute("UPDATE markets SET complete = 1 WHERE token = ? AND ikey = ?", (token, ikey))
+            self._conn.commit()
+            self._evict()
+        return response
+
+    # everything below expects self._lock to be held
+
+    def _settled_ts(self, token: str) -> Optional[int]:
+        row = self._conn.execute("SELECT settled_ts FROM settled WHERE token = ?", (token,)).fetchone()
+        return row[0] if row else None
+
+    def _covered(self, token: str, ikey: str) -> List[Tuple[int, int]]:
+        rows = self._conn.execute(
+            "SELECT start, end FROM ranges WHERE token = ? AND ikey = ? ORDER BY start", (token, ikey)
+        ).fetchall()
+        return [(lo, hi) for lo, hi in rows]
+
+    def _add_range(self, token: str, ikey: str, start: int, end: int):
+        merged = merge_ranges(self._covered(token, ikey) + [(start, end)])
+        self._conn.execute("DELETE FROM ranges WHERE token = ? AND ikey = ?", (token, ikey))
+        self._conn.executemany(
+            "INSERT INTO ranges (token, ikey, start, end) VALUES (?, ?, ?, ?)",
+            [(token, ikey, lo, hi) for lo, hi in merged],
+        )
+
+    def _read(self, token: str, ikey: str, start: int, end: int) -> List[Dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT t, p FROM points WHERE token = ? AND ikey = ? AND t BETWEEN ? AND ? ORDER BY t",
+            (token, ikey, start, end),
+        )
+        return [{"t": t, "p": p} for t, p in rows]
+
+    def _write(self, token: str, ikey: str, history: List[Dict[str, Any]]):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO points (token, ikey, t, p) VALUES (?, ?, ?, ?)",
+            [(token, ikey, int(record["t"]), float(record["p"])) for record in history],
+        )
+
+    def _touch(self, token: str, ikey: str):
+        self._conn.execute(
+            "INSERT INTO markets (token, ikey, last_access) VALUES (?, ?, ?) "
+            "ON CONFLICT (token, ikey) DO UPDATE SET last_access = excluded.last_access",
+            (token, ikey, time.time()),
+        )
+
+    def _size_bytes(self) -> int:
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def _evict(self):
+        if self._size_bytes() <= self.max_bytes:
+            return
+        # least recently used keys go first, the one just written is last in line
+        keys = self._conn.execute("SELECT token, ikey FROM markets ORDER BY last_access").fetchall()
+        for token, ikey in keys[:-1]:
+            for table in ("points", "ranges", "markets"):
+                self._conn.execute(f"DELETE FROM {table} WHERE token = ? AND ikey = ?", (token, ikey))
+            self.evictions += 1
+            self._conn.commit()
+            if self._size_bytes() <= self.max_bytes:
+                break
+        self._conn.execute("PRAGMA incremental_vacuum")
+        self._conn.commit()
+
+
+def event_closed(event: Dict[str, Any]) -> bool:
+    """A gamma event is final once it is closed, or every one of its markets is."""
+    markets = event.get("markets") or []
+    return bool(event.get("closed")) or (bool(markets) and all(market.get("closed") for market in markets))
+
+
+class EventCache:
+    """
+    On-disk TTL cache for gamma event metadata (/events/slug responses), keyed by slug.
+
+    Notes:
+        - an entry younger than ttl seconds is served without a request
+        - a stale entry is revalidated with If-None-Match / If-Modified-Since when the server sent an ETag /
+          Last-Modified, a 304 keeps the stored body and restarts its ttl
+        - closed events (see event_closed) never expire
+        - shared by threads through one lock, and by processes through sqlite (WAL, busy timeout), so parallel
+          backtests can point at the same file
+        - hits counts events served without a request, revalidated counts 304s, misses counts full downloads
+    """
+
+    def __init__(self, path: str = ".price_cache/events.sqlite", ttl: float = 300.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_EVENT_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses}
+
+    def invalidate(self, slug: Optional[str] = None):
+        """Drops one slug, or every entry."""
+        with self._lock:
+            if slug is None:
+                self._conn.execute("DELETE FROM events")
+            else:
+                self._conn.execute("DELETE FROM events WHERE slug = ?", (slug,))
+            self._conn.commit()
+
+    def get_event(self, slug: str, fetch: Callable[[Dict[str, str]], Tuple[int, Optional[Dict[str, Any]], Any]]) -> Dict[str, Any]:
+        """
+        Answers an event request from the cache, calling fetch(request_headers) -> (status, body, response_headers)
+        only when the entry is missing or stale. body is None on a 304.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at, closed FROM events WHERE slug = ?", (slug,)
+            ).fetchone()
+        headers: Dict[str, str] = {}
+        if row is not None:
+            body, etag, last_modified, fetched_at, closed = row
+            if closed or time.time() - fetched_at < self.ttl:
+                self.hits += 1
+                return json.loads(body)
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        # the request happens outside the lock so other threads keep reading
+        status, event, response_headers = fetch(headers)
+        with self._lock:
+            if status == 304 and row is not None:
+                self.revalidated += 1
+                self._conn.execute("UPDATE events SET fetched_at = ? WHERE slug = ?", (time.time(), slug))
+                self._conn.commit()
+                return json.loads(row[0])
+            self.misses += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO events (slug, body, etag, last_modified, fetched_at, closed) VALUES (?, ?, ?, ?, ?, ?)",
+                (slug, json.dumps(event), response_headers.get("ETag"), response_headers.get("Last-Modified"),
+                 time.time(), int(event_closed(event))),
+            )
+            self._conn.commit()
+        return event
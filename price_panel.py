@@ -0,0 +1,306 @@
+import json
+import os
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# pivoted side columns come first (alphabetical, as pivot_table leaves them), then the market metadata
+SIDES = ("no", "yes")
+META_COLUMNS = ("ticker", "yes_token", "no_token")
+# cross-sectional columns add_implied_columns derives from the yes prices of every outcome at a timestamp
+IMPLIED_COLUMNS = ("implied_prob", "implied_rank", "overround")
+# optional per-row float columns added to the panel (rank_join, add_implied_columns), carried through PriceTensor
+# into MarketBatch / MarketState fields of the same name when the panel has them
+VALUE_COLUMNS = ("real_rank",) + IMPLIED_COLUMNS
+# start_ts / end_ts columns of a PriceTensor's token table, from panel.attrs["windows"]
+WINDOW_COLUMNS = ("start_ts", "end_ts")
+_PRICE_TICKS = 10 ** 9
+_UNPRICED = (1 << 31) - 1
+
+
+def empty_panel() -> pd.DataFrame:
+    empty = pd.DataFrame(columns=["yes", "no", "ticker", "yes_token", "no_token"])
+    empty.index = pd.MultiIndex.from_arrays([[], []], names=["t", "token"])
+    return empty
+
+
+def history_arrays(history: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(t, p) typed arrays straight from a /prices-history "history" list."""
+    n = len(history)
+    t = np.fromiter((int(record["t"]) for record in history), dtype=np.int64, count=n)
+    p = np.fromiter((float(record["p"]) for record in history), dtype=np.float64, count=n)
+    return t, p
+
+
+def assemble_price_panel(markets: Sequence[Tuple[str, str, str]], histories: Sequence[Dict[str, Any]], ffill: bool) -> pd.DataFrame:
+    """
+    Builds the (t, token) price panel from raw /prices-history responses.
+
+    markets is a list of (ticker, yes_token, no_token), histories holds the yes then no response for each market,
+    in the same order. The yes token is the panel's token key. Duplicate points for the same (t, token, side) keep
+    the last one seen, and ffill forward fills each token's prices with its last seen price.
+    """
+    tokens = sorted({yes_token for _, yes_token, _ in markets})
+    token_codes = {token: code for code, token in enumerate(tokens)}
+
+    # metadata per token, the last market listed for a token wins
+    meta = {column: np.empty(len(tokens), dtype=object) for column in META_COLUMNS}
+    t_parts, p_parts, token_parts, side_parts = [], [], [], []
+    for i, (ticker, yes_token, no_token) in enumerate(markets):
+        code = token_codes[yes_token]
+        meta["ticker"][code], meta["yes_token"][code], meta["no_token"][code] = ticker, yes_token, no_token
+        for side, response in ((1, histories[2 * i]), (0, histories[2 * i + 1])):
+            t, p = history_arrays(response.get("history", []))  # to prevent empty response crash
+            t_parts.append(t)
+            p_parts.append(p)
+            token_parts.append(np.full(len(t), code, dtype=np.int64))
+            side_parts.append(np.full(len(t), side, dtype=np.int8))
+
+    if not t_parts or not sum(len(t) for t in t_parts):
+        return empty_panel()
+
+    t = np.concatenate(t_parts)
+    p = np.concatenate(p_parts)
+    token = np.concatenate(token_parts)
+    side = np.concatenate(side_parts)
+
+    # sort by (t, token, side), stable so the last duplicate in input order ends up last in its run
+    order = np.lexsort((side, token, t))
+    t, p, token, side = t[order], p[order], token[order], side[order]
+    last = np.ones(len(t), dtype=bool)
+    last[:-1] = (t[1:] != t[:-1]) | (token[1:] != token[:-1]) | (side[1:] != side[:-1])
+    t, p, token, side = t[last], p[last], token[last], side[last]
+
+    # one panel row per (t, token), yes and no scattered into it
+    new_row = np.ones(len(t), dtype=bool)
+    new_row[1:] = (t[1:] != t[:-1]) | (token[1:] != token[:-1])
+    row_of = np.cumsum(new_row) - 1
+    row_t, row_token = t[new_row], token[new_row]
+
+    columns: Dict[str, np.ndarray] = {}
+    for code, name in enumerate(SIDES):
+        is_side = side == code
+        if not is_side.any():
+            continue
+        values = np.full(len(row_t), np.nan)
+        values[row_of[is_side]] = p[is_side]
+        columns[name] = values
+
+    if ffill:
+        grouped_ffill(row_token, columns.values())
+
+    out = pd.DataFrame(
+        columns,
+        index=pd.MultiIndex.from_arrays([row_t, np.asarray(tokens, dtype=object)[row_token]], names=["t", "token"]),
+    )
+    for column in META_COLUMNS:
+        out[column] = meta[column][row_token]
+    return out
+
+
+def implied_columns(t: np.ndarray, yes: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    IMPLIED_COLUMNS for rows (t, yes price), every row with the same t being one outcome of the event.
+
+    Notes:
+        - implied_prob is yes renormalized over the outcomes priced at t, so it sums to 1 across them
+        - implied_rank is the outcome's place by yes price at t (1 = favourite), tied prices share the best place
+        - overround is the sum of the yes prices at t minus 1, the same on every row of a timestamp
+        - rows with a NaN yes price get NaN and are left out of their timestamp's sum and ranking
+        - one sort for the whole panel, no per-timestamp loop
+    """
+    n = len(t)
+    if not n:
+        return {column: np.zeros(0) for column in IMPLIED_COLUMNS}
+    if bool((t[1:] >= t[:-1]).all()):
+        new_t = np.ones(n, dtype=bool)
+        new_t[1:] = t[1:] != t[:-1]
+        codes = np.cumsum(new_t) - 1
+    else:
+        codes = np.unique(t, return_inverse=True)[1]
+    priced = ~np.isnan(yes)
+
+    total = np.bincount(codes, weights=np.where(priced, yes, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        implied_prob = np.where(priced, yes / total[codes], np.nan)
+    overround = np.where(np.bincount(codes, weights=priced)[codes] > 0, total[codes] - 1.0, np.nan)
+
+    # one int64 key orders rows by timestamp then yes price, highest first, unpriced rows last: the price as
+    # 1e-9 ticks below 1 in the low 31 bits (float noise below a tick never splits a tie)
+    ticks = np.where(priced, _PRICE_TICKS - np.round(np.clip(np.nan_to_num(yes), 0.0, 1.0) * _PRICE_TICKS), _UNPRICED)
+    key = (codes.astype(np.int64) << 31) | ticks.astype(np.int64)
+    order = np.argsort(key)
+    sorted_key = key[order]
+    positions = np.arange(n)
+    group_start = np.ones(n, dtype=bool)
+    group_start[1:] = (sorted_key[1:] >> 31) != (sorted_key[:-1] >> 31)
+    new_price = group_start.copy()
+    new_price[1:] |= sorted_key[1:] != sorted_key[:-1]
+    first_of_group = np.maximum.accumulate(np.where(group_start, positions, 0))
+    first_of_price = np.maximum.accumulate(np.where(new_price, positions, 0))
+    implied_rank = np.empty(n)
+    implied_rank[order] = first_of_price - first_of_group + 1
+    implied_rank[~priced] = np.nan
+
+    return {"implied_prob": implied_prob, "implied_rank": implied_rank, "overround": overround}
+
+
+def add_implied_columns(panel: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds implied_prob, implied_rank and overround (see implied_columns) to the (t, token) panel in place, all of
+    the panel's tokens being the outcomes of one event. Computed on a forward filled panel every outcome takes part
+    at every timestamp after its first price, without ffill only the outcomes that printed at t do.
+    """
+    t = panel.index.get_level_values(0).to_numpy(dtype=np.int64)
+    yes = panel["yes"].to_numpy(dtype=np.float64) if "yes" in panel.columns else np.full(len(panel), np.nan)
+    for column, values in implied_columns(t, yes).items():
+        panel[column] = values
+    return panel
+
+
+def _epoch(value) -> Optional[int]:
+    # None / NaN (a JSON round trip turns a missing int into either) is unknown
+    if value is None or value != value:
+        return None
+    return int(value)
+
+
+def market_windows(prices) -> Dict[str, Tuple[Optional[int], Optional[int]]]:
+    """
+    token -> (start, end) epoch seconds of its market (startDate / endDate, None when unknown), as build_price_panel
+    records them in panel.attrs["windows"] and PriceTensor keeps them in its token table. Empty when not recorded.
+    """
+    if isinstance(prices, PriceTensor):
+        if not all(column in prices.tokens.columns for column in WINDOW_COLUMNS):
+            return {}
+        return {token: (_epoch(start), _epoch(end)) for token, start, end in
+                zip(prices.tokens["token"], prices.tokens["start_ts"], prices.tokens["end_ts"])}
+    return {token: (_epoch(start), _epoch(end)) for token, (start, end) in prices.attrs.get("windows", {}).items()}
+
+
+def grouped_ffill(group: np.ndarray, columns) -> None:
+    """
+    Forward fills each float column in place, never carrying a value across groups.
+    Rows must already be in time order within each group.
+    """
+    n = len(group)
+    order = np.argsort(group, kind="stable")
+    grouped = group[order]
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = grouped[1:] != grouped[:-1]
+    group_start = np.maximum.accumulate(np.where(starts, np.arange(n), 0))
+
+    for values in columns:
+        ordered = values[order]
+        last_seen = np.maximum.accumulate(np.where(np.isnan(ordered), -1, np.arange(n)))
+        filled = last_seen >= group_start
+        values[order] = np.where(filled, ordered[np.maximum(last_seen, 0)], np.nan)
+
+
+class PriceTensor:
+    """
+    Dense alternative to the (t, token) panel: prices[i, j] is (yes, no) for token j at timestamps[i].
+
+    Notes:
+        - timestamps is sorted ascending, prices is a T x N x 2 float32 array with NaN where a token has no row
+        - tokens is the N-row lookup table (token, ticker, yes_token, no_token, and start_ts / end_ts when the panel
+          recorded its market windows), in the panel's token order
+        - values holds a T x N float32 array per VALUE_COLUMNS column the panel had (real_rank, implied_prob, ...)
+        - save() writes a directory of prices.npy + timestamps.npy + <value>.npy + meta.json, load() memory maps the
+          arrays so several processes can share one on-disk panel
+        - float32 cannot hold tick prices exactly, prices_at() rounds back to PRICE_DECIMALS when reading
+    """
+
+    PRICE_DECIMALS = 6
+
+    def __init__(self, timestamps: np.ndarray, prices: np.ndarray, tokens: pd.DataFrame,
+                 values: Optional[Dict[str, np.ndarray]] = None):
+        self.timestamps = timestamps
+        self.prices = prices
+        self.tokens = tokens.reset_index(drop=True)
+        self.values = values or {}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.timestamps) == 0 or len(self.tokens) == 0
+
+    @classmethod
+    def from_panel(cls, panel: pd.DataFrame) -> "PriceTensor":
+        t = panel.index.get_level_values(0).to_numpy(dtype=np.int64)
+        token = panel.index.get_level_values(1).to_numpy(dtype=object)
+        timestamps, t_index = np.unique(t, return_inverse=True)
+        token_index, token_values = pd.factorize(token, sort=True)
+
+        prices = np.full((len(timestamps), len(token_values), 2), np.nan, dtype=np.float32)
+        for k, side in enumerate(("yes", "no")):
+            if side in panel.columns:
+                prices[t_index, token_index, k] = panel[side].to_numpy(dtype=np.float64)
+        values = {}
+        for column in VALUE_COLUMNS:
+            if column in panel.columns:
+                values[column] = np.full((len(timestamps), len(token_values)), np.nan, dtype=np.float32)
+                values[column][t_index, token_index] = panel[column].to_numpy(dtype=np.float64)
+
+        # first row seen for each token carries its metadata
+        first = np.unique(token_index, return_index=True)[1]
+        tokens = pd.DataFrame({"token": np.asarray(token_values, dtype=object)})
+        for column in META_COLUMNS:
+            tokens[column] = panel[column].to_numpy(dtype=object)[first] if column in panel.columns else None
+        windows = market_windows(panel)
+        if windows:
+            for k, column in enumerate(WINDOW_COLUMNS):
+                tokens[column] = [windows.get(token, (None, None))[k] for token in tokens["token"]]
+        return cls(timestamps, prices, tokens, values)
+
+    def prices_at(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """float64 (yes, no) across every token at timestamps[i]."""
+        row = np.round(self.prices[i].astype(np.float64), self.PRICE_DECIMALS)
+        return row[:, 0], row[:, 1]
+
+    def to_panel(self) -> pd.DataFrame:
+        """Back to the (t, token) MultiIndex panel, only cells with at least one price become rows."""
+        if self.empty:
+            return empty_panel()
+        prices = np.round(np.asarray(self.prices, dtype=np.float64), self.PRICE_DECIMALS)
+        t_index, token_index = np.nonzero(~np.isnan(prices).all(axis=2))
+        token = self.tokens["token"].to_numpy(dtype=object)
+        out = pd.DataFrame(
+            {"no": prices[t_index, token_index, 1], "yes": prices[t_index, token_index, 0]},
+            index=pd.MultiIndex.from_arrays([self.timestamps[t_index], token[token_index]], names=["t", "token"]),
+        )
+        for column in META_COLUMNS:
+            out[column] = self.tokens[column].to_numpy(dtype=object)[token_index]
+        for column, values in self.values.items():
+            out[column] = np.asarray(values[t_index, token_index], dtype=np.float64)
+        windows = market_windows(self)
+        if windows:
+            out.attrs["windows"] = windows
+        return out
+
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "prices.npy"), np.ascontiguousarray(self.prices, dtype=np.float32))
+        np.save(os.path.join(path, "timestamps.npy"), np.asarray(self.timestamps, dtype=np.int64))
+        for column, values in self.values.items():
+            np.save(os.path.join(path, f"{column}.npy"), np.ascontiguousarray(values, dtype=np.float32))
+        meta = {
+            "shape": list(self.prices.shape),
+            "values": list(self.values),
+            "tokens": self.tokens.astype(object).where(self.tokens.notna(), None).to_dict(orient="list"),
+        }
+        with open(os.path.join(path, "meta.json"), "w") as file:
+            json.dump(meta, file)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = "r") -> "PriceTensor":
+        with open(os.path.join(path, "meta.json")) as file:
+            meta = json.load(file)
+        prices = np.load(os.path.join(path, "prices.npy"), mmap_mode=mmap_mode)
+        timestamps = np.load(os.path.join(path, "timestamps.npy"), mmap_mode=mmap_mode)
+        values = {column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode=mmap_mode) for column in meta.get("values", [])}
+        return cls(timestamps, prices, pd.DataFrame(meta["tokens"]), values)
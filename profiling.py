@@ -0,0 +1,144 @@
+import cProfile
+import io
+import pstats
+import time
+
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# hook(phase, seconds), called after every timed phase
+Hook = Callable[[str, float], None]
+
+_NULL = nullcontext()
+
+
+class Profiler:
+    """
+    Per-phase timers and counters for a backtest, see BacktestEngine(profiler=...).
+
+    Notes:
+        - phase(name) is a context manager adding its wall time and a call to that phase, phases may nest
+          (an outer phase includes its inner ones)
+        - count(name, n) bumps a counter, e.g. signals seen or trades executed
+        - hooks are called with (phase, seconds) after every phase, for custom probes or live reporting
+        - phases listed in cprofile run under cProfile, their top functions show up in report()
+        - the engine's phases: metadata, fetch, assemble, batch (slicing one timestamp out of the panel),
+          strategy, execute, mark_to_market, snapshot, and run around the whole loop
+    """
+
+    enabled = True
+
+    def __init__(self, cprofile: Iterable[str] = (), hooks: Iterable[Hook] = (), cprofile_limit: int = 25):
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.hooks: List[Hook] = list(hooks)
+        self.cprofile_limit = cprofile_limit
+        self.profiles: Dict[str, cProfile.Profile] = {name: cProfile.Profile() for name in cprofile}
+
+    def add_hook(self, hook: Hook):
+        self.hooks.append(hook)
+
+    def phase(self, name: str) -> "_Phase":
+        return _Phase(self, name)
+
+    def _record(self, name: str, elapsed: float):
+        self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+        self.calls[name] = self.calls.get(name, 0) + 1
+        for hook in self.hooks:
+            hook(name, elapsed)
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self) -> Dict[str, Any]:
+        """
+        {"phases": {name: {"seconds", "calls", "share"}}, "counters": {...}, "cprofile": {phase: text}}
+        share is of the "run" phase when there is one, phases outside it (fetching) can exceed 1.
+        """
+        total = self.seconds.get("run") or sum(self.seconds.values())
+        phases = {
+            name: {"seconds": seconds, "calls": self.calls[name], "share": seconds / total if total else 0.0}
+            for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1])
+        }
+        return {
+            "phases": phases,
+            "counters": dict(self.counters),
+            "cprofile": {name: self._cprofile_text(profile) for name, profile in self.profiles.items()},
+        }
+
+    def _cprofile_text(self, profile: cProfile.Profile) -> str:
+        out = io.StringIO()
+        try:
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(self.cprofile_limit)
+        except TypeError:
+            return ""    # the phase never ran
+        return out.getvalue()
+
+    def print_report(self):
+        report = self.report()
+        print(f"{'phase':<16} {'seconds':>10} {'calls':>10} {'share':>8}")
+        for name, phase in report["phases"].items():
+            print(f"{name:<16} {phase['seconds']:10.4f} {phase['calls']:10d} {phase['share']:8.1%}")
+        for name, value in report["counters"].items():
+            print(f"{name:<16} {value:10d}")
+
+
+class _Phase:
+    # one timed phase, a plain class rather than a generator context manager to keep the enabled overhead low
+    __slots__ = ("profiler", "name", "profile", "started")
+
+    def __init__(self, profiler: Profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        self.profile = profiler.profiles.get(name)
+
+    def __enter__(self):
+        if self.profile is not None:
+            try:
+                self.profile.enable()
+            except ValueError:
+                self.profile = None    # another phase's cProfile is already running, this one is inside it
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        if self.profile is not None:
+            self.profile.disable()
+        self.profiler._record(self.name, elapsed)
+        return False
+
+
+class NullProfiler:
+    """Stand-in when profiling is off: phase() hands back one shared no-op context, nothing is recorded."""
+
+    enabled = False
+
+    def phase(self, name: str):
+        return _NULL
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+    def report(self) -> Optional[Dict[str, Any]]:
+        return None
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def timed_iter(iterable: Iterable, profiler, name: str):
+    """Times every step of iterable as phase name, or hands iterable back untouched when profiling is off."""
+    if not profiler.enabled:
+        return iterable
+    return _timed_iter(iter(iterable), profiler, name)
+
+
+def _timed_iter(iterator, profiler: Profiler, name: str):
+    while True:
+        with profiler.phase(name):
+            item = next(iterator, _NULL)
+        if item is _NULL:
+            return
+        yield item
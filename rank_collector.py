@@ -0,0 +1,215 @@
+import asyncio
+import bisect
+import json
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from app_store_connector import CHARTS, headers as CHART_HEADERS, parse_chart, silence_ssl_warnings
+from polymarket_connector import build_session
+
+CHART_IDS = {"free": 0, "paid": 1}
+CHART_NAMES = {chart_id: chart for chart, chart_id in CHART_IDS.items()}
+
+# one app on one chart at one scrape, packed (23 bytes), name is an index into the store's name table
+ROW_DTYPE = np.dtype([("t", "<i8"), ("chart", "u1"), ("rank", "<u2"), ("app_id", "<i8"), ("name", "<u4")])
+
+
+class RankStore:
+    """
+    Append-only App Store rank time series, one (t, chart, rank, app_id, name) row per app per scrape.
+
+    Notes:
+        - path is a directory of ranks.bin (ROW_DTYPE rows back to back) and names.json (the name table)
+        - rows are written through on every append, a whole scrape at a time in time order, other processes see
+          them after refresh()
+        - reads memory map ranks.bin, since rows are in time order a time range is found by binary search and
+          history() only scans the rows inside it
+        - t is epoch seconds, a rank missing from the page is stored as the app's position on it
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        names_path = os.path.join(path, "names.json")
+        if os.path.exists(names_path):
+            with open(names_path) as file:
+                self.names: List[str] = json.load(file)
+        else:
+            self.names = []
+            self._write_names()
+        self._name_ids = {name: i for i, name in enumerate(self.names)}
+        self._file = None
+        self.refresh()
+
+    def _write_names(self):
+        path = os.path.join(self.path, "names.json")
+        with open(path + ".tmp", "w") as file:
+            json.dump(self.names, file)
+        os.replace(path + ".tmp", path)
+
+    def name_id(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+            self._write_names()
+        return name_id
+
+    def append(self, t: int, chart: str, apps: Sequence[Tuple[Optional[int], int, str]]):
+        """One scrape of a chart at t, apps as parse_chart gives them: (rank or None, app id, name) in page order."""
+        if not apps:
+            return
+        if self.last_t is not None and t < self.last_t:
+            raise ValueError(f"rows are appended in time order, {t} is before {self.last_t}")
+        self.last_t = t
+        rows = np.empty(len(apps), dtype=ROW_DTYPE)
+        rows["t"] = t
+        rows["chart"] = CHART_IDS[chart]
+        rows["rank"] = [rank if rank is not None else position for position, (rank, _, _) in enumerate(apps, 1)]
+        rows["app_id"] = [app_id for _, app_id, _ in apps]
+        rows["name"] = [self.name_id(name) for _, _, name in apps]
+        if self._file is None:
+            self._file = open(os.path.join(self.path, "ranks.bin"), "ab")
+        self._file.write(rows.tobytes())
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def refresh(self):
+        """Maps every row written so far (by this or another process)."""
+        rows_path = os.path.join(self.path, "ranks.bin")
+        count = os.path.getsize(rows_path) // ROW_DTYPE.itemsize if os.path.exists(rows_path) else 0
+        self.rows = np.memmap(rows_path, dtype=ROW_DTYPE, mode="r", shape=(count,)) if count else np.zeros(0, dtype=ROW_DTYPE)
+        names_path = os.path.join(self.path, "names.json")
+        if self._file is None and os.path.exists(names_path):
+            # another process may be the writer, its names come with its rows
+            with open(names_path) as file:
+                self.names = json.load(file)
+            self._name_ids = {name: i for i, name in enumerate(self.names)}
+        self.last_t = int(self.rows["t"][-1]) if count else None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Every row as one array per column, over the memory map."""
+        return {name: self.rows[name] for name in ROW_DTYPE.names}
+
+    def app_ids(self, name: str) -> np.ndarray:
+        """App ids stored under name (usually one)."""
+        name_id = self._name_ids.get(name)
+        if name_id is None or not len(self.rows):
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(self.rows["app_id"][self.rows["name"] == name_id])
+
+    def window(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """Rows with start <= t <= end, a slice of the memory map found by binary search (rows are in time order)."""
+        # bisect touches log2(n) rows, np.searchsorted would copy the strided t column out of the map first
+        t = self.rows["t"]
+        lo = bisect.bisect_left(t, start) if start is not None else 0
+        hi = bisect.bisect_right(t, end) if end is not None else len(t)
+        return self.rows[lo:hi]
+
+    def history(self, app: Union[int, str], start: Optional[int] = None, end: Optional[int] = None,
+                chart: Optional[str] = None) -> pd.DataFrame:
+        """Ranks of one app (id or stored name) with start <= t <= end, in time order: t, chart, rank."""
+        rows = self.window(start, end)
+        if isinstance(app, str):
+            name_id = self._name_ids.get(app)
+            keep = rows["name"] == (name_id if name_id is not None else -1)
+        else:
+            keep = rows["app_id"] == app
+        if chart is not None:
+            keep &= rows["chart"] == CHART_IDS[chart]
+        rows = rows[keep]
+        return pd.DataFrame({
+            "t": rows["t"],
+            "chart": pd.Categorical.from_codes(rows["chart"], categories=[CHART_NAMES[i] for i in sorted(CHART_NAMES)]),
+            "rank": rows["rank"].astype(np.int64),
+        })
+
+
+class RankCollector:
+    """
+    Scrapes App Store charts on a schedule into a RankStore.
+
+    Notes:
+        - every round fetches the charts concurrently (a thread each), parses them with parse_chart and appends each
+          one stamped with its fetch time
+        - rounds start on interval boundaries of the wall clock (every minute on the minute by default), a round
+          that runs late is not made up
+        - a chart that fails to fetch or parses to no apps is skipped for that round and counted in errors
+        - transport (transport.Transport) records or replays the pages, without one a retrying session is used
+        - stats() reports the time spent parsing next to the time spent fetching
+    """
+
+    def __init__(self, store: RankStore, charts: Sequence[str] = ("free", "paid"), interval: float = 60.0,
+                 transport=None):
+        self.store = store
+        self.charts = list(charts)
+        self.interval = interval
+        if transport is None:
+            silence_ssl_warnings()
+        self.session = transport if transport is not None else build_session(pool_size=len(self.charts))
+        self.rounds = 0
+        self.errors = 0
+        self.rows_written = 0
+        self.fetch_seconds = 0.0
+        self.parse_seconds = 0.0
+
+    def _scrape(self, chart: str) -> Optional[Tuple[int, List[Tuple[Optional[int], int, str]]]]:
+        try:
+            started = time.perf_counter()
+            response = self.session.get(CHARTS[chart], headers=CHART_HEADERS)
+            response.raise_for_status()
+            t = int(time.time())
+            parsed = time.perf_counter()
+            apps = parse_chart(response.text)
+            self.parse_seconds += time.perf_counter() - parsed
+            self.fetch_seconds += parsed - started
+        except Exception as error:
+            print(f"Failed to scrape the {chart} chart: {error!r}")
+            self.errors += 1
+            return None
+        if not apps:
+            print(f"No apps found on the {chart} chart")
+            self.errors += 1
+            return None
+        return t, apps
+
+    async def collect_once(self, loop, pool):
+        scrapes = await asyncio.gather(*(loop.run_in_executor(pool, self._scrape, chart) for chart in self.charts))
+        # appended in time order so the store stays sorted by t
+        done = sorted((scrape[0], chart, scrape[1]) for chart, scrape in zip(self.charts, scrapes) if scrape is not None)
+        for t, chart, apps in done:
+            self.store.append(t, chart, apps)
+            self.rows_written += len(apps)
+        self.rounds += 1
+
+    async def run(self, rounds: Optional[int] = None):
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=len(self.charts)) as pool:
+            count = 0
+            while rounds is None or count < rounds:
+                await self.collect_once(loop, pool)
+                count += 1
+                if rounds is None or count < rounds:
+                    await asyncio.sleep(self.interval - time.time() % self.interval)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "rounds": self.rounds,
+            "errors": self.errors,
+            "rows": self.rows_written,
+            "fetch_seconds": self.fetch_seconds,
+            "parse_seconds": self.parse_seconds,
+        }
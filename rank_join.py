@@ -0,0 +1,215 @@
+import bisect
+import os
+import re
+import unicodedata
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from rank_collector import CHART_IDS, RankStore
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+# t fits in the low 40 bits of an (app, t) sort key until the year 36812
+_T_BITS = 40
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase ascii words: "Threads, an Instagram app" -> "threads an instagram app", "CapCut - Video Editor" -> "capcut video editor"."""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+    name = name.replace("&", " and ").replace("'", "")
+    return _NON_WORD.sub(" ", name).strip()
+
+
+class NameIndex:
+    """
+    Precomputed lookup from Polymarket app names (parse_name) to App Store names (chart url slugs).
+
+    Notes:
+        - names are compared normalized (normalize_name), then without spaces ("chat gpt" is "chatgpt")
+        - failing that, the shortest App Store name that starts with the whole Polymarket name ("threads" matches
+          "threads an instagram app"), then the longest App Store name the Polymarket name starts with
+          ("google gemini ai" matches "google gemini")
+        - aliases maps a Polymarket name to the App Store name it should match, for anything the rules miss
+        - match() returns the position of the matched name in names, or None
+    """
+
+    def __init__(self, names: Iterable[str], aliases: Optional[Dict[str, str]] = None):
+        self.names = list(names)
+        self.exact: Dict[str, int] = {}
+        self.compact: Dict[str, int] = {}
+        for i, name in enumerate(self.names):
+            normalized = normalize_name(name)
+            self.exact.setdefault(normalized, i)
+            self.compact.setdefault(normalized.replace(" ", ""), i)
+        self.sorted_names = sorted(self.exact)
+        self.aliases = {normalize_name(source): normalize_name(target) for source, target in (aliases or {}).items()}
+
+    def match(self, name: Optional[str]) -> Optional[int]:
+        if not name:
+            return None
+        query = normalize_name(name)
+        query = self.aliases.get(query, query)
+        if not query:
+            return None
+        if query in self.exact:
+            return self.exact[query]
+        compact = query.replace(" ", "")
+        if compact in self.compact:
+            return self.compact[compact]
+
+        # App Store names that extend the query by whole words
+        lo = bisect.bisect_left(self.sorted_names, query + " ")
+        hi = bisect.bisect_left(self.sorted_names, query + "!")    # "!" sorts right after " "
+        if lo < hi:
+            return self.exact[min(self.sorted_names[lo:hi], key=len)]
+
+        # the query extends an App Store name by whole words
+        words = query.split(" ")
+        for end in range(len(words) - 1, 0, -1):
+            prefix = " ".join(words[:end])
+            if prefix in self.exact:
+                return self.exact[prefix]
+        return None
+
+
+def ticker_ranks(source: Union[RankStore, pd.DataFrame, str], tickers: Sequence[str], chart: Optional[str] = None,
+                 start: Optional[int] = None, end: Optional[int] = None, aliases: Optional[Dict[str, str]] = None
+                 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The rank series of the apps behind tickers: (t, name code, rank, ticker name codes), ticker name codes[i] being
+    the name code tickers[i] matched (-1 when it matched nothing), only rows of matched apps are read.
+
+    source is a RankStore (or its directory), a fixture file (CSV with t, name, rank and optionally chart columns)
+    or such a DataFrame. chart keeps one chart ("free" / "paid") when the source has several, start/end bound t.
+    """
+    if isinstance(source, str) and os.path.isdir(source):
+        source = RankStore(source)
+    if isinstance(source, RankStore):
+        names = source.names
+    else:
+        frame = pd.read_csv(source) if isinstance(source, str) else source
+        codes, names = pd.factorize(frame["name"])
+
+    index = NameIndex(names, aliases)
+    ticker_keys = np.array([-1 if match is None else match for match in map(index.match, tickers)], dtype=np.int64)
+    wanted = np.zeros(len(names) + 1, dtype=bool)    # the spare last slot takes the -1s
+    wanted[ticker_keys] = True
+    wanted[-1] = False
+
+    if isinstance(source, RankStore):
+        rows = source.window(start, end)
+        # one mask over the mapped columns, then only the wanted rows are gathered
+        keep = wanted[rows["name"]]
+        if chart is not None:
+            keep &= rows["chart"] == CHART_IDS[chart]
+        rows = rows[keep]
+        return rows["t"].astype(np.int64), rows["name"].astype(np.int64), rows["rank"].astype(np.float64), ticker_keys
+
+    t = frame["t"].to_numpy(dtype=np.int64)
+    keep = wanted[codes]
+    if start is not None:
+        keep &= t >= start
+    if end is not None:
+        keep &= t <= end
+    rows = np.flatnonzero(keep)
+    if chart is not None and "chart" in frame.columns:
+        # string comparisons only for the rows left
+        rows = rows[(frame["chart"].iloc[rows] == chart).to_numpy()]
+    return t[rows], codes[rows].astype(np.int64), frame["rank"].to_numpy(dtype=np.float64)[rows], ticker_keys
+
+
+def _grouped(key: np.ndarray, t: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    # (order grouping rows by key with t ascending within a key, start of every key's run in that order)
+    if len(t) < 2 or bool((t[1:] >= t[:-1]).all()):
+        # already in time order (a RankStore window, a built panel): one stable sort on the small int key, which
+        # NumPy does as a radix sort for 16 bit keys
+        order = np.argsort(key.astype(np.uint16) if size <= 1 << 16 else key, kind="stable")
+    else:
+        order = np.lexsort((t, key))
+    starts = np.concatenate(([0], np.cumsum(np.bincount(key, minlength=size))))
+    return order, starts
+
+
+def asof_lookup(row_key: np.ndarray, row_t: np.ndarray, key: np.ndarray, t: np.ndarray, values: np.ndarray,
+                tolerance: Optional[int] = None) -> np.ndarray:
+    """
+    For every row, the last value of the series with the same key at or before the row's t, NaN when there is none
+    (or it is more than tolerance seconds old). Keys are small non-negative ints (name codes), rows with key -1 get NaN.
+
+    Both sides are grouped by key first, then every key's rows are found in its time sorted series with one
+    binary search over sorted queries, so the cost is a couple of linear passes plus the searches.
+    """
+    out = np.full(len(row_key), np.nan)
+    known = row_key >= 0
+    if not len(key) or not known.any():
+        return out
+    size = int(max(row_key.max(), key.max())) + 1
+
+    # the series rows of keys no row asks for (other apps on the chart) are dropped before any sorting
+    wanted = np.zeros(size, dtype=bool)
+    wanted[row_key[known]] = True
+    keep = wanted[key]
+    key, t, values = key[keep], t[keep], values[keep]
+    series_order, series_starts = _grouped(key, t, size)
+    t, values = t[series_order], values[series_order]
+
+    rows = np.flatnonzero(known)
+    row_order, row_starts = _grouped(row_key[rows], row_t[rows], size)
+    rows = rows[row_order]
+
+    for k in np.flatnonzero(wanted):
+        lo, hi = series_starts[k], series_starts[k + 1]
+        if lo == hi:
+            continue
+        key_rows = rows[row_starts[k]:row_starts[k + 1]]
+        queries = row_t[key_rows]
+        position = np.searchsorted(t[lo:hi], queries, side="right") - 1
+        found = position >= 0
+        position = lo + np.maximum(position, 0)
+        if tolerance is not None:
+            found &= queries - t[position] <= tolerance
+        out[key_rows[found]] = values[position[found]]
+    return out
+
+
+def real_rank_column(panel: pd.DataFrame, ranks: Union[RankStore, pd.DataFrame, str], chart: Optional[str] = None,
+                     tolerance: Optional[int] = None, aliases: Optional[Dict[str, str]] = None) -> np.ndarray:
+    """
+    The App Store rank of every (t, token) row's app as of t, aligned with the panel's rows (NaN when unknown).
+
+    Notes:
+        - a token's ticker (parse_name name) is matched once per token through a NameIndex, rows reach their
+          token through the panel index's codes, so no per-row string is touched
+        - only the matched apps' ranks up to the panel's last t (from tolerance before its first t) are read
+        - tolerance drops ranks older than that many seconds, e.g. 600 when scrapes stopped for a while
+    """
+    n = len(panel)
+    if not n:
+        return np.zeros(0)
+    t = panel.index.get_level_values(0).to_numpy(dtype=np.int64)
+
+    # a token's ticker is read from its last row
+    token_codes = np.asarray(panel.index.codes[1], dtype=np.int64)
+    last_row = np.full(len(panel.index.levels[1]) + 1, -1, dtype=np.int64)
+    last_row[token_codes] = np.arange(n)    # code -1 (no token) lands in the spare last slot
+    tokens = np.flatnonzero(last_row[:-1] >= 0)
+    tickers = panel["ticker"].iloc[last_row[tokens]].tolist()
+
+    start = int(t.min()) - tolerance if tolerance is not None else None
+    rank_t, rank_key, rank, ticker_keys = ticker_ranks(ranks, tickers, chart=chart, start=start, end=int(t.max()),
+                                                       aliases=aliases)
+    unmatched = [ticker for ticker, key in zip(tickers, ticker_keys) if key < 0]
+    if unmatched:
+        print(f"no App Store rank history for {len(unmatched)} app(s): {', '.join(map(str, unmatched[:10]))}")
+    token_key = np.full(len(last_row), -1, dtype=np.int64)
+    token_key[tokens] = ticker_keys
+    return asof_lookup(token_key[token_codes], t, rank_key, rank_t, rank, tolerance)
+
+
+def add_real_rank(panel: pd.DataFrame, ranks: Union[RankStore, pd.DataFrame, str], chart: Optional[str] = None,
+                  tolerance: Optional[int] = None, aliases: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """Adds the real_rank column (see real_rank_column) to the panel in place and returns it."""
+    panel["real_rank"] = real_rank_column(panel, ranks, chart=chart, tolerance=tolerance, aliases=aliases)
+    return panel
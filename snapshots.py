@@ -0,0 +1,152 @@
+import json
+import os
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+_GROWTH = 1.5
+
+
+@dataclass
+class BacktestSnapshot:
+    timestamp: int
+    liquid_value: float
+    unrealized_pnl: float
+    total_value: float
+    num_active_trades: int
+
+
+class SnapshotBuffer:
+    """
+    Per-timestamp backtest snapshots as growable NumPy columns, one row per timestamp.
+
+    Notes:
+        - append() writes straight into preallocated columns, no object per snapshot
+        - arrays() / to_frame() expose the rows without copying, indexing and iterating give BacktestSnapshot rows
+          for code that still reads snapshot.total_value
+        - with spill_path, every spill_rows rows are appended to one raw file per column in that directory and the
+          memory is reused, arrays() then memory maps the files so a very long run never holds its snapshots
+        - a spilled buffer is written in full to disk by flush(), and can be reopened with SnapshotBuffer.load()
+    """
+
+    COLUMNS = {
+        "timestamp": np.int64,
+        "liquid_value": np.float64,
+        "unrealized_pnl": np.float64,
+        "total_value": np.float64,
+        "num_active_trades": np.int64,
+    }
+
+    def __init__(self, capacity: int = 1024, spill_path: Optional[str] = None, spill_rows: int = 1_000_000):
+        self.spill_path = spill_path
+        self.spill_rows = spill_rows
+        self.spilled = 0
+        self.size = 0
+        if spill_path is not None:
+            os.makedirs(spill_path, exist_ok=True)
+            capacity = min(capacity, spill_rows)
+            for name in self.COLUMNS:
+                open(self._column_path(name), "wb").close()
+        self.columns: Dict[str, np.ndarray] = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+
+    def __len__(self) -> int:
+        return self.spilled + self.size
+
+    def append(self, timestamp: int, liquid_value: float, unrealized_pnl: float, total_value: float, num_active_trades: int):
+        row = self.size
+        columns = self.columns
+        if row == len(columns["timestamp"]):
+            if self.spill_path is not None and row >= self.spill_rows:
+                self.flush()
+                row = 0
+            else:
+                self._grow(int(row * _GROWTH) + 1)
+                columns = self.columns
+        columns["timestamp"][row] = timestamp
+        columns["liquid_value"][row] = liquid_value
+        columns["unrealized_pnl"][row] = unrealized_pnl
+        columns["total_value"][row] = total_value
+        columns["num_active_trades"][row] = num_active_trades
+        self.size = row + 1
+
+    def _grow(self, capacity: int):
+        if self.spill_path is not None:
+            capacity = min(capacity, self.spill_rows)
+        for name, column in self.columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.spill_path, f"{name}.bin")
+
+    def flush(self):
+        """Appends the in-memory rows to the spill files (a no-op without spill_path)."""
+        if self.spill_path is None or not self.size:
+            return
+        for name, column in self.columns.items():
+            with open(self._column_path(name), "ab") as file:
+                column[:self.size].tofile(file)
+        self.spilled += self.size
+        self.size = 0
+        with open(os.path.join(self.spill_path, "meta.json"), "w") as file:
+            json.dump({"rows": self.spilled, "columns": {name: np.dtype(dtype).str for name, dtype in self.COLUMNS.items()}}, file)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Every row as one array per column, views over the buffer (or memory maps over the spill files)."""
+        if self.spill_path is None:
+            return {name: column[:self.size] for name, column in self.columns.items()}
+        self.flush()
+        return self._spilled_arrays()
+
+    def _spilled_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            name: np.memmap(self._column_path(name), dtype=dtype, mode="r", shape=(self.spilled,)) if self.spilled else np.empty(0, dtype=dtype)
+            for name, dtype in self.COLUMNS.items()
+        }
+
+    def column(self, name: str) -> np.ndarray:
+        return self.arrays()[name]
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.arrays(), copy=False)
+
+    def to_csv(self, path: str):
+        self.to_frame().to_csv(path, index=False)
+
+    def __getitem__(self, index: int) -> BacktestSnapshot:
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("snapshot index out of range")
+        if index >= self.spilled:
+            columns, row = self.columns, index - self.spilled
+        else:
+            columns, row = self._spilled_arrays(), index
+        return BacktestSnapshot(
+            timestamp=int(columns["timestamp"][row]),
+            liquid_value=float(columns["liquid_value"][row]),
+            unrealized_pnl=float(columns["unrealized_pnl"][row]),
+            total_value=float(columns["total_value"][row]),
+            num_active_trades=int(columns["num_active_trades"][row]),
+        )
+
+    def __iter__(self) -> Iterator[BacktestSnapshot]:
+        arrays = self.arrays()
+        for row in zip(*(arrays[name].tolist() for name in self.COLUMNS)):
+            yield BacktestSnapshot(*row)
+
+    @classmethod
+    def load(cls, path: str) -> "SnapshotBuffer":
+        """Reopens a flushed spill directory read-only, for plotting or analysis after the run."""
+        with open(os.path.join(path, "meta.json")) as file:
+            meta = json.load(file)
+        buffer = cls.__new__(cls)
+        buffer.spill_path, buffer.spill_rows = path, 0
+        buffer.spilled, buffer.size = meta["rows"], 0
+        buffer.columns = {name: np.empty(0, dtype=dtype) for name, dtype in cls.COLUMNS.items()}
+        return buffer
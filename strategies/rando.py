@@ -1,13 +1,31 @@
-from components import Ledger, MarketState, TradeSignal
+import numpy as np
+
+from components import Ledger, MarketBatch, MarketState, TradeSignal
 from strategies.strategy import Strategy
 
 class Rando(Strategy):
+    def __init__(self, quantity: int = 10, threshold: float = 1.0):
+        # buys quantity YES contracts whenever yes + no is under threshold
+        self.quantity = quantity
+        self.threshold = threshold
+
     def compute(self, market_state: MarketState, ledger: Ledger):
-        if market_state.yes_price + market_state.no_price < 1.0:
+        if market_state.yes_price + market_state.no_price < self.threshold:
             return TradeSignal(
                 action="BUY",
                 side="YES",
-                quantity=10,
+                quantity=self.quantity,
                 price=market_state.yes_price
             )
-        return None
\ No newline at end of file
+        return None
+
+    def compute_batch(self, t: int, arrays: MarketBatch, ledger: Ledger):
+        signals = np.full(len(arrays), None, dtype=object)
+        for i in np.flatnonzero(arrays.yes_price + arrays.no_price < self.threshold):
+            signals[i] = TradeSignal(
+                action="BUY",
+                side="YES",
+                quantity=self.quantity,
+                price=float(arrays.yes_price[i])
+            )
+        return signals
@@ -1,13 +1,28 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Optional, Sequence
 
-from components import Ledger, MarketState, TradeSignal
+from components import Ledger, MarketBatch, MarketState, TradeSignal
 
 class Strategy(ABC):
-    
+    # features.FeatureStore over the panel being run, set by the engine before the first call (None when streaming),
+    # read through get: self.features.get("volatility", marketState.row), self.features.get("fraction_elapsed", arrays.row)
+    features = None
+
     @abstractmethod
     def compute(self, marketState: MarketState, ledger: Ledger) -> Optional[TradeSignal]:
         """
         Emits a TradeSignal if it is favorable based on the MarketState and Ledger
         """
-        pass
\ No newline at end of file
+        pass
+
+    def compute_batch(self, t: int, arrays: MarketBatch, ledger: Ledger) -> Sequence[Optional[TradeSignal]]:
+        """
+        Optional vectorized form of compute, called once per timestamp with every market in arrays.
+        Returns one entry per row of arrays (a TradeSignal or None), executed in row order.
+        Strategies that do not override this are driven through compute, one row at a time.
+        """
+        raise NotImplementedError
+
+    @property
+    def has_batch(self) -> bool:
+        return type(self).compute_batch is not Strategy.compute_batch
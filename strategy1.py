@@ -2,10 +2,11 @@
 
 # WARNING: This is probably out of date after refactoring changes
 
+from book_evaluator import NO_FEES, FeeModel, evaluate_market
 from polymarket_connector import *
 
 
-def arbStrategy1(yesOrderBook, noOrderBook):
+def arbStrategy1(yesOrderBook, noOrderBook, fees: FeeModel = NO_FEES):
     """
     STRATEGY 1
 
@@ -22,71 +23,45 @@ def arbStrategy1(yesOrderBook, noOrderBook):
     if BID_YES + BID_NO > 1 then SELL. Because your profit will be ((BID_YES + BID_NO) - 1) > 0
     if BID_YES + BID_NO <= 1 then DO NOT SELL. Because your profit will be ((BID_YES + BID_NO) - 1) < 0
 
-    MESSY FUNCTION, CLEAN THIS UP LATER. BUT LOOKS LIKE, POLYMARKET IS TOO EFFICIENT FOR THIS TYPE OF ARB.
-    Next steps:
-    - Look deeper, accounting for both size and price to find the best ask/bid in a given yes/no
-    - Explore other types of arbitrage
+    Sizes are accounted for by walking both ladders together, see book_evaluator.bundle_depth, fees are pluggable
+    through a book_evaluator.FeeModel.
 
     :param yesOrderBook, noOrderBook:
     :return:
     """
+    result = evaluate_market(_book_levels(yesOrderBook), _book_levels(noOrderBook), fees=fees)
 
-    # find best ask yes
-    # find best ask no
-    # chose the min contract size between best ask yes, best ask no
-    # optimization: have the ability to update the best yes/no if there is more profit for a lower price because of a
-    # larger size
-    best_ask_yes = {"price": float('inf'), "size": 0.0}
-    best_ask_no = {"price": float('inf'), "size": 0.0}
-    for ask in yesOrderBook.asks:
-        if float(ask.price) < best_ask_yes["price"]:
-            best_ask_yes["price"] = float(ask.price)
-            best_ask_yes["size"] = float(ask.size)
-    for ask in noOrderBook.asks:
-        if float(ask.price) < best_ask_no["price"]:
-            best_ask_no["price"] = float(ask.price)
-            best_ask_no["size"] = float(ask.size)
-    max_order_size = min(best_ask_yes["size"], best_ask_no["size"])
-    sum_value_asks = best_ask_yes["price"] + best_ask_no["price"]
-    if sum_value_asks < 1:
-        print(f"FOUND ARB -- ASKS -- sum: {sum_value_asks}, order size: {max_order_size}")
-        raise ValueError("READ THE DATA")
-    else:
-        print(f"NO ARB -- ASKS -- sum: {sum_value_asks}, order size: {max_order_size}")
-
-
-    # find best bid yes
-    # find best bid no
-    best_bid_yes = {"price": 0.0, "size": 0.0}
-    best_bid_no = {"price": 0.0, "size": 0.0}
-    for bid in yesOrderBook.bids:
-        if float(bid.price) > best_bid_yes["price"]:
-            best_bid_yes["price"] = float(bid.price)
-            best_bid_yes["size"] = float(bid.size)
-    for bid in noOrderBook.bids:
-        if float(bid.price) > best_bid_no["price"]:
-            best_bid_no["price"] = float(bid.price)
-            best_bid_no["size"] = float(bid.size)
-    max_order_size = min(best_bid_yes["size"], best_bid_no["size"])
-    sum_value_bids = best_bid_yes["price"] + best_bid_no["price"]
-    if sum_value_bids > 1:
-        print(f"FOUND ARB -- BIDS -- sum: {sum_value_bids}, order size: {max_order_size}")
-        raise ValueError("READ THE DATA")
-    else:
-        print(f"NO ARB -- BIDS -- sum: {sum_value_bids}, order size: {max_order_size}")
+    for kind, name in (("BUY", "ASKS"), ("SELL", "BIDS")):
+        market = result[kind]
+        sum_value = 1 - market["top_edge"] if kind == "BUY" else 1 + market["top_edge"]
+        if market["quantity"] > 0:
+            print(f"FOUND ARB -- {name} -- sum: {sum_value}, order size: {market['quantity']}, profit: {market['profit']}")
+            raise ValueError("READ THE DATA")
+        else:
+            print(f"NO ARB -- {name} -- sum: {sum_value}, order size: {market['top_size']}")
 
     return
 
 
-while True:
-    dateSlug = "december-12"
+def _book_levels(orderBook):
+    # py_clob_client OrderBookSummary -> raw /book shape
+    return {
+        "asks": [{"price": level.price, "size": level.size} for level in orderBook.asks],
+        "bids": [{"price": level.price, "size": level.size} for level in orderBook.bids],
+    }
+
 
-    bets = fetchBetsForDate(dateSlug)
-    orderBookClient = OrderBook()
+if __name__ == "__main__":
+    # live scan of every market of an event, see arb_scanner.ArbScanner
+    import asyncio
+    from arb_scanner import ArbScanner
+
+    dateSlug = "december-12"
 
-    for bet in bets:
-        yesClobToken = bet["yesClobToken"]
-        noClobToken = bet["noClobToken"]
-        yesOrderBook = orderBookClient.getOrderBook(tokenId=yesClobToken)
-        noOrderBook = orderBookClient.getOrderBook(tokenId=noClobToken)
-        arbStrategy1(yesOrderBook=yesOrderBook, noOrderBook=noOrderBook)
+    bets = PolymarketConnector().get_app_store_rankings(free=True, date=dateSlug)
+    markets = [(bet["app"], bet["yesClobToken"], bet["noClobToken"]) for bet in bets if bet.get("yesClobToken") and bet.get("noClobToken")]
+    scanner = ArbScanner(OrderBook(max_workers=16), markets, rate=50.0)
+    try:
+        asyncio.run(scanner.run(interval=1.0))
+    finally:
+        print(scanner.latency_summary())
@@ -0,0 +1,164 @@
+import contextlib
+import io
+import itertools
+import os
+import shutil
+import tempfile
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from backtestEngine import BacktestEngine
+from features import FeatureStore
+from price_panel import PriceTensor
+from strategies.rando import Rando
+from strategies.strategy import Strategy
+
+# strategies a sweep config can name instead of passing the class
+STRATEGIES = {
+    "rando": Rando,
+}
+
+# result columns summarize adds for every config
+SUMMARY_COLUMNS = ("final_total_value", "max_drawdown", "num_trades")
+
+# the panel each worker process maps once, in its initializer, and the features its configs share
+_PANEL: Optional[PriceTensor] = None
+_FEATURES: Optional[FeatureStore] = None
+
+
+def grid(strategy: Union[str, type], **params: Sequence[Any]) -> List[Dict[str, Any]]:
+    """
+    Every combination of the given parameter values as sweep configs.
+    grid("rando", quantity=[5, 10], threshold=[0.98, 1.0]) -> 4 configs
+    """
+    names = list(params)
+    return [
+        {"strategy": strategy, **dict(zip(names, values))}
+        for values in itertools.product(*(params[name] for name in names))
+    ]
+
+
+def build_strategy(config: Dict[str, Any]) -> Strategy:
+    strategy = config["strategy"]
+    cls = STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+    return cls(**{key: value for key, value in config.items() if key != "strategy"})
+
+
+def max_drawdown(values: np.ndarray) -> float:
+    """Largest peak-to-trough drop of an equity curve, as a fraction of the peak."""
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return 0.0
+    peaks = np.maximum.accumulate(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdowns = np.where(peaks > 0, (peaks - values) / peaks, 0.0)
+    return float(drawdowns.max())
+
+
+def summarize(output: Dict[str, Any], initial_capital: float) -> Dict[str, Any]:
+    """Final total value, max drawdown and trade count of one backtest output."""
+    totals = output["snapshots"].column("total_value")
+    return {
+        "final_total_value": float(totals[-1]) if len(totals) else initial_capital,
+        "max_drawdown": max_drawdown(totals),
+        "num_trades": len(output["ledger"].Trades),
+    }
+
+
+def build_panel(path: str, date: str, free: bool, ffill: bool = True, interval: Optional[str] = None,
+                start_ts: Optional[int] = None, end_ts: Optional[int] = None, order_book=None, connector=None,
+                ranks=None, rank_tolerance: Optional[int] = None, implied: bool = False) -> PriceTensor:
+    """
+    Builds the price panel once from the network and saves it as a PriceTensor at path, with real_rank when ranks is
+    given and the implied columns when implied is set.
+    """
+    panel = BacktestEngine(initial_capital=0, order_book=order_book, connector=connector).build_price_panel(
+        date=date, ffill=ffill, free=free, interval=interval, start_ts=start_ts, end_ts=end_ts, ranks=ranks,
+        rank_tolerance=rank_tolerance, implied=implied
+    )
+    tensor = PriceTensor.from_panel(panel)
+    tensor.save(path)
+    return tensor
+
+
+def _init_worker(panel_path: str):
+    global _PANEL, _FEATURES
+    _PANEL = PriceTensor.load(panel_path)
+    # computed lazily by the first config that reads a feature, then reused by every later config in this worker
+    _FEATURES = FeatureStore(_PANEL)
+
+
+def _run_config(index: int, config: Dict[str, Any], initial_capital: float, quiet: bool,
+                render_dir: Optional[str] = None, render_format: str = "png") -> Dict[str, Any]:
+    engine = BacktestEngine(initial_capital=initial_capital)
+    strategy = build_strategy(config)
+    strategy.features = _FEATURES
+    if quiet:
+        with contextlib.redirect_stdout(io.StringIO()):
+            output = engine.run_panel(_PANEL, strategy)
+    else:
+        output = engine.run_panel(_PANEL, strategy)
+    result = {"config": index, **summarize(output, initial_capital)}
+    if render_dir is not None:
+        # rendered in the worker, the snapshots never leave its process (matplotlib is only imported here)
+        from grapher import render_snapshots
+
+        result["chart"] = None
+        if len(output["snapshots"]):
+            path = os.path.join(render_dir, f"config-{index:04d}.{render_format}")
+            result["chart"] = render_snapshots(output, path, title=f"config {index}: {config}")
+    return result
+
+
+def run_sweep(configs: Sequence[Dict[str, Any]], panel: Union[str, pd.DataFrame, PriceTensor],
+              initial_capital: float = 100000, processes: Optional[int] = None, quiet: bool = True,
+              render_dir: Optional[str] = None, render_format: str = "png") -> pd.DataFrame:
+    """
+    Runs every strategy config against one shared price panel in a process pool.
+
+    Notes:
+        - panel is a saved PriceTensor directory, or a panel/tensor that is saved to a temp directory first
+        - workers memory map the saved tensor once each, the panel is never pickled per task
+        - configs are dicts with a "strategy" (class, or name in STRATEGIES) and that strategy's keyword arguments
+        - returns one row per config: its parameters, final_total_value, max_drawdown and num_trades (an empty
+          frame with those columns for no configs)
+        - quiet swallows the engine's per-trade prints inside the workers
+        - with render_dir every config's equity curve is rendered headless to render_dir/config-<index>.<render_format>
+          by its worker (see grapher.render_snapshots), and a "chart" column holds the path
+    """
+    if not configs:
+        return pd.DataFrame(columns=["strategy", *SUMMARY_COLUMNS] + (["chart"] if render_dir is not None else []))
+
+    temp_dir = None
+    if isinstance(panel, str):
+        panel_path = panel
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="sweep-panel-")
+        panel_path = temp_dir
+        tensor = panel if isinstance(panel, PriceTensor) else PriceTensor.from_panel(panel)
+        tensor.save(panel_path)
+
+    if render_dir is not None:
+        os.makedirs(render_dir, exist_ok=True)
+    processes = processes or os.cpu_count() or 1
+    try:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(panel_path,)) as pool:
+            futures = [
+                pool.submit(_run_config, index, dict(config), initial_capital, quiet, render_dir, render_format)
+                for index, config in enumerate(configs)
+            ]
+            results = [future.result() for future in futures]
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    params = pd.DataFrame([
+        {**config, "strategy": config["strategy"] if isinstance(config["strategy"], str) else config["strategy"].__name__}
+        for config in configs
+    ])
+    # futures are collected in submission order, so results line up with configs
+    return pd.concat([params, pd.DataFrame(results).drop(columns="config")], axis=1)
@@ -0,0 +1,29 @@
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+# the modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtestEngine import BacktestEngine
+from benchmarks.synthetic import SyntheticOrderBook, synthetic_event
+
+
+def quiet(function):
+    """Runs function with the engine's progress prints swallowed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function()
+
+
+@pytest.fixture(scope="module")
+def panel():
+    """A synthetic event's price panel, every other market with a known startDate..endDate."""
+    apps, histories = synthetic_event(8, 200, seed=3)
+    for k, app in enumerate(apps):
+        if k % 2:
+            app["startDate"], app["endDate"] = "2025-12-08T00:00:00Z", "2025-12-12T12:00:00Z"
+    engine = BacktestEngine(initial_capital=0, order_book=SyntheticOrderBook(histories))
+    return quiet(lambda: engine.build_price_panel(date="synthetic", ffill=True, free=True, apps=apps))
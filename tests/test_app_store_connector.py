@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+from app_store_connector import CHARTS, get_top_apps
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_the_rank_modules_has_no_side_effects():
+    check = (
+        "import sys, warnings, numpy, pandas\n"
+        "filters = list(warnings.filters)\n"
+        "import app_store_connector, rank_collector, rank_join\n"
+        "assert 'requests' not in sys.modules and 'urllib3' not in sys.modules, 'requests imported'\n"
+        "assert warnings.filters == filters, 'warning filters changed'\n"
+    )
+    result = subprocess.run([sys.executable, "-c", check], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+class ChartTransport:
+    def __init__(self, page):
+        self.page = page
+        self.urls = []
+
+    def get(self, url, headers=None):
+        self.urls.append(url)
+        return self
+
+    def raise_for_status(self):
+        pass
+
+    @property
+    def text(self):
+        return self.page
+
+
+def test_get_top_apps_through_a_transport():
+    page = ('<a href="https://apps.apple.com/us/app/chatgpt/id6448311069">1 ChatGPT View</a>'
+            '<a href="https://apps.apple.com/us/app/google-maps/id585027354">2 Google Maps View</a>')
+    transport = ChartTransport(page)
+    assert get_top_apps("PAID", transport=transport) == [{"rank": 1, "name": "chatgpt", "id": 6448311069},
+                                                         {"rank": 2, "name": "google maps", "id": 585027354}]
+    assert transport.urls == [CHARTS["paid"]]
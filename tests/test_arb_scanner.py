@@ -0,0 +1,136 @@
+import asyncio
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from arb_scanner import ArbScanner, RateLimiter
+from polymarket_connector import OrderBook
+
+
+def book(bids=(), asks=()):
+    return {"bids": [{"price": str(p), "size": str(s)} for p, s in bids],
+            "asks": [{"price": str(p), "size": str(s)} for p, s in asks]}
+
+
+BOOKS = {
+    # asks sum to 0.90: buy 50 bundles
+    "buy-yes": book(bids=[(0.35, 10)], asks=[(0.40, 100)]),
+    "buy-no": book(bids=[(0.45, 10)], asks=[(0.50, 50)]),
+    # bids sum to 1.10: sell 10 bundles
+    "sell-yes": book(bids=[(0.60, 10)], asks=[(0.65, 10)]),
+    "sell-no": book(bids=[(0.50, 20)], asks=[(0.55, 10)]),
+    # no edge either way
+    "flat-yes": book(bids=[(0.45, 10)], asks=[(0.55, 10)]),
+    "flat-no": book(bids=[(0.45, 10)], asks=[(0.55, 10)]),
+}
+MARKETS = [("Buy", "buy-yes", "buy-no"), ("Sell", "sell-yes", "sell-no"), ("Flat", "flat-yes", "flat-no")]
+
+
+class ClobHandler(BaseHTTPRequestHandler):
+    """Stand-in for the CLOB /book endpoint: BOOKS by token_id, a 500 HTML page for "down-*", 404 for the rest."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        token = parse_qs(url.query)["token_id"][0]
+        server = self.server
+        with server.lock:
+            server.requests.append((time.monotonic(), token))
+        time.sleep(server.delay)
+        if url.path != "/book" or token.startswith("down"):
+            status, body, content_type = 500, b"<html>Internal Server Error</html>", "text/html"
+        elif token in BOOKS:
+            status, body, content_type = 200, json.dumps(BOOKS[token]).encode(), "application/json"
+        else:
+            status, body, content_type = 404, b'{"error": "No orderbook exists for the requested token id"}', "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def clob():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ClobHandler)
+    httpd.lock = threading.Lock()
+    httpd.requests = []
+    httpd.delay = 0.0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _scanner(clob, markets=MARKETS, **kwargs):
+    order_book = OrderBook(host=f"http://127.0.0.1:{clob.server_address[1]}", retries=0)
+    found = []
+    scanner = ArbScanner(order_book, markets, on_signal=found.append, **kwargs)
+    return scanner, found
+
+
+def test_scan_once_finds_both_kinds_of_bundle(clob):
+    scanner, found = _scanner(clob)
+    signals = asyncio.run(scanner.scan_once())
+
+    assert signals == found
+    assert sorted((signal.ticker, signal.kind, signal.quantity) for signal in signals) == [("Buy", "BUY", 50), ("Sell", "SELL", 10)]
+    buy = next(signal for signal in signals if signal.kind == "BUY")
+    assert buy.edge == pytest.approx(0.10) and buy.expected_profit == pytest.approx(5.0)
+    assert [(leg.side, leg.price) for leg in buy.signals] == [("YES", 0.40), ("NO", 0.50)]
+    assert sorted(token for _, token in clob.requests) == sorted(BOOKS)
+    assert scanner.errors == 0 and scanner.latency_summary()["fetch"]["count"] == 6
+
+
+def test_failed_books_are_counted_and_skipped(clob, capsys):
+    markets = MARKETS + [("Down", "down-yes", "flat-no"), ("Gone", "gone-yes", "gone-no")]
+    scanner, found = _scanner(clob, markets)
+    signals = asyncio.run(scanner.scan_once())
+
+    # the healthy markets still signal, the broken ones are skipped
+    assert sorted(signal.ticker for signal in signals) == ["Buy", "Sell"]
+    assert scanner.errors == 3
+    assert "Failed to fetch book for down-yes" in capsys.readouterr().out
+
+
+def test_run_loop_scans_every_interval(clob):
+    scanner, found = _scanner(clob)
+    started = time.perf_counter()
+    asyncio.run(scanner.run(interval=0.05, iterations=3))
+
+    assert time.perf_counter() - started >= 0.1
+    assert scanner.latency_summary()["scan"]["count"] == 3
+    assert len(clob.requests) == 3 * len(BOOKS)
+    assert sorted(signal.ticker for signal in found) == ["Buy"] * 3 + ["Sell"] * 3
+
+
+def test_rate_limiter_allows_a_burst_then_paces():
+    async def acquire(limiter, n):
+        times = []
+        for _ in range(n):
+            await limiter.acquire()
+            times.append(time.monotonic())
+        return times
+
+    times = asyncio.run(acquire(RateLimiter(rate=50, burst=5), 15))
+    assert times[4] - times[0] < 0.02
+    # the 10 acquisitions past the burst wait 1 / rate each
+    assert times[-1] - times[0] >= 10 / 50 - 0.01
+
+
+def test_scan_requests_respect_the_rate(clob):
+    markets = [(f"Flat{i}", "flat-yes", "flat-no") for i in range(6)]
+    scanner, _ = _scanner(clob, markets, rate=40, burst=2)
+    asyncio.run(scanner.scan_once())
+
+    sent = sorted(t for t, _ in clob.requests)
+    assert len(sent) == 12
+    assert sent[-1] - sent[0] >= 10 / 40 - 0.02
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtestEngine import BacktestEngine
+from conftest import quiet
+from components import TradeSignal
+from event_feed import events_from_panel, markets_from_panel
+from price_panel import PriceTensor
+from snapshots import SnapshotBuffer
+from strategies.rando import Rando
+from strategies.strategy import Strategy
+
+
+def test_stream_matches_panel_run(panel):
+    expected = quiet(lambda: BacktestEngine(initial_capital=1000).run_panel(panel, Rando(quantity=3)))
+    streamed = quiet(lambda: BacktestEngine(initial_capital=1000).run_stream(
+        events_from_panel(panel), Rando(quantity=3), markets_from_panel(panel)))
+    pd.testing.assert_frame_equal(streamed["snapshots"].to_frame(), expected["snapshots"].to_frame())
+    assert len(streamed["ledger"].Trades) == len(expected["ledger"].Trades) > 0
+
+
+def test_stream_spills_snapshots(panel, tmp_path):
+    expected = quiet(lambda: BacktestEngine(initial_capital=1000).run_stream(
+        events_from_panel(panel), Rando(quantity=3), markets_from_panel(panel)))
+    engine = BacktestEngine(initial_capital=1000)
+    engine.snapshots = SnapshotBuffer(capacity=16, spill_path=str(tmp_path / "spill"), spill_rows=50)
+    quiet(lambda: engine.run_stream(events_from_panel(panel), Rando(quantity=3), markets_from_panel(panel)))
+
+    assert engine.snapshots.spilled == len(expected["snapshots"]) > 50
+    # memory mapped columns, copied for the comparison
+    pd.testing.assert_frame_equal(SnapshotBuffer.load(str(tmp_path / "spill")).to_frame().copy(),
+                                  expected["snapshots"].to_frame())
+
+
+class LookbackRecorder(Rando):
+    """Rando that also records the lookback it is handed, per row or per batch."""
+
+    def __init__(self, batch: bool):
+        super().__init__(quantity=3)
+        self.batch = batch
+        self.seen = []
+
+    @property
+    def has_batch(self):
+        return self.batch
+
+    def compute(self, market_state, ledger):
+        self.seen.append((market_state.timestamp, market_state.token, list(market_state.lookback)))
+        return super().compute(market_state, ledger)
+
+    def compute_batch(self, t, arrays, ledger):
+        self.seen.extend((t, token, list(rows)) for token, rows in zip(arrays.token, arrays.lookback))
+        return super().compute_batch(t, arrays, ledger)
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_stream_hands_the_lookback_to_the_strategy(panel, batch):
+    strategy = LookbackRecorder(batch)
+    engine = BacktestEngine(initial_capital=1000)
+    quiet(lambda: engine.run_stream(events_from_panel(panel), strategy, markets_from_panel(panel), lookback=4))
+
+    assert strategy.seen
+    for t, token, rows in strategy.seen:
+        # the token's own last rows up to this one, at most lookback of them
+        history = panel.xs(token, level="token")
+        history = history[history.index <= t].tail(4)
+        assert [row[0] for row in rows] == history.index.tolist()
+        assert rows[-1][1:] == (history["yes"].iloc[-1], history["no"].iloc[-1])
+    assert set(engine.lookback) == set(panel.index.get_level_values("token"))
+
+
+def test_panel_run_has_no_lookback(panel):
+    strategy = LookbackRecorder(batch=False)
+    strategy.compute = lambda market_state, ledger: strategy.seen.append(market_state.lookback)
+    engine = BacktestEngine(initial_capital=1000)
+    quiet(lambda: engine.run_panel(panel, strategy))
+    assert engine.last_prices == {} and engine.lookback == {}
+    assert set(strategy.seen) == {None}
+
+
+class Extremes(Strategy):
+    """Buys a token's new rolling lows and sells its new highs, per row or as a batch, recording the rows seen."""
+
+    def __init__(self, batch: bool):
+        self.batch = batch
+        self.rows = []
+
+    @property
+    def has_batch(self):
+        return self.batch
+
+    @staticmethod
+    def signal(yes, low, high):
+        if yes <= low:
+            return TradeSignal(action="BUY", side="YES", quantity=3, price=float(yes))
+        if yes >= high:
+            return TradeSignal(action="SELL", side="YES", quantity=2, price=float(yes))
+        return None
+
+    def compute(self, market_state, ledger):
+        self.rows.append((market_state.timestamp, market_state.token, market_state.row))
+        return self.signal(market_state.yes_price, self.features.get("rolling_min", market_state.row, 5),
+                           self.features.get("rolling_max", market_state.row, 5))
+
+    def compute_batch(self, t, arrays, ledger):
+        self.rows.extend((t, token, row) for token, row in zip(arrays.token, arrays.row.tolist()))
+        low = self.features.get("rolling_min", arrays.row, 5)
+        high = self.features.get("rolling_max", arrays.row, 5)
+        signals = np.full(len(arrays), None, dtype=object)
+        for i in np.flatnonzero(arrays.yes_price <= low):
+            signals[i] = TradeSignal(action="BUY", side="YES", quantity=3, price=float(arrays.yes_price[i]))
+        for i in np.flatnonzero((arrays.yes_price >= high) & (arrays.yes_price > low)):
+            signals[i] = TradeSignal(action="SELL", side="YES", quantity=2, price=float(arrays.yes_price[i]))
+        return signals
+
+
+@pytest.fixture(scope="module")
+def tensor(panel, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("tensor"))
+    PriceTensor.from_panel(panel).save(path)
+    return PriceTensor.load(path)
+
+
+@pytest.mark.parametrize("source", ["panel", "tensor"])
+def test_compute_batch_matches_compute(source, request):
+    prices = request.getfixturevalue(source)
+    runs = {}
+    for batch in (False, True):
+        strategy = Extremes(batch)
+        output = quiet(lambda: BacktestEngine(initial_capital=1000).run_panel(prices, strategy))
+        runs[batch] = strategy, output
+    (rows, per_row), (batch_rows, batched) = runs[False], runs[True]
+    assert rows.rows == batch_rows.rows
+    pd.testing.assert_frame_equal(batched["snapshots"].to_frame(), per_row["snapshots"].to_frame())
+    pd.testing.assert_frame_equal(batched["ledger"].Store.to_frame(), per_row["ledger"].Store.to_frame())
+    assert len(per_row["ledger"].Trades) > 0 and not per_row["ledger"].Store.to_frame()["active"].all()
+
+
+def test_panel_and_tensor_runs_agree(panel, tensor):
+    from_panel = quiet(lambda: BacktestEngine(initial_capital=1000).run_panel(panel, Extremes(batch=True)))
+    from_tensor = quiet(lambda: BacktestEngine(initial_capital=1000).run_panel(tensor, Extremes(batch=True)))
+    pd.testing.assert_frame_equal(from_tensor["snapshots"].to_frame(), from_panel["snapshots"].to_frame())
+
+
+def test_row_ids_address_the_panel_and_the_tensor(panel, tensor):
+    strategy = Extremes(batch=True)
+    quiet(lambda: BacktestEngine(initial_capital=1000).run_panel(panel, strategy))
+    assert all(panel.index[row] == (t, token) for t, token, row in strategy.rows)
+    assert len(strategy.rows) == len(panel.dropna(subset=["yes", "no"]))
+
+    strategy = Extremes(batch=False)
+    quiet(lambda: BacktestEngine(initial_capital=1000).run_panel(tensor, strategy))
+    n = len(tensor.tokens)
+    for t, token, row in strategy.rows:
+        # row i * N + j is timestamp i, token j
+        i, j = divmod(row, n)
+        assert tensor.timestamps[i] == t and tensor.tokens["token"][j] == token
+    assert len(strategy.rows) == len(panel.dropna(subset=["yes", "no"]))
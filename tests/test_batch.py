@@ -0,0 +1,32 @@
+from batch import run_batch
+from benchmarks.synthetic import SyntheticOrderBook, synthetic_event
+from conftest import quiet
+
+
+class SyntheticConnector:
+    """Hands out one synthetic event per (date, free), counting the lookups."""
+
+    def __init__(self, events):
+        self.events = events
+        self.calls = []
+
+    def get_app_store_rankings(self, free, date):
+        self.calls.append((date, free))
+        return self.events[(date, free)]
+
+
+def test_duplicate_events_run_once():
+    events, histories = {}, {}
+    for seed, key in enumerate([("december-19", True), ("december-19", False)], start=1):
+        apps, event_histories = synthetic_event(4, 80, seed=seed)
+        events[key] = apps
+        histories.update(event_histories)
+    connector = SyntheticConnector(events)
+    result = quiet(lambda: run_batch(
+        [("december-19", True), ("december-19", False), ("december-19", True)], {"strategy": "rando", "quantity": 5},
+        initial_capital=1000, processes=1, order_book=SyntheticOrderBook(histories), connector=connector))
+
+    assert sorted(connector.calls) == [("december-19", False), ("december-19", True)]
+    assert result["events"]["event"].tolist() == ["free-december-19", "paid-december-19"]
+    assert (result["events"]["status"] == "ok").all()
+    assert list(result["equity"].columns) == ["free-december-19", "paid-december-19", "total_value"]
@@ -0,0 +1,112 @@
+import os
+
+import numpy as np
+import pytest
+
+from book_recorder import FIELDS, BookReader, BookWriter, decode_chunk, encode_chunk
+from fill_models import FillModel, FullFill
+
+
+def record(path, seed=0, depth=3, chunk_rows=16):
+    """
+    A recording where tokens start at different times (the late ones only after several chunks) and snapshot at
+    irregular intervals, returns the snapshots written as (t, token, levels) rows.
+    """
+    rng = np.random.default_rng(seed)
+    writer = BookWriter(str(path), depth=depth, chunk_rows=chunk_rows)
+    tokens = [f"tok{i}" for i in range(6)]
+    starts = {"tok0": 0, "tok1": 0, "tok2": 40, "tok3": 90, "tok4": 400, "tok5": 10 ** 9}
+    written = []
+    for t in range(0, 500, 5):
+        live = [token for token in tokens if starts[token] <= t and rng.random() < 0.7]
+        if not live:
+            continue
+        ids = np.array([writer.token_id(token) for token in live], dtype=np.int32)
+        levels = rng.integers(1, 10000, size=(len(live), len(FIELDS) * depth)).astype(np.int64)
+        writer.append(np.full(len(live), t, dtype=np.int64), ids, levels)
+        written.extend((t, token, row) for token, row in zip(live, levels))
+    writer.close()
+    return written
+
+
+def expected_book(written, token, t):
+    rows = [(time, levels) for time, name, levels in written if name == token and time <= t]
+    return rows[-1] if rows else None
+
+
+def check_reader(reader, written):
+    for token in [f"tok{i}" for i in range(6)] + ["never"]:
+        for t in range(-5, 520, 7):
+            expected = expected_book(written, token, t)
+            book = reader.book_at(token, t)
+            if expected is None:
+                assert book is None
+            else:
+                assert book["timestamp"] == expected[0]
+                assert np.allclose(book["bid_price"] * 10000, expected[1][:reader.depth])
+
+
+def test_chunk_round_trip():
+    t = np.array([1, 1, 2, 3, 3], dtype=np.int64)
+    token = np.array([0, 1, 0, 1, 0], dtype=np.int32)
+    levels = np.array([[1, 2], [3, 4], [1, 5], [3, 4], [6, 5]], dtype=np.int64)
+    decoded_t, decoded_token, decoded_levels = decode_chunk(encode_chunk(t, token, levels))
+    assert (decoded_t == t).all() and (decoded_token == token).all() and (decoded_levels == levels).all()
+
+
+def test_book_at_matches_brute_force(tmp_path):
+    written = record(tmp_path / "books")
+    reader = BookReader(str(tmp_path / "books"))
+    assert len(reader.index) > 8 and len(reader) == len(written)
+    check_reader(reader, written)
+
+
+def test_books_at_matches_book_at(tmp_path):
+    record(tmp_path / "books")
+    reader = BookReader(str(tmp_path / "books"))
+    tokens = ["tok3", "never", "tok0", "tok4", "tok0"]
+    for t in (0, 95, 300, 450):
+        books = reader.books_at(tokens, t)
+        for i, token in enumerate(tokens):
+            book = reader.book_at(token, t)
+            if book is None:
+                assert books["timestamp"][i] == -1 and not books["ask_size"][i].any()
+            else:
+                assert books["timestamp"][i] == book["timestamp"]
+                for name in FIELDS:
+                    assert (books[name][i] == book[name]).all()
+
+
+def test_token_before_its_first_snapshot_decodes_nothing(tmp_path):
+    record(tmp_path / "books")
+    reader = BookReader(str(tmp_path / "books"), cache_chunks=2)
+    assert reader.book_at("tok4", 399) is None
+    assert reader.books_at(["tok4", "tok5", "never"], 399)["timestamp"].tolist() == [-1, -1, -1]
+    assert not reader._cache
+
+    # a late token's first snapshot is one chunk decode away, however many chunks came before it
+    assert reader.book_at("tok4", 499) is not None
+    assert len(reader._cache) == 1
+
+
+def test_recording_without_token_index(tmp_path):
+    written = record(tmp_path / "books")
+    os.remove(tmp_path / "books" / "tokens.bin")
+    check_reader(BookReader(str(tmp_path / "books")), written)
+
+
+def test_refresh_sees_appended_chunks(tmp_path):
+    path = str(tmp_path / "books")
+    writer = BookWriter(path, depth=1, chunk_rows=2)
+    writer.append(np.array([1, 2]), np.array([writer.token_id("a")] * 2, dtype=np.int32), np.ones((2, 4), dtype=np.int64))
+    reader = BookReader(path)
+    assert reader.book_at("b", 10) is None
+    writer.append(np.array([3, 4]), np.array([writer.token_id("b")] * 2, dtype=np.int32), np.full((2, 4), 2, dtype=np.int64))
+    reader.refresh()
+    assert reader.book_at("b", 10)["timestamp"] == 4 and reader.book_at("a", 10)["timestamp"] == 2
+
+
+def test_fill_model_ladders_is_abstract():
+    with pytest.raises(TypeError):
+        FillModel()
+    FullFill()
@@ -0,0 +1,79 @@
+import warnings
+
+import numpy as np
+
+from backtestEngine import BacktestEngine
+from conftest import quiet
+from event_feed import events_from_panel, markets_from_panel
+from features import FEATURES, FeatureStore
+from strategies.strategy import Strategy
+
+
+def reference(panel, window):
+    df = panel.reset_index().sort_values(["token", "t"], kind="stable")
+    yes = df.groupby("token")["yes"]
+    df["return"] = (df["yes"] / yes.shift(1) - 1).replace([np.inf, -np.inf], np.nan)
+    df["volatility"] = df.groupby("token")["return"].transform(lambda r: r.rolling(window, min_periods=2).std())
+    df["rolling_min"] = yes.transform(lambda r: r.rolling(window, min_periods=1).min())
+    df["rolling_max"] = yes.transform(lambda r: r.rolling(window, min_periods=1).max())
+    return df.set_index(["t", "token"]).loc[panel.index]
+
+
+def test_rolling_features_match_pandas(panel):
+    store = FeatureStore(panel, window=7)
+    expected = reference(panel, 7)
+    for name in ("return", "volatility", "rolling_min", "rolling_max"):
+        assert np.allclose(store[name], expected[name].to_numpy(dtype=float), equal_nan=True, atol=1e-8), name
+    assert store.cached == [("return", None), ("volatility", 7), ("rolling_min", 7), ("rolling_max", 7)]
+
+
+def test_zero_price_only_touches_its_own_token(panel):
+    zeroed = panel.copy()
+    token = zeroed.index.get_level_values(1)[0]
+    rows = (zeroed.index.get_level_values(1) == token).nonzero()[0]
+    zeroed.iloc[rows[len(rows) // 2], zeroed.columns.get_loc("yes")] = 0.0
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        store = FeatureStore(zeroed, window=7)
+        returns, volatility = store["return"], store["volatility"]
+    expected = reference(zeroed, 7)
+    assert np.isfinite(returns[~np.isnan(returns)]).all()
+    assert np.allclose(returns, expected["return"].to_numpy(dtype=float), equal_nan=True, atol=1e-8)
+    assert np.allclose(volatility, expected["volatility"].to_numpy(dtype=float), equal_nan=True, atol=1e-8)
+    others = zeroed.index.get_level_values(1) != token
+    assert np.allclose(volatility[others], FeatureStore(panel, window=7)["volatility"][others], equal_nan=True)
+
+
+def test_get_reads_rows_and_nan_for_no_row(panel):
+    store = FeatureStore(panel)
+    column = store["rolling_max"]
+    assert store.get("rolling_max", 5) == column[5]
+    assert np.isnan(store.get("rolling_max", -1))
+    values = store.get("rolling_max", np.array([0, -1, 7]))
+    assert values[0] == column[0] and np.isnan(values[1]) and values[2] == column[7]
+
+
+class FeatureReader(Strategy):
+    def __init__(self):
+        self.seen = []
+
+    def compute(self, market_state, ledger):
+        self.seen.append((market_state.row, self.features and self.features.get("fraction_elapsed", market_state.row)))
+        return None
+
+
+def test_panel_run_sets_features_and_stream_clears_them(panel):
+    strategy = FeatureReader()
+    quiet(lambda: BacktestEngine(initial_capital=100).run_panel(panel, strategy))
+    assert isinstance(strategy.features, FeatureStore) and strategy.features.prices is panel
+    column = strategy.features["fraction_elapsed"]
+    rows = np.array([row for row, _ in strategy.seen])
+    assert np.allclose([value for _, value in strategy.seen], column[rows], equal_nan=True)
+    assert set(FEATURES) >= {name for name, _ in strategy.features.cached}
+
+    # the same strategy streamed afterwards must not read the panel's store with row -1
+    strategy.seen.clear()
+    quiet(lambda: BacktestEngine(initial_capital=100).run_stream(events_from_panel(panel), strategy, markets_from_panel(panel)))
+    assert strategy.features is None
+    assert strategy.seen and {row for row, _ in strategy.seen} == {-1}
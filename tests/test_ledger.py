@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import START_TS, DataclassLedger, sell_heavy_orders
+from components import Ledger, TradeSignal
+from conftest import quiet
+from trade_store import NO_TIME
+
+
+def mixed_orders(n, seed=0, n_tickers=4):
+    # BUYs and SELLs interleaved on a few tickers, with SELLs large enough to split lots, close several and oversell
+    rng = np.random.default_rng(seed)
+    orders = []
+    for i in range(n):
+        action = "SELL" if rng.random() < 0.45 else "BUY"
+        quantity = int(rng.integers(1, 40 if action == "SELL" else 20))
+        signal = TradeSignal(action, ("YES", "NO")[int(rng.integers(2))], quantity, float(rng.uniform(0.05, 0.95)))
+        orders.append((signal, f"App {int(rng.integers(n_tickers))}", START_TS + i))
+    return orders
+
+
+def rich_ledger():
+    ledger = Ledger()
+    ledger.LiquidValue = 1e9
+    return ledger
+
+
+def fills(ledger):
+    return [(trade.Ticker.Name, trade.YesOrNo, trade.NumberOfContracts, trade.PurchasePrice, trade.CurrentPrice,
+             trade.PurchaseTime, trade.SaleTime, trade.isActive) for trade in ledger.Trades]
+
+
+@pytest.mark.parametrize("orders, rejects", [(mixed_orders(3000, seed=1), True),
+                                             (sell_heavy_orders(500, n_tickers=7, seed=2), False)],
+                         ids=["mixed", "sell_heavy"])
+def test_matches_the_dataclass_ledger(orders, rejects):
+    ledger, baseline = rich_ledger(), DataclassLedger()
+    accepted = quiet(lambda: [ledger.executeTrade(signal, ticker, t) for signal, ticker, t in orders])
+    assert accepted == [baseline.executeTrade(signal, ticker, t) for signal, ticker, t in orders]
+    assert (False in accepted) == rejects
+
+    assert fills(ledger) == fills(baseline)
+    open_quantity = {(ticker, side): lots.quantity for ticker, sides in ledger.OpenLots.items() for side, lots in sides.items()}
+    assert open_quantity == {key: quantity for key, quantity in baseline.open_quantity.items() if quantity}
+    assert ledger.ActiveTrades == sum(trade.isActive for trade in baseline.Trades)
+
+
+def test_fifo_partial_sell_splits_the_oldest_open_lot():
+    ledger = rich_ledger()
+    for price, quantity, t in ((0.2, 5, START_TS), (0.3, 3, START_TS + 1), (0.4, 4, START_TS + 2)):
+        assert ledger.executeTrade(TradeSignal("BUY", "YES", quantity, price), "App", t)
+    liquid = ledger.LiquidValue
+    assert ledger.executeTrade(TradeSignal("SELL", "YES", 6, 0.5), "App", START_TS + 10)
+
+    assert fills(ledger) == [
+        ("App", "YES", 5, 0.2, 0.5, START_TS, START_TS + 10, False),        # closed whole
+        ("App", "YES", 2, 0.3, 0.3, START_TS + 1, None, True),              # what is left of the split lot
+        ("App", "YES", 4, 0.4, 0.4, START_TS + 2, None, True),
+        ("App", "YES", 1, 0.3, 0.5, START_TS + 1, START_TS + 10, False),    # the sold piece of it
+    ]
+    assert ledger.LiquidValue == pytest.approx(liquid + 6 * 0.5)
+    assert list(ledger.OpenLots["App"]["YES"].open_rows()) == [1, 2]
+    assert ledger.OpenLots["App"]["YES"].quantity == 6 and ledger.ActiveTrades == 2
+
+
+def test_oversell_and_unknown_lots_are_rejected_untouched():
+    ledger = rich_ledger()
+    ledger.executeTrade(TradeSignal("BUY", "NO", 4, 0.6), "App", START_TS)
+    before = (fills(ledger), ledger.LiquidValue, ledger.PositionValue, ledger.ActiveTrades)
+    assert not quiet(lambda: ledger.executeTrade(TradeSignal("SELL", "NO", 5, 0.7), "App", START_TS + 1))
+    assert not quiet(lambda: ledger.executeTrade(TradeSignal("SELL", "YES", 1, 0.7), "App", START_TS + 1))
+    assert not quiet(lambda: ledger.executeTrade(TradeSignal("SELL", "NO", 1, 0.7), "Other", START_TS + 1))
+    assert (fills(ledger), ledger.LiquidValue, ledger.PositionValue, ledger.ActiveTrades) == before
+
+    # selling everything clears the lot index
+    assert ledger.executeTrade(TradeSignal("SELL", "NO", 4, 0.7), "App", START_TS + 2)
+    assert ledger.OpenLots == {} and ledger.ActiveTrades == 0 and ledger.PositionValue == pytest.approx(0.0)
+
+
+def test_running_totals_match_recompute_totals():
+    ledger = rich_ledger()
+    rng = np.random.default_rng(3)
+    for k, (signal, ticker, t) in enumerate(mixed_orders(2000, seed=4)):
+        quiet(lambda: ledger.executeTrade(signal, ticker, t))
+        if k % 7 == 0:
+            ledger.mark_to_market({ticker: (float(rng.uniform(0.05, 0.95)), float(rng.uniform(0.05, 0.95)))}, t)
+    running = (ledger.PositionValue, ledger.Profit, ledger.ActiveTrades)
+
+    frame = ledger.Store.to_frame()
+    active = frame[frame["active"]]
+    position_value = float((active["current_price"] * active["quantity"]).sum())
+    profit = float(((active["current_price"] - active["purchase_price"]) * active["quantity"]).sum())
+
+    ledger.recompute_totals()
+    assert running == pytest.approx((ledger.PositionValue, ledger.Profit, ledger.ActiveTrades))
+    assert (ledger.PositionValue, ledger.Profit, ledger.ActiveTrades) == pytest.approx((position_value, profit, len(active)))
+    for sides in ledger.OpenLots.values():
+        for lots in sides.values():
+            rows = lots.open_rows()
+            assert lots.quantity == int(frame["quantity"].to_numpy()[rows].sum())
+
+
+def test_to_frame_matches_the_trade_views():
+    ledger = rich_ledger()
+    quiet(lambda: [ledger.executeTrade(signal, ticker, t) for signal, ticker, t in mixed_orders(300, seed=5)])
+    frame = ledger.Store.to_frame()
+    assert len(frame) == len(ledger.Trades)
+    rows = [(ticker, side, quantity, purchase, current, None if purchased == NO_TIME else purchased,
+             None if sold == NO_TIME else sold, active)
+            for ticker, side, quantity, purchase, current, purchased, sold, active in zip(
+                frame["ticker"], frame["side"], frame["quantity"], frame["purchase_price"], frame["current_price"],
+                frame["purchase_time"], frame["sale_time"], frame["active"])]
+    assert rows == fills(ledger)
+    assert set(frame["side"].cat.categories) == {"YES", "NO"}
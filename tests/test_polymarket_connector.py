@@ -0,0 +1,120 @@
+import json
+import socket
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from polymarket_connector import OrderBook
+from price_cache import PriceHistoryCache
+
+
+class PricesHistoryHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the CLOB /prices-history endpoint, the market token picks the behaviour:
+      slow-<ms>-<k>   answers after <ms> milliseconds
+      flaky-<n>-<k>   answers 429 to its first <n> requests, then the history
+      down-<k>        always answers 503 with an HTML page
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        token = parse_qs(url.query)["market"][0]
+        server = self.server
+        with server.lock:
+            server.requests[token] = server.requests.get(token, 0) + 1
+            count = server.requests[token]
+
+        kind, *args = token.split("-")
+        if kind == "slow":
+            time.sleep(int(args[0]) / 1000)
+        elif kind == "flaky" and count <= int(args[0]):
+            return self._send(429, b'{"error": "rate limited"}', "application/json")
+        elif kind == "down":
+            return self._send(503, b"<html><body>503 Service Unavailable</body></html>", "text/html")
+        body = json.dumps({"history": [{"t": 1, "p": 0.5}, {"t": 2, "p": 0.6}], "token": token}).encode()
+        self._send(200, body, "application/json")
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), PricesHistoryHandler)
+    httpd.lock = threading.Lock()
+    httpd.requests = {}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _order_book(server, **kwargs):
+    return OrderBook(host=f"http://127.0.0.1:{server.server_address[1]}", backoff=0.01, **kwargs)
+
+
+def test_batch_keeps_request_order_whatever_the_delays(server):
+    # later requests answer first
+    tokens = [f"slow-{delay}-{i}" for i, delay in enumerate([120, 80, 40, 0, 60, 20, 100, 10])]
+    results = _order_book(server).get_historical_prices_batch([{"market": token} for token in tokens], max_workers=8)
+    assert [result["token"] for result in results] == tokens
+
+
+def test_rate_limited_requests_are_retried(server):
+    tokens = ["flaky-2-0", "slow-0-1", "flaky-1-2"]
+    results = _order_book(server, retries=3).get_historical_prices_batch([{"market": token} for token in tokens])
+    assert [result["token"] for result in results] == tokens
+    assert server.requests == {"flaky-2-0": 3, "slow-0-1": 1, "flaky-1-2": 2}
+
+
+def test_exhausted_retries_return_an_error_dict(server):
+    tokens = ["slow-0-0", "down-1", "flaky-9-2", "slow-0-3"]
+    results = _order_book(server, retries=2).get_historical_prices_batch([{"market": token} for token in tokens])
+
+    assert [result.get("token") for result in results] == ["slow-0-0", None, None, "slow-0-3"]
+    assert results[1]["status"] == 503 and "history" not in results[1]
+    assert results[2]["status"] == 429 and "history" not in results[2]
+    assert server.requests["down-1"] == 3 and server.requests["flaky-9-2"] == 3
+
+
+def test_cache_does_not_record_failed_requests(server, tmp_path):
+    cache = PriceHistoryCache(str(tmp_path / "prices.sqlite"), safety_lag=0)
+    order_book = _order_book(server, retries=0, cache=cache)
+    params = {"market": "flaky-1-0", "startTs": 0, "endTs": 10}
+
+    assert "history" not in order_book.get_historical_prices(params)
+    assert order_book.get_historical_prices(params)["history"] == [{"t": 1, "p": 0.5}, {"t": 2, "p": 0.6}]
+    assert order_book.get_historical_prices(params)["history"] == [{"t": 1, "p": 0.5}, {"t": 2, "p": 0.6}]
+    assert server.requests["flaky-1-0"] == 2
+    cache.close()
+
+
+def test_stalled_request_times_out_without_stopping_the_batch(server):
+    tokens = ["slow-0-0", "slow-3000-1", "slow-0-2"]
+    started = time.perf_counter()
+    results = _order_book(server, retries=0, timeout=0.3).get_historical_prices_batch([{"market": token} for token in tokens])
+    assert time.perf_counter() - started < 2
+    assert [result.get("token") for result in results] == ["slow-0-0", None, "slow-0-2"]
+    assert "history" not in results[1] and "Timeout" in results[1]["error"]
+
+
+@pytest.mark.parametrize("retries", [0, 2])
+def test_unreachable_host_returns_error_dicts(retries):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]    # nothing listens here once the socket is closed
+    order_book = OrderBook(host=f"http://127.0.0.1:{port}", retries=retries, backoff=0.01, timeout=1)
+    results = order_book.get_historical_prices_batch([{"market": "a"}, {"market": "b"}])
+    assert all("history" not in result and "ConnectionError" in result["error"] for result in results)
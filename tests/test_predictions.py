@@ -0,0 +1,16 @@
+from predictions import _connector, _order_book, build_parser
+
+
+def test_price_and_event_caches_use_separate_files(tmp_path):
+    cache = str(tmp_path / "prices.sqlite")
+    args = build_parser().parse_args(["backtest", "--date", "december-19", "--cache", cache])
+    order_book, connector = _order_book(args), _connector(args)
+    assert order_book.cache.path == cache
+    assert connector.cache.path == f"{cache}.events"
+
+    before = order_book.cache.size_bytes()
+    event = {"id": "1", "closed": False, "markets": [{"question": "x" * 10_000}]}
+    connector.cache.get_event("an-event", lambda headers: (200, event, {}))
+    assert order_book.cache.size_bytes() == before
+    order_book.cache.close()
+    connector.cache.close()
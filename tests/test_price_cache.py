@@ -0,0 +1,88 @@
+import time
+
+from price_cache import PriceHistoryCache, merge_ranges, missing_ranges
+
+
+class FakeEndpoint:
+    """Serves /prices-history from a dict of token -> {t: p}, counting calls."""
+
+    def __init__(self, points):
+        self.points = points
+        self.calls = []
+
+    def __call__(self, params):
+        self.calls.append((params["startTs"], params["endTs"]))
+        series = self.points.get(params["market"], {})
+        return {"history": [{"t": t, "p": p} for t, p in sorted(series.items())
+                            if params["startTs"] <= t <= params["endTs"]]}
+
+
+def test_missing_and_merged_ranges():
+    assert missing_ranges([(10, 20), (30, 40)], 0, 50) == [(0, 9), (21, 29), (41, 50)]
+    assert missing_ranges([(0, 50)], 10, 20) == []
+    assert merge_ranges([(30, 40), (10, 20), (21, 25)]) == [(10, 25), (30, 40)]
+
+
+def test_past_range_is_served_from_cache(tmp_path):
+    cache = PriceHistoryCache(str(tmp_path / "prices.sqlite"))
+    endpoint = FakeEndpoint({"a": {100: 0.1, 200: 0.2, 300: 0.3}})
+    params = {"market": "a", "interval": "max", "startTs": 100, "endTs": 250}
+
+    assert cache.get_history(params, endpoint) == {"history": [{"t": 100, "p": 0.1}, {"t": 200, "p": 0.2}]}
+    assert cache.get_history(params, endpoint)["history"] == [{"t": 100, "p": 0.1}, {"t": 200, "p": 0.2}]
+    assert len(endpoint.calls) == 1 and cache.hits == 1
+
+    # only the part past the covered range is fetched
+    cache.get_history({**params, "endTs": 400}, endpoint)
+    assert endpoint.calls[-1] == (251, 400)
+    cache.close()
+
+
+def test_open_market_range_near_now_is_refetched(tmp_path):
+    now = int(time.time())
+    cache = PriceHistoryCache(str(tmp_path / "prices.sqlite"), safety_lag=300)
+    endpoint = FakeEndpoint({"a": {now - 1000: 0.4}})
+    params = {"market": "a", "interval": "max", "startTs": now - 3600, "endTs": now + 3600}
+
+    assert [point["t"] for point in cache.get_history(params, endpoint)["history"]] == [now - 1000]
+    # a point arriving after the first request is not hidden by a stale hit
+    endpoint.points["a"][now + 10] = 0.5
+    assert [point["t"] for point in cache.get_history(params, endpoint)["history"]] == [now - 1000, now + 10]
+    assert cache.hits == 0
+    # and only the unsettled tail was asked for again
+    lo, hi = endpoint.calls[-1]
+    assert now - 300 - 5 <= lo <= now - 300 + 5 and hi == now + 3600
+    cache.close()
+
+
+def test_settled_market_records_the_full_range(tmp_path):
+    now = int(time.time())
+    cache = PriceHistoryCache(str(tmp_path / "prices.sqlite"), safety_lag=300)
+    cache.mark_immutable("a", settled_ts=now - 10)
+    endpoint = FakeEndpoint({"a": {now - 100: 0.9, now - 20: 1.0}})
+    params = {"market": "a", "interval": "max", "startTs": now - 3600, "endTs": now + 3600}
+
+    first = cache.get_history(params, endpoint)
+    assert cache.get_history(params, endpoint) == first
+    assert len(endpoint.calls) == 1 and endpoint.calls[0][1] == now - 10
+    assert cache.hits == 1
+    cache.close()
+
+
+def test_failed_fill_returns_the_cached_part(tmp_path):
+    cache = PriceHistoryCache(str(tmp_path / "prices.sqlite"))
+    endpoint = FakeEndpoint({"a": {100: 0.1, 200: 0.2, 300: 0.3}})
+    params = {"market": "a", "interval": "max", "startTs": 100, "endTs": 250}
+    cache.get_history(params, endpoint)
+
+    down = lambda params: {"error": "503 for /prices-history", "status": 503}
+    partial = cache.get_history({**params, "endTs": 400}, down)
+    assert partial == {"error": "503 for /prices-history", "status": 503,
+                       "history": [{"t": 100, "p": 0.1}, {"t": 200, "p": 0.2}]}
+    # nothing cached for the request, the error alone
+    assert cache.get_history({**params, "startTs": 500, "endTs": 600}, down) == {"error": "503 for /prices-history", "status": 503}
+
+    # the failed range was not recorded, it is fetched once the endpoint is back
+    assert [point["t"] for point in cache.get_history({**params, "endTs": 400}, endpoint)["history"]] == [100, 200, 300]
+    assert endpoint.calls[-1] == (251, 400)
+    cache.close()
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_panel import PriceTensor, add_implied_columns, assemble_price_panel, empty_panel, implied_columns
+
+
+def reference_panel(markets, histories, ffill):
+    """The panel as build_price_panel made it before assemble_price_panel: pivot_table then groupby().ffill()."""
+    prices = []
+    for i, (ticker, yes_token, no_token) in enumerate(markets):
+        for side, response in (("yes", histories[2 * i]), ("no", histories[2 * i + 1])):
+            for record in response.get("history", []):
+                prices.append({"t": int(record["t"]), "price": float(record["p"]), "side": side, "ticker": ticker,
+                               "token": yes_token, "yes_token": yes_token, "no_token": no_token})
+    df = pd.DataFrame(prices)
+    price_wide = df.pivot_table(index=["t", "token"], columns="side", values="price", aggfunc="last").sort_index()
+    meta = (
+        df.sort_values("t")
+        .drop_duplicates(subset=["token"], keep="last")[["token", "ticker", "yes_token", "no_token"]]
+        .set_index("token")
+    )
+    out = price_wide.reset_index().join(meta, on="token").set_index(["t", "token"]).sort_index()
+    if ffill:
+        out = out.groupby(level="token", group_keys=False).apply(lambda g: g.ffill())
+    return out
+
+
+def synthetic_histories(n_markets, n_points, seed):
+    # overlapping timestamps across tokens, one side sometimes missing, duplicate (t, token) points in some histories
+    rng = np.random.default_rng(seed)
+    base = np.sort(rng.choice(np.arange(1_700_000_000, 1_700_000_000 + n_points * 40), n_points * 2, replace=False))
+    markets, histories = [], []
+    for k in range(n_markets):
+        markets.append((f"App{k}", f"yes{rng.integers(10 ** 9)}", f"no{k}"))
+        for _ in range(2):
+            t = np.sort(rng.choice(base, int(n_points * rng.uniform(0.3, 1)), replace=False))
+            if rng.random() < 0.5:
+                t = np.sort(np.concatenate([t, rng.choice(t, 5)]))
+            history = [{"t": int(x), "p": round(float(rng.random()), 3)} for x in t]
+            histories.append({"history": history} if rng.random() > 0.1 else {})
+    return markets, histories
+
+
+@pytest.mark.parametrize("ffill", [False, True])
+@pytest.mark.parametrize("n_markets, n_points, seed", [(3, 20, 0), (12, 300, 1), (30, 1000, 2)])
+def test_matches_pivot_table_reference(n_markets, n_points, seed, ffill):
+    markets, histories = synthetic_histories(n_markets, n_points, seed)
+    pd.testing.assert_frame_equal(assemble_price_panel(markets, histories, ffill),
+                                  reference_panel(markets, histories, ffill))
+
+
+@pytest.mark.parametrize("ffill", [False, True])
+def test_duplicate_points_keep_the_last_one(ffill):
+    markets = [("Threads", "a", "a-no"), ("ChatGPT", "b", "b-no")]
+    histories = [
+        {"history": [{"t": 10, "p": 0.2}, {"t": 10, "p": 0.3}, {"t": 30, "p": 0.4}]},
+        {"history": [{"t": 20, "p": 0.7}, {"t": 20, "p": 0.6}]},
+        {"history": [{"t": 30, "p": 0.5}, {"t": 10, "p": 0.1}, {"t": 30, "p": 0.55}]},
+        {},
+    ]
+    panel = assemble_price_panel(markets, histories, ffill)
+    pd.testing.assert_frame_equal(panel, reference_panel(markets, histories, ffill))
+    assert panel.loc[(10, "a"), "yes"] == 0.3 and panel.loc[(30, "b"), "yes"] == 0.55
+    assert (panel.loc[(30, "a"), "no"] == 0.6) == ffill
+
+
+def test_no_points_give_the_empty_panel():
+    panel = assemble_price_panel([("Threads", "a", "a-no")], [{}, {"history": []}], ffill=True)
+    pd.testing.assert_frame_equal(panel, empty_panel())
+
+
+def test_implied_columns_with_ties_and_nan():
+    t = np.array([1, 1, 1, 1, 2, 2, 3, 3])
+    yes = np.array([0.5, 0.3, 0.5, np.nan, 0.2, 0.2, np.nan, np.nan])
+    columns = implied_columns(t, yes)
+    # tied prices share the best place, the next price skips past them, NaN prices take no place
+    np.testing.assert_array_equal(columns["implied_rank"], [1, 3, 1, np.nan, 1, 1, np.nan, np.nan])
+    np.testing.assert_allclose(columns["implied_prob"], [0.5 / 1.3, 0.3 / 1.3, 0.5 / 1.3, np.nan, 0.5, 0.5, np.nan, np.nan])
+    np.testing.assert_allclose(columns["overround"], [0.3, 0.3, 0.3, 0.3, -0.6, -0.6, np.nan, np.nan])
+
+
+def test_implied_columns_match_pandas_ranks():
+    rng = np.random.default_rng(0)
+    t = rng.integers(0, 200, 5000)    # unsorted timestamps
+    yes = rng.integers(1, 40, 5000) / 40    # plenty of ties
+    yes[rng.random(5000) < 0.1] = np.nan
+    frame = pd.DataFrame({"t": t, "yes": yes})
+    by_t = frame.groupby("t")["yes"]
+
+    columns = implied_columns(t, yes)
+    np.testing.assert_array_equal(columns["implied_rank"], by_t.rank(method="min", ascending=False).to_numpy())
+    np.testing.assert_allclose(columns["implied_prob"], (frame["yes"] / by_t.transform("sum")).to_numpy())
+    np.testing.assert_allclose(columns["overround"], by_t.transform(lambda s: s.sum() - 1 if s.notna().any() else np.nan).to_numpy())
+
+
+def test_tensor_round_trips_through_save_and_load(panel, tmp_path):
+    panel = add_implied_columns(panel.copy())
+    assert "windows" in panel.attrs and "implied_rank" in panel.columns
+
+    PriceTensor.from_panel(panel).save(str(tmp_path))
+    tensor = PriceTensor.load(str(tmp_path))
+    assert isinstance(tensor.prices, np.memmap)
+    assert tensor.prices.shape == (panel.index.get_level_values("t").nunique(), panel.index.get_level_values("token").nunique(), 2)
+
+    back = tensor.to_panel()
+    assert list(back.columns) == list(panel.columns) and back.attrs["windows"] == panel.attrs["windows"]
+    # tick prices come back exactly, the float32 value columns to float32 precision
+    pd.testing.assert_frame_equal(back[["no", "yes", "ticker", "yes_token", "no_token"]],
+                                  panel[["no", "yes", "ticker", "yes_token", "no_token"]], check_exact=True)
+    pd.testing.assert_frame_equal(back, panel, rtol=1e-6)
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import quiet
+from rank_collector import RankStore
+from rank_join import NameIndex, add_real_rank, asof_lookup
+
+
+def reference_asof(row_key, row_t, key, t, values, tolerance=None):
+    rows = pd.DataFrame({"key": row_key, "t": row_t, "position": np.arange(len(row_t))}).sort_values("t")
+    series = pd.DataFrame({"key": key, "t": t, "value": values}).sort_values("t", kind="stable")
+    joined = pd.merge_asof(rows, series, on="t", by="key", tolerance=tolerance)
+    out = joined.sort_values("position")["value"].to_numpy(dtype=float, copy=True)
+    out[row_key < 0] = np.nan
+    return out
+
+
+def test_asof_lookup_before_at_and_after_scrapes():
+    key, t, values = np.array([0, 0, 1]), np.array([100, 200, 150]), np.array([5.0, 3.0, 9.0])
+    row_key = np.array([0, 0, 0, 0, 1, 1, -1, 2])
+    row_t = np.array([99, 100, 199, 500, 149, 150, 200, 300])
+    out = asof_lookup(row_key, row_t, key, t, values)
+    # before the first scrape, exactly at it, between scrapes, long after, other keys, unmatched, never scraped
+    np.testing.assert_array_equal(out, [np.nan, 5.0, 5.0, 3.0, np.nan, 9.0, np.nan, np.nan])
+
+    stale = asof_lookup(row_key, row_t, key, t, values, tolerance=50)
+    np.testing.assert_array_equal(stale, [np.nan, 5.0, np.nan, np.nan, np.nan, 9.0, np.nan, np.nan])
+    assert np.isnan(asof_lookup(row_key, row_t, key[:0], t[:0], values[:0])).all()
+
+
+@pytest.mark.parametrize("tolerance", [None, 300])
+def test_asof_lookup_matches_merge_asof(tolerance):
+    rng = np.random.default_rng(0)
+    key, t = rng.integers(0, 30, 5000), np.sort(rng.integers(0, 100_000, 5000))
+    values = rng.integers(1, 200, 5000).astype(float)
+    row_key, row_t = rng.integers(-1, 40, 3000), rng.integers(-1000, 110_000, 3000)    # unsorted rows
+    np.testing.assert_array_equal(asof_lookup(row_key, row_t, key, t, values, tolerance),
+                                  reference_asof(row_key, row_t, key, t, values, tolerance))
+
+
+def test_name_index_matches_app_store_names():
+    index = NameIndex(["ChatGPT", "Threads, an Instagram app", "Google Gemini", "CapCut - Video Editor"],
+                      aliases={"Meta": "Threads, an Instagram app"})
+    assert index.match("Chat GPT") == 0
+    assert index.match("Threads") == 1 and index.match("Meta") == 1
+    assert index.match("Google Gemini AI") == 2
+    assert index.match("capcut video editor") == 3
+    assert index.match("Temu") is None and index.match(None) is None
+
+
+@pytest.fixture
+def ranks(tmp_path):
+    store = RankStore(str(tmp_path / "ranks"))
+    for t, free, paid in ((1000, [(1, 11, "ChatGPT"), (2, 12, "Threads, an Instagram app")], [(1, 12, "Threads, an Instagram app")]),
+                          (1060, [(1, 12, "Threads, an Instagram app"), (2, 11, "ChatGPT")], [(1, 11, "ChatGPT")])):
+        store.append(t, "free", free)
+        store.append(t, "paid", paid)
+    store.close()
+    store.refresh()
+    return store
+
+
+def small_panel():
+    t = [990, 990, 1000, 1000, 1030, 1030, 1060, 1060, 2000]
+    token = ["a", "b"] * 4 + ["c"]
+    ticker = {"a": "ChatGPT", "b": "Threads", "c": "Temu"}
+    return pd.DataFrame({"yes": 0.5, "ticker": [ticker[k] for k in token]},
+                        index=pd.MultiIndex.from_arrays([t, token], names=["t", "token"]))
+
+
+def test_add_real_rank_keeps_charts_apart(ranks):
+    free = quiet(lambda: add_real_rank(small_panel(), ranks, chart="free"))["real_rank"].to_numpy()
+    paid = quiet(lambda: add_real_rank(small_panel(), ranks, chart="paid"))["real_rank"].to_numpy()
+    # rows before the first scrape have no rank, Temu is on no chart
+    np.testing.assert_array_equal(free, [np.nan, np.nan, 1, 2, 1, 2, 2, 1, np.nan])
+    np.testing.assert_array_equal(paid, [np.nan, np.nan, np.nan, 1, np.nan, 1, 1, 1, np.nan])
+
+
+def test_add_real_rank_from_a_fixture_frame(ranks):
+    frame = pd.DataFrame({"t": ranks.rows["t"], "name": [ranks.names[i] for i in ranks.rows["name"]],
+                          "rank": ranks.rows["rank"], "chart": np.where(ranks.rows["chart"] == 0, "free", "paid")})
+    from_store = quiet(lambda: add_real_rank(small_panel(), ranks, chart="paid", tolerance=30))
+    from_frame = quiet(lambda: add_real_rank(small_panel(), frame, chart="paid", tolerance=30))
+    pd.testing.assert_frame_equal(from_frame, from_store)
+    # Threads' paid rank from the 1000 scrape is 30s old at 1030, too old by 1060
+    np.testing.assert_array_equal(from_store["real_rank"].to_numpy(), [np.nan, np.nan, np.nan, 1, np.nan, 1, 1, np.nan, np.nan])
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from backtestEngine import BacktestEngine
+from conftest import quiet
+from sweep import SUMMARY_COLUMNS, build_strategy, grid, max_drawdown, run_sweep, summarize
+
+
+def test_empty_sweep_returns_an_empty_frame(panel):
+    results = run_sweep([], panel)
+    assert results.empty and list(results.columns) == ["strategy", *SUMMARY_COLUMNS]
+
+
+def test_sweep_matches_single_runs(panel):
+    configs = grid("rando", quantity=[5, 20], threshold=[0.99, 1.01])
+    results = run_sweep(configs, panel, initial_capital=1000, processes=2)
+
+    assert list(results.columns) == ["strategy", "quantity", "threshold", *SUMMARY_COLUMNS]
+    for config, (_, row) in zip(configs, results.iterrows()):
+        output = quiet(lambda: BacktestEngine(initial_capital=1000).run_panel(panel, build_strategy(config)))
+        expected = summarize(output, 1000)
+        assert row["quantity"] == config["quantity"] and row["threshold"] == config["threshold"]
+        assert row["final_total_value"] == pytest.approx(expected["final_total_value"])
+        assert row["num_trades"] == expected["num_trades"]
+
+
+def test_max_drawdown():
+    assert max_drawdown(np.array([100.0, 120.0, 90.0, 130.0, 117.0])) == pytest.approx(0.25)
+    assert max_drawdown(np.array([])) == 0.0
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from conftest import quiet
+from polymarket_connector import OrderBook
+from transport import RECORD, REPLAY, Archive, Transport, request_key
+
+
+class FakeResponse:
+    def __init__(self, url, status_code, body, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = body
+        self.headers = headers or {"Content-Type": "application/json", "Date": "today"}
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+
+class FakeSession:
+    """Answers every GET with a JSON echo of the request, counting the calls that reach it."""
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.calls = 0
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        self.calls += 1
+        body = json.dumps({"url": url, "params": params, "call": self.calls}).encode()
+        return FakeResponse(url, self.status_code, body)
+
+
+def test_record_then_replay_serves_the_recorded_responses(tmp_path):
+    session = FakeSession()
+    with Transport(RECORD, str(tmp_path), session=session) as transport:
+        first = transport.get("https://x/prices-history", params={"market": "a", "fidelity": 1})
+        transport.get("https://x/prices-history", params={"market": "b"})
+        transport.get("https://x/prices-history", params={"market": "a", "fidelity": 1})    # recorded again, newer
+    assert session.calls == 3 and first.status_code == 200
+
+    with Transport(REPLAY, str(tmp_path)) as replay:
+        # params in any order make the same request
+        response = replay.get("https://x/prices-history", params={"fidelity": 1, "market": "a"})
+        assert response.status_code == 200 and response.ok
+        assert response.json()["call"] == 3
+        assert response.headers == {"Content-Type": "application/json"}
+        assert replay.get("https://x/prices-history", params={"market": "b"}).json()["call"] == 2
+        assert len(replay.archive) == 2 and replay.misses == 0
+
+
+def test_replay_miss_is_a_404_error_body(tmp_path):
+    with Transport(RECORD, str(tmp_path), session=FakeSession()) as transport:
+        transport.get("https://x/book", params={"token_id": "a"})
+
+    with Transport(REPLAY, str(tmp_path)) as replay:
+        missed = quiet(lambda: replay.get("https://x/book", params={"token_id": "b"}))
+        assert missed.status_code == 404 and not missed.ok
+        assert missed.json() == {"error": f"not recorded: {request_key('https://x/book', {'token_id': 'b'})}"}
+        with pytest.raises(RuntimeError):
+            missed.raise_for_status()
+        assert replay.misses == 1 and replay.requests == 1
+
+
+def test_replay_miss_becomes_an_error_dict_in_the_connector(tmp_path):
+    params = {"market": "a", "startTs": 1, "endTs": 2, "fidelity": 1}
+    session = FakeSession()
+    with Transport(RECORD, str(tmp_path), session=session) as transport:
+        recorded = OrderBook(host="https://x", transport=transport).get_historical_prices(params)
+
+    with Transport(REPLAY, str(tmp_path)) as replay:
+        book = OrderBook(host="https://x", transport=replay)
+        assert book.get_historical_prices(params) == recorded
+        missed = quiet(lambda: book.get_historical_prices({**params, "market": "b"}))
+    assert "history" not in missed and missed["status"] == 404
+    assert session.calls == 1
+
+
+def test_errors_are_recorded_and_interrupted_recordings_stay_readable(tmp_path):
+    transport = Transport(RECORD, str(tmp_path), session=FakeSession(status_code=503))
+    transport.get("https://x/book", params={"token_id": "a"})
+    # no close(): the index is still in append order
+    archive = Archive(str(tmp_path))
+    assert archive.get(request_key("https://x/book", {"token_id": "a"})).status_code == 503
+    assert archive.get(request_key("https://x/book", {"token_id": "b"})) is None
+    archive.close()
+    transport.close()
+
+    with pytest.raises(FileNotFoundError):
+        Archive(str(tmp_path / "missing"))
+    with pytest.raises(ValueError):
+        Transport(REPLAY)
@@ -0,0 +1,169 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+NO_TIME = np.iinfo(np.uint32).max    # sentinel for a missing purchase/sale time
+_GROWTH = 1.5
+
+
+class TradeStore:
+    """
+    Array-backed trade columns, one row per fill (partial-sell splits included).
+
+    Notes:
+        - tickers and sides are interned, rows hold small integer ids into self.tickers / self.sides
+        - times are epoch seconds stored as uint32, NO_TIME marks a missing purchase/sale time
+        - current_price is the last marked price while a row is active, and the exit price once it is closed
+        - per-ticker state (yes/no price, ranks, last update) lives in a separate table indexed by ticker id
+        - columns are over-allocated, only the first len(store) rows are meaningful
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.ticker_id = np.zeros(capacity, dtype=np.int32)
+        self.side = np.zeros(capacity, dtype=np.int8)
+        self.quantity = np.zeros(capacity, dtype=np.int32)
+        self.purchase_price = np.zeros(capacity, dtype=np.float64)
+        self.current_price = np.zeros(capacity, dtype=np.float64)
+        self.purchase_time = np.full(capacity, NO_TIME, dtype=np.uint32)
+        self.sale_time = np.full(capacity, NO_TIME, dtype=np.uint32)
+        self.active = np.zeros(capacity, dtype=bool)
+
+        # interned ticker table and its state
+        self.tickers: List[str] = []
+        self._ticker_ids: Dict[str, int] = {}
+        self.ticker_yes = np.zeros(0, dtype=np.float64)
+        self.ticker_no = np.zeros(0, dtype=np.float64)
+        self.ticker_real_rank = np.zeros(0, dtype=np.int32)
+        self.ticker_potential_rank = np.zeros(0, dtype=np.int32)
+        self.ticker_last_updated = np.zeros(0, dtype=np.int64)
+
+        self.sides: List[str] = []
+        self._side_ids: Dict[str, int] = {}
+
+    _ROW_COLUMNS = ("ticker_id", "side", "quantity", "purchase_price", "current_price", "purchase_time", "sale_time", "active")
+    _TICKER_COLUMNS = ("ticker_yes", "ticker_no", "ticker_real_rank", "ticker_potential_rank", "ticker_last_updated")
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self._ROW_COLUMNS + self._TICKER_COLUMNS)
+
+    def intern_ticker(self, name: str) -> int:
+        ticker_id = self._ticker_ids.get(name)
+        if ticker_id is None:
+            ticker_id = len(self.tickers)
+            self.tickers.append(name)
+            self._ticker_ids[name] = ticker_id
+            if ticker_id >= len(self.ticker_yes):
+                capacity = max(16, int(len(self.ticker_yes) * 2))
+                for column in self._TICKER_COLUMNS:
+                    setattr(self, column, _resized(getattr(self, column), capacity, 0))
+        return ticker_id
+
+    def ticker_index(self, name: str) -> Optional[int]:
+        return self._ticker_ids.get(name)
+
+    def intern_side(self, side: str) -> int:
+        side_id = self._side_ids.get(side)
+        if side_id is None:
+            side_id = len(self.sides)
+            self.sides.append(side)
+            self._side_ids[side] = side_id
+        return side_id
+
+    def append(self, ticker: str, side: str, quantity: int, purchase_price: float, current_price: float,
+               purchase_time: Optional[float], sale_time: Optional[float], active: bool) -> int:
+        """Adds one row and returns its index."""
+        row = self.size
+        if row == len(self.quantity):
+            self._grow(int(row * _GROWTH) + 1)
+        self.ticker_id[row] = self.intern_ticker(ticker)
+        self.side[row] = self.intern_side(side)
+        self.quantity[row] = quantity
+        self.purchase_price[row] = purchase_price
+        self.current_price[row] = current_price
+        self.purchase_time[row] = encode_time(purchase_time)
+        self.sale_time[row] = encode_time(sale_time)
+        self.active[row] = active
+        self.size = row + 1
+        return row
+
+    def _grow(self, capacity: int):
+        for column in self._ROW_COLUMNS:
+            fill = NO_TIME if column.endswith("_time") else 0
+            setattr(self, column, _resized(getattr(self, column), capacity, fill))
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        The used rows as a DataFrame over the store's own memory, no column is copied.
+        ticker and side are categoricals over the interned tables.
+        """
+        n = self.size
+        frame = pd.DataFrame({column: getattr(self, column)[:n] for column in self._ROW_COLUMNS}, copy=False)
+        frame["ticker"] = pd.Categorical.from_codes(self.ticker_id[:n], categories=pd.Index(self.tickers, dtype=object), validate=False)
+        frame["side"] = pd.Categorical.from_codes(self.side[:n], categories=pd.Index(self.sides, dtype=object), validate=False)
+        return frame
+
+
+def encode_time(value: Optional[float]) -> int:
+    if value is None:
+        return NO_TIME
+    value = int(value)
+    if not 0 <= value < NO_TIME:
+        raise ValueError(f"trade time {value} is not an epoch-seconds timestamp")
+    return value
+
+
+def decode_time(value) -> Optional[int]:
+    return None if value == NO_TIME else int(value)
+
+
+def _resized(column: np.ndarray, capacity: int, fill) -> np.ndarray:
+    grown = np.full(capacity, fill, dtype=column.dtype)
+    grown[:len(column)] = column
+    return grown
+
+
+class LotQueue:
+    """
+    FIFO of open row indexes for one (ticker, side), oldest first, backed by a growable int32 array.
+    quantity and value (sum of current price * quantity) are aggregates the Ledger keeps over the open rows.
+    """
+
+    __slots__ = ("rows", "head", "tail", "quantity", "value")
+
+    def __init__(self):
+        self.rows = np.empty(4, dtype=np.int32)
+        self.head = 0
+        self.tail = 0
+        self.quantity = 0
+        self.value = 0.0
+
+    def __len__(self) -> int:
+        return self.tail - self.head
+
+    def open_rows(self) -> np.ndarray:
+        return self.rows[self.head:self.tail]
+
+    def push(self, row: int):
+        if self.tail == len(self.rows):
+            live = self.rows[self.head:self.tail]
+            if self.head >= len(self.rows) // 2:
+                # reuse the space left by popped lots before growing
+                self.rows[:len(live)] = live
+            else:
+                grown = np.empty(int(len(self.rows) * _GROWTH) + 1, dtype=np.int32)
+                grown[:len(live)] = live
+                self.rows = grown
+            self.head, self.tail = 0, len(live)
+        self.rows[self.tail] = row
+        self.tail += 1
+
+    def pop(self, count: int):
+        self.head += count
+        if self.head == self.tail:
+            self.head = self.tail = 0
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+import zlib
+
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+
+import numpy as np
+
+PASSTHROUGH = "passthrough"
+RECORD = "record"
+REPLAY = "replay"
+MODES = (PASSTHROUGH, RECORD, REPLAY)
+
+# one record per stored response: hashed request key, where its compressed record sits in responses.bin, status
+INDEX_DTYPE = np.dtype([("key", "<u8"), ("offset", "<u8"), ("length", "<u4"), ("status", "<u2")])
+# response headers worth keeping, the rest are transport details
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def request_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Canonical GET request: the url and its params in sorted order, so dict order never changes the key."""
+    if not params:
+        return url
+    query = urlencode(sorted((str(name), str(value)) for name, value in params.items() if value is not None))
+    return f"{url}?{query}"
+
+
+def key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+class ArchivedResponse:
+    """The part of requests.Response the connectors use, for responses served from an archive."""
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise RuntimeError(f"{self.status_code} for {self.url} (archived response)")
+
+
+class Archive:
+    """
+    Compressed, indexed store of raw HTTP responses.
+
+    Notes:
+        - path is a directory of responses.bin (zlib records back to back: a JSON line with the request key, status
+          and kept headers, then the body), index.bin (INDEX_DTYPE records) and meta.json
+        - put() appends, so an interrupted recording is still readable, close() rewrites the index sorted by key
+          with the latest response per request
+        - get() memory maps both files, a lookup is a binary search over the index and one decompress
+        - one process records into an archive at a time, any number can replay it
+    """
+
+    def __init__(self, path: str, writable: bool = False):
+        self.path = path
+        self.writable = writable
+        self._lock = threading.Lock()
+        self._data: Optional[mmap.mmap] = None
+        self._keys: Optional[np.ndarray] = None
+        self._index: Optional[np.ndarray] = None
+        if writable:
+            os.makedirs(path, exist_ok=True)
+            self._data_file = open(self._file("responses.bin"), "ab")
+            self._index_file = open(self._file("index.bin"), "ab")
+            self._write_meta(sorted_index=False)
+        elif not os.path.exists(self._file("index.bin")):
+            raise FileNotFoundError(f"no recorded archive at {path}")
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _write_meta(self, sorted_index: bool):
+        with open(self._file("meta.json"), "w") as file:
+            json.dump({"version": 1, "sorted": sorted_index}, file)
+
+    def put(self, key: str, status: int, headers: Dict[str, str], body: bytes):
+        header = json.dumps({"key": key, "status": status, "headers": headers}).encode()
+        record = zlib.compress(header + b"\n" + body, 6)
+        with self._lock:
+            offset = self._data_file.tell()
+            self._data_file.write(record)
+            self._data_file.flush()
+            entry = np.array([(key_hash(key), offset, len(record), status)], dtype=INDEX_DTYPE)
+            self._index_file.write(entry.tobytes())
+            self._index_file.flush()
+
+    def _open(self):
+        # maps the files on first lookup, an unsorted (interrupted) index is sorted in memory instead
+        with open(self._file("meta.json")) as file:
+            meta = json.load(file)
+        size = os.path.getsize(self._file("index.bin"))
+        index = np.memmap(self._file("index.bin"), dtype=INDEX_DTYPE, mode="r") if size else np.empty(0, INDEX_DTYPE)
+        if not meta.get("sorted"):
+            index = _latest_sorted(np.array(index))
+        with open(self._file("responses.bin"), "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(self._file("responses.bin")) else b""
+        self._index = index
+        self._keys = index["key"]
+
+    def get(self, key: str) -> Optional[ArchivedResponse]:
+        """The recorded response for key, or None when it was never recorded."""
+        if self._keys is None:
+            self._open()
+        h = key_hash(key)
+        position = int(np.searchsorted(self._keys, h))
+        if position == len(self._keys) or self._keys[position] != h:
+            return None
+        entry = self._index[position]
+        offset, length = int(entry["offset"]), int(entry["length"])
+        header, _, body = zlib.decompress(self._data[offset:offset + length]).partition(b"\n")
+        meta = json.loads(header)
+        if meta["key"] != key:
+            return None    # a 64 bit hash collision, never served as the wrong response
+        return ArchivedResponse(key, meta["status"], meta["headers"], body)
+
+    def __len__(self) -> int:
+        if self._keys is None:
+            self._open()
+        return len(self._keys)
+
+    def close(self):
+        if self.writable:
+            with self._lock:
+                self._data_file.close()
+                self._index_file.close()
+                index = np.fromfile(self._file("index.bin"), dtype=INDEX_DTYPE)
+                _latest_sorted(index).tofile(self._file("index.bin"))
+                self._write_meta(sorted_index=True)
+            self.writable = False
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = self._keys = self._index = None
+
+
+def _latest_sorted(index: np.ndarray) -> np.ndarray:
+    # sorted by key, keeping the last recorded entry of every key
+    if not len(index):
+        return index
+    order = np.lexsort((np.arange(len(index)), index["key"]))
+    index = index[order]
+    last = np.ones(len(index), dtype=bool)
+    last[:-1] = index["key"][1:] != index["key"][:-1]
+    return index[last]
+
+
+class Transport:
+    """
+    HTTP layer shared by the connectors (PolymarketConnector, OrderBook, app_store_connector.get_top_apps),
+    used in place of their requests.Session.
+
+    Notes:
+        - passthrough: every GET goes to the network, same as a plain session
+        - record: every GET goes to the network and its raw response is appended to the archive at path
+        - replay: every GET is answered from the archive at path, nothing is sent and requests is never imported,
+          a request that was not recorded gets a 404 with an {"error": ...} body (and a printed warning) the
+          connectors already handle like a failed fetch
+        - the request key is the url plus sorted params, request headers (conditional or user agent) are ignored,
+          so a replay answers a revalidation with the recorded body
+        - 304s are passed through but never recorded over the full response
+    """
+
+    def __init__(self, mode: str = PASSTHROUGH, path: Optional[str] = None, session=None, pool_size: int = 10):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, not {mode!r}")
+        if mode != PASSTHROUGH and path is None:
+            raise ValueError(f"{mode} needs an archive path")
+        self.mode = mode
+        self.path = path
+        self.archive = Archive(path, writable=mode == RECORD) if mode != PASSTHROUGH else None
+        self.pool_size = pool_size
+        self._session = session
+        self.requests = 0
+        self.misses = 0
+
+    @property
+    def session(self):
+        if self._session is None:
+            from polymarket_connector import build_session
+
+            self._session = build_session(pool_size=self.pool_size)
+        return self._session
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, **kwargs):
+        self.requests += 1
+        if self.mode == REPLAY:
+            key = request_key(url, params)
+            response = self.archive.get(key)
+            if response is None:
+                self.misses += 1
+                print(f"not recorded, answering 404: {key}")
+                return ArchivedResponse(key, 404, {"Content-Type": "application/json"},
+                                        json.dumps({"error": f"not recorded: {key}"}).encode())
+            return response
+
+        response = self.session.get(url, params=params, headers=headers, **kwargs)
+        if self.mode == RECORD and response.status_code != 304:
+            kept = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+            self.archive.put(request_key(url, params), response.status_code, kept, response.content)
+        return response
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False